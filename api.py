@@ -0,0 +1,236 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.ioloop
+import tornado.web
+
+import sections
+from shared_cache import SharedCache
+from screener import parse_symbol_list
+
+# --- JSON-API für andere Werkzeuge ---
+# Dieselben Abschnittsfunktionen wie die Seite (sections.py), aber ohne Streamlit: ein
+# asynchroner Tornado-Server, Rechnen in einem Thread-Pool. Fertige Antworten liegen als JSON
+# im SharedCache (TTL, Byte-Grenze, Single-Flight); der ETag ist der Hash des Bodys, bei
+# passendem If-None-Match antwortet Tornado mit 304. Alle Endpunkte nehmen viele Symbole je
+# Aufruf, per Query (?symbols=AAPL,SAP.DE) oder als JSON-Body per POST ({"symbols": [...]}).
+#
+#   python api.py                          # Port 8600
+#   python api.py --port 9000 --workers 16
+#
+#   GET /api/comparison?symbols=AAPL,MSFT&benchmark=^GSPC&period=1y
+#   GET /api/performance?symbols=AAPL,SAP.DE
+#   GET /api/risk?symbols=AAPL,SAP.DE
+#   GET /api/fundamentals?symbols=AAPL,SAP.DE
+
+API_PORT = int(os.environ.get("AKTIEN_API_PORT", 8600))
+API_WORKERS = int(os.environ.get("AKTIEN_API_WORKERS", 8))
+API_CACHE_MB = float(os.environ.get("AKTIEN_API_CACHE_MB", 64))
+API_CACHE_TTL = float(os.environ.get("AKTIEN_API_CACHE_TTL", 60))
+API_MAX_SYMBOLS = int(os.environ.get("AKTIEN_API_MAX_SYMBOLS", 200))
+DATA_EPOCH_SECONDS = 15 * 60   # wie der Aktualisierungstakt der Seite
+COMPARISON_PERIODS = ("1mo", "3mo", "6mo", "1y", "2y", "5y")
+
+
+def _json_value(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+        return None if isinstance(value, float) and value != value else value
+    return value
+
+
+def _table_payload(result, snapshot):
+    """Transponierte Abschnittstabelle (Kennzahlen x Symbole) als Symbol -> Kennzahl -> Wert."""
+    data = {}
+    if result.data is not None:
+        for symbol, column in result.data.items():
+            data[symbol] = {metric: _json_value(value) for metric, value in column.items()}
+    return {
+        "data": data,
+        "messages": [{"level": level, "text": text} for level, text in result.messages],
+        "snapshot": snapshot.version if snapshot is not None else None,
+    }
+
+
+class Analytics:
+    """Rechenkern der API; gemeinsame Speicher und Caches für alle Anfragen."""
+
+    def __init__(self, price_store=None, meta_cache=None, snapshots=None,
+                 workers=API_WORKERS, cache=None):
+        from price_store import PriceStore
+        from meta_cache import MetaCache
+        from snapshot import SnapshotSource
+        self.price_store = price_store or PriceStore()
+        self.meta_cache = meta_cache or MetaCache()
+        self.snapshots = snapshots or SnapshotSource()
+        self.cache = cache or SharedCache(API_CACHE_MB * 1024 * 1024, API_CACHE_TTL)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api")
+        self.endpoints = {
+            "comparison": self.comparison,
+            "performance": self.performance,
+            "risk": self.risk,
+            "fundamentals": self.fundamentals,
+        }
+
+    def _histories(self, symbols, benchmark, today):
+        epoch = int(time.time() // DATA_EPOCH_SECONDS)
+        return sections.load_histories(self.price_store, symbols, benchmark, today, epoch)
+
+    # --- Endpunkte (laufen im Thread-Pool) ---
+    def comparison(self, symbols, benchmark=None, period="1y"):
+        if period not in COMPARISON_PERIODS:
+            raise ValueError(f"Unbekannter Zeitraum: {period}")
+        today = datetime.date.today()
+        histories = self._histories(symbols, benchmark, today)
+        result = sections.comparison_frame(histories, symbols, benchmark, period, today)
+        series = {}
+        index = []
+        if result.data is not None:
+            index = [ts.isoformat() for ts in result.data.index]
+            for column, values in result.data.items():
+                name = benchmark if column == "Benchmark" else column
+                series[name] = [_json_value(round(value, 4)) for value in values]
+        return {
+            "index": index,
+            "series": series,
+            "benchmark": benchmark,
+            "messages": [{"level": level, "text": text} for level, text in histories.messages + result.messages],
+        }
+
+    def _snapshot_histories(self, table, symbols, snapshot, today):
+        # Enthält der Snapshot alle Symbole, werden keine Kurse geladen
+        if snapshot is not None and snapshot.covers(table, symbols):
+            return None
+        return self._histories(symbols, None, today)
+
+    def performance(self, symbols, snapshot=None):
+        histories = self._snapshot_histories("performance", symbols, snapshot, datetime.date.today())
+        return _table_payload(sections.performance_frame(histories, symbols, snapshot), snapshot)
+
+    def risk(self, symbols, snapshot=None):
+        today = datetime.date.today()
+        histories = self._snapshot_histories("risk", symbols, snapshot, today)
+        return _table_payload(sections.risk_frame(histories, symbols, today, snapshot), snapshot)
+
+    def fundamentals(self, symbols, snapshot=None):
+        result = sections.fundamentals_frame(self.meta_cache, symbols, {}, datetime.date.today(), snapshot)
+        return _table_payload(result, snapshot)
+
+    # --- Antwort-Cache ---
+    def respond(self, endpoint, symbols, options):
+        """(ETag, JSON-Body) für eine Anfrage, aus dem Cache oder frisch berechnet."""
+        fn = self.endpoints[endpoint]
+        if endpoint != "comparison":
+            options = dict(options, snapshot=self.snapshots.get())
+        # Schlüssel enthält Tag, Datentakt und Snapshot-Stand, damit neue Bars neue Antworten ergeben
+        key = (endpoint, tuple(symbols), repr(sorted(options.items())), datetime.date.today(),
+               int(time.time() // DATA_EPOCH_SECONDS))
+
+        def load():
+            body = json.dumps({"symbols": symbols, **fn(symbols, **options)}, ensure_ascii=False, allow_nan=False)
+            return f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()}"', body
+
+        return self.cache.get_or_load(key, load)
+
+
+class ApiHandler(tornado.web.RequestHandler):
+    def initialize(self, analytics, endpoint):
+        self.analytics = analytics
+        self.endpoint = endpoint
+        self._etag = None
+
+    def compute_etag(self):
+        # ETag aus dem Cache statt Hash über den Schreibpuffer
+        return self._etag
+
+    def write_error(self, status_code, **kwargs):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps({"error": self._reason, "status": status_code}, ensure_ascii=False))
+
+    def _request_params(self):
+        if self.request.method == "POST":
+            try:
+                params = json.loads(self.request.body or b"{}")
+            except ValueError:
+                raise tornado.web.HTTPError(400, reason="Ungültiger JSON-Body")
+            symbols = params.pop("symbols", [])
+            symbols = parse_symbol_list(",".join(symbols) if isinstance(symbols, list) else str(symbols))
+        else:
+            params = {name: self.get_argument(name) for name in self.request.arguments if name != "symbols"}
+            symbols = parse_symbol_list(self.get_argument("symbols", ""))
+        if not symbols:
+            raise tornado.web.HTTPError(400, reason="Keine Symbole angegeben")
+        if len(symbols) > API_MAX_SYMBOLS:
+            raise tornado.web.HTTPError(400, reason=f"Höchstens {API_MAX_SYMBOLS} Symbole je Aufruf")
+        allowed = {"benchmark", "period"} if self.endpoint == "comparison" else set()
+        unknown = set(params) - allowed
+        if unknown:
+            raise tornado.web.HTTPError(400, reason=f"Unbekannte Parameter: {', '.join(sorted(unknown))}")
+        return symbols, params
+
+    async def _respond(self):
+        symbols, options = self._request_params()
+        loop = tornado.ioloop.IOLoop.current()
+        try:
+            self._etag, body = await loop.run_in_executor(
+                self.analytics.executor, self.analytics.respond, self.endpoint, symbols, options
+            )
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, reason=str(e))
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.set_header("Cache-Control", f"max-age={int(API_CACHE_TTL)}")
+        self.write(body)
+
+    async def get(self):
+        await self._respond()
+
+    async def post(self):
+        # POST für lange Symbollisten; ETag wird gesetzt, 304 gibt es nur bei GET
+        await self._respond()
+        self.set_etag_header()
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    def initialize(self, analytics):
+        self.analytics = analytics
+
+    def get(self):
+        snapshot = self.analytics.snapshots.get()
+        self.write({
+            "status": "ok",
+            "snapshot": snapshot.version if snapshot is not None else None,
+            "cache": dict(self.analytics.cache.stats, bytes=self.analytics.cache.size_bytes()),
+        })
+
+
+def make_app(analytics=None):
+    analytics = analytics or Analytics()
+    routes = [(r"/api/health", HealthHandler, dict(analytics=analytics))]
+    routes += [(rf"/api/{endpoint}", ApiHandler, dict(analytics=analytics, endpoint=endpoint))
+               for endpoint in analytics.endpoints]
+    return tornado.web.Application(routes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JSON-API für Kursvergleich, Performance, Risiko und Fundamentaldaten")
+    parser.add_argument("--port", type=int, default=API_PORT, help="HTTP-Port")
+    parser.add_argument("--workers", type=int, default=API_WORKERS, help="Threads für Berechnungen und Abrufe")
+    args = parser.parse_args(argv)
+
+    app = make_app(Analytics(workers=args.workers))
+    app.listen(args.port)
+    print(f"JSON-API auf Port {args.port}")
+    tornado.ioloop.IOLoop.current().start()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
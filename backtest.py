@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ets_batch import fit_damped_holt, forecast_damped_holt
+from forecasting import PROPHET, ETS, DEFAULT_SETTINGS, fit_model, predict
+from screener import universe_from_main, parse_symbol_list
+
+# --- Walk-Forward-Backtest der Prognosemodelle ---
+# Für jedes Symbol des Universums (us_stocks/dax_stocks aus main.py) werden mehrere
+# Prognoseursprünge in die Vergangenheit gelegt, auf dem Fenster davor gefittet und mit den
+# tatsächlichen Kursen verglichen. Gemessen werden Fehler und Fit-Zeit je Modell.
+#
+#   python backtest.py                                  # gebündeltes ETS und statsmodels-ETS
+#   python backtest.py --models batch,ets,prophet --origins 8 --horizon 10
+#   python backtest.py --symbols AAPL,SAP.DE --json
+
+BATCH = "batch"
+MODEL_NAMES = {BATCH: "ETS (gebündelt, NumPy)", "ets": f"{ETS} (statsmodels)", "prophet": PROPHET}
+
+
+def walk_forward_windows(closes, horizon, origins, step, window):
+    """(Symbol, Ursprung, Trainingsfenster, Ist-Werte, Datumsindex, Ist-Daten) je Symbol und Ursprung."""
+    windows = []
+    for symbol, series in closes.items():
+        values = series.to_numpy(dtype=float)
+        for k in range(origins):
+            cut = len(values) - horizon - k * step
+            if cut - window < 0:
+                break
+            windows.append((symbol, series.index[cut - 1], values[cut - window:cut], values[cut:cut + horizon],
+                            series.index[cut - window:cut], series.index[cut:cut + horizon]))
+    return windows
+
+
+def _fit_single(method, values, dates, horizon, target_dates):
+    """Läuft im Worker-Prozess: ein Modell fitten und für die `horizon` Ist-Handelstage prognostizieren."""
+    series = pd.Series(values, index=dates)
+    started = time.perf_counter()
+    model = fit_model(method, series, DEFAULT_SETTINGS[method])
+    fit_seconds = time.perf_counter() - started
+    if method == PROPHET:
+        # Prophet rechnet in Kalendertagen; direkt an den Handelstagen der Ist-Werte auswerten
+        target = pd.DatetimeIndex(target_dates)
+        future = pd.DataFrame({"ds": target.tz_localize(None) if target.tz is not None else target})
+        forecast = model.predict(future)["yhat"].to_numpy(dtype=float)
+    else:
+        forecast = predict(method, model, series, horizon, "1d")["yhat"].to_numpy(dtype=float)[-horizon:]
+    return forecast, fit_seconds
+
+
+def run_batch(windows, horizon):
+    started = time.perf_counter()
+    fit = fit_damped_holt(np.vstack([train for _s, _o, train, _a, _d, _t in windows]))
+    forecasts = forecast_damped_holt(fit, horizon)
+    elapsed = time.perf_counter() - started
+    return list(forecasts), elapsed, elapsed / len(windows)
+
+
+def run_pool(method, windows, horizon, workers):
+    # spawn wie im Prognose-Dienst; Fit-Zeit je Modell im Worker gemessen, Wandzeit hier
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_fit_single, method, train, dates, horizon, target)
+                   for _s, _o, train, _a, dates, target in windows]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception:
+                results.append((np.full(horizon, np.nan), np.nan))
+    elapsed = time.perf_counter() - started
+    forecasts = [forecast for forecast, _seconds in results]
+    return forecasts, elapsed, float(np.nanmean([seconds for _forecast, seconds in results]))
+
+
+def error_report(name, windows, forecasts, wall_seconds, fit_seconds):
+    actual = np.vstack([actual for _s, _o, _tr, actual, _d, _t in windows])
+    last = np.array([train[-1] for _s, _o, train, _a, _d, _t in windows])
+    predicted = np.vstack(forecasts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ape = np.abs(predicted - actual) / np.abs(actual) * 100
+    return {
+        "Modell": name,
+        "Fits": len(windows),
+        "MAPE (%)": float(np.nanmean(ape)),
+        "MAPE letzter Schritt (%)": float(np.nanmean(ape[:, -1])),
+        "Richtung korrekt (%)": float(np.mean(np.sign(predicted[:, -1] - last) == np.sign(actual[:, -1] - last)) * 100),
+        "Wandzeit [s]": wall_seconds,
+        "Fit je Reihe [ms]": fit_seconds * 1000,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-Forward-Backtest der Prognosemodelle über das Universum")
+    parser.add_argument("--models", default="batch,ets", help="Kommagetrennt: batch, ets, prophet")
+    parser.add_argument("--symbols", default=None, help="Kommagetrennte Symbole statt des Universums aus main.py")
+    parser.add_argument("--horizon", type=int, default=7, help="Prognoseschritte (Handelstage)")
+    parser.add_argument("--origins", type=int, default=5, help="Prognoseursprünge je Symbol")
+    parser.add_argument("--step", type=int, default=21, help="Abstand der Ursprünge in Handelstagen")
+    parser.add_argument("--window", type=int, default=250, help="Trainingsfenster in Handelstagen")
+    parser.add_argument("--workers", type=int, default=max((os.cpu_count() or 2) - 1, 1), help="Prozesse für Einzel-Fits")
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    from price_store import PriceStore
+    symbols = parse_symbol_list(args.symbols) if args.symbols else list(universe_from_main())
+    histories = PriceStore().history_many(symbols, "1d", period="5y")
+    closes = {symbol: df["Close"].dropna() for symbol, df in histories.items() if not df.empty}
+    windows = walk_forward_windows(closes, args.horizon, args.origins, args.step, args.window)
+    if not windows:
+        print("Keine ausreichenden Kursdaten für den Backtest.", file=sys.stderr)
+        return 1
+
+    reports = []
+    forecasts_by_model = {}
+    for model in [m.strip() for m in args.models.split(",") if m.strip()]:
+        if model == BATCH:
+            forecasts, wall, per_fit = run_batch(windows, args.horizon)
+        elif model in ("ets", "prophet"):
+            forecasts, wall, per_fit = run_pool(ETS if model == "ets" else PROPHET, windows, args.horizon, args.workers)
+        else:
+            parser.error(f"Unbekanntes Modell: {model}")
+        forecasts_by_model[model] = np.vstack(forecasts)
+        reports.append(error_report(MODEL_NAMES[model], windows, forecasts, wall, per_fit))
+
+    # Übereinstimmung des gebündelten ETS mit statsmodels (relative Abweichung der Prognosen)
+    agreement = None
+    if BATCH in forecasts_by_model and "ets" in forecasts_by_model:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            diff = np.abs(forecasts_by_model[BATCH] - forecasts_by_model["ets"]) / np.abs(forecasts_by_model["ets"]) * 100
+        agreement = {"mittel (%)": float(np.nanmean(diff)), "p95 (%)": float(np.nanpercentile(diff, 95))}
+
+    if args.json:
+        print(json.dumps({"symbols": len(closes), "windows": len(windows), "models": reports, "agreement": agreement}, indent=2))
+        return 0
+
+    print(f"{len(closes)} Symbole, {len(windows)} Prognoseursprünge, Horizont {args.horizon}\n")
+    print(pd.DataFrame(reports).set_index("Modell").round(3).to_string())
+    if agreement:
+        print(f"\nAbweichung gebündelt vs. statsmodels: mittel {agreement['mittel (%)']:.3f} %, "
+              f"p95 {agreement['p95 (%)']:.3f} %")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1 @@
+# Projektverzeichnis als Wurzel für pytest, damit tests/ die Module direkt importiert
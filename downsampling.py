@@ -0,0 +1,73 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# --- Downsampling für Charts ---
+# Linien werden mit LTTB (Largest-Triangle-Three-Buckets) ausgedünnt, das Spitzen und
+# Form erhält; Kerzen werden zu größeren OHLC-Buckets zusammengefasst. So bleibt das
+# Plotly-JSON unabhängig von Zeitraum und Intervall etwa gleich groß.
+
+# Punktbudget je Linie bzw. Anzahl Kerzen (ca. ein Punkt pro 1-3 Pixel Chartbreite)
+MAX_LINE_POINTS = 1500
+MAX_CANDLES = 400
+
+
+def lttb_indices(x, y, threshold):
+    """Indizes der von LTTB ausgewählten Punkte (erster und letzter bleiben immer erhalten)."""
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Bucket-Grenzen für die inneren Punkte (der erste und letzte Punkt sind gesetzt)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Mittelwert des nächsten Buckets als dritter Dreieckspunkt
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], max(edges[i + 2], edges[i + 1] + 1)
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) -
+            (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    selected[-1] = n - 1
+    return selected
+
+
+def downsample_series(series, threshold=MAX_LINE_POINTS):
+    """Zeitreihe mit LTTB auf höchstens `threshold` Punkte reduzieren (NaN werden ignoriert)."""
+    series = series.dropna()
+    if len(series) <= threshold:
+        return series
+    x = series.index.asi8 if isinstance(series.index, pd.DatetimeIndex) else np.arange(len(series))
+    return series.iloc[lttb_indices(x, series.to_numpy(dtype=float), threshold)]
+
+
+def ohlc_buckets(df, max_bars=MAX_CANDLES):
+    """Aufeinanderfolgende Kerzen zu höchstens `max_bars` OHLCV-Buckets zusammenfassen."""
+    n = len(df)
+    if n <= max_bars:
+        return df
+    size = math.ceil(n / max_bars)
+    starts = np.arange(0, n, size)
+    ends = np.append(starts[1:], n)
+
+    result = pd.DataFrame(index=df.index[starts])
+    result["Open"] = df["Open"].to_numpy()[starts]
+    result["High"] = np.fmax.reduceat(df["High"].to_numpy(dtype=float), starts)
+    result["Low"] = np.fmin.reduceat(df["Low"].to_numpy(dtype=float), starts)
+    result["Close"] = df["Close"].to_numpy()[ends - 1]
+    if "Volume" in df.columns:
+        result["Volume"] = np.add.reduceat(np.nan_to_num(df["Volume"].to_numpy(dtype=float)), starts)
+    return result
@@ -0,0 +1,144 @@
+from collections import namedtuple
+
+import numpy as np
+
+# --- Gebündeltes Holt-Verfahren mit gedämpftem Trend ---
+# Entspricht ExponentialSmoothing(trend="add", damped_trend=True, seasonal=None) aus
+# statsmodels, fittet aber viele Reihen gleichzeitig: Jede Zeile einer Matrix ist eine Reihe,
+# die Rekursion läuft einmal über die Zeit und vektorisiert über Reihen x Parameterkandidaten.
+# Parameter per Gittersuche mit lokaler Verfeinerung (SSE der Ein-Schritt-Fehler); Startniveau
+# und -trend werden wie in statsmodels mitgeschätzt, hier exakt je Parameterkandidat.
+#
+#   Niveau  l_t = l_{t-1} + phi * b_{t-1} + alpha * e_t
+#   Trend   b_t = beta * (l_t - l_{t-1}) + (1 - beta) * phi * b_{t-1}
+#   Prognose y_{T+h} = l_T + (phi + ... + phi^h) * b_T
+
+HoltFit = namedtuple("HoltFit", ["alpha", "beta", "phi", "level", "trend", "sse"])
+
+# Grenzen wie in statsmodels (phi in [0.8, 0.98], beta <= alpha)
+PHI_BOUNDS = (0.8, 0.98)
+ALPHA_GRID = np.array([0.02, 0.05, 0.1, 0.2, 0.3, 0.45, 0.6, 0.75, 0.9, 0.995])
+BETA_FRACTIONS = np.array([0.0, 0.01, 0.05, 0.15, 0.35, 0.7])   # beta = Anteil * alpha
+PHI_GRID = np.linspace(*PHI_BOUNDS, 5)
+REFINE_ROUNDS = 3
+
+
+def _sse(y, alpha, beta, phi, starts):
+    """SSE der Ein-Schritt-Fehler für alle Reihen (S x T) und Kandidaten (S x K) gleichzeitig.
+
+    Reihe s beginnt bei Spalte starts[s] (davor NaN-Auffüllung). Startniveau und -trend vor der
+    ersten Beobachtung werden wie in statsmodels (initialization_method="estimated") mitgeschätzt:
+    die Fehler hängen linear von ihnen ab, je Kandidat gibt es also eine exakte
+    Kleinste-Quadrate-Lösung. Die Rekursion läuft dafür in drei Anteilen: Daten bei Startzustand 0
+    sowie Startniveau 1 und Starttrend 1 ohne Daten. Liefert (SSE, Niveau, Trend) am Ende je Kandidat.
+    """
+    level = np.zeros((3,) + alpha.shape)
+    trend = np.zeros((3,) + alpha.shape)
+    level[1] = 1.0
+    trend[2] = 1.0
+    # Summen der Fehlerprodukte: r = Fehler bei Startzustand 0, u/v = Prognoseanteil je Startwert
+    rr, ru, rv, uu, uv, vv = (np.zeros_like(alpha) for _ in range(6))
+    for t in range(int(starts.min()), y.shape[1]):
+        # Reihen, die erst später beginnen, behalten ihre Startwerte und sammeln keinen Fehler
+        active = (t >= starts)[:, None]
+        damped = phi * trend
+        forecast = level + damped
+        error = -forecast
+        error[0] += np.where(active, y[:, t:t + 1], 0.0)
+        error = np.where(active, error, 0.0)
+        r, u, v = error[0], forecast[1] * active, forecast[2] * active
+        rr += r * r
+        ru += r * u
+        rv += r * v
+        uu += u * u
+        uv += u * v
+        vv += v * v
+        new_level = forecast + alpha * error
+        trend = np.where(active, beta * (new_level - level) + (1 - beta) * damped, trend)
+        level = np.where(active, new_level, level)
+
+    # Normalgleichungen [uu uv; uv vv] (l0, b0) = (ru, rv), minimal regularisiert
+    ridge = 1e-10 * (uu + vv) + 1e-300
+    uu, vv = uu + ridge, vv + ridge
+    det = uu * vv - uv * uv
+    l0 = (ru * vv - rv * uv) / det
+    b0 = (rv * uu - ru * uv) / det
+    sse = np.maximum(rr - l0 * ru - b0 * rv, 0.0)
+    return sse, level[0] + l0 * level[1] + b0 * level[2], trend[0] + l0 * trend[1] + b0 * trend[2]
+
+
+def _candidates(shape_s):
+    alpha, fraction, phi = np.meshgrid(ALPHA_GRID, BETA_FRACTIONS, PHI_GRID, indexing="ij")
+    alpha, fraction, phi = alpha.ravel(), fraction.ravel(), phi.ravel()
+    tile = lambda values: np.tile(values, (shape_s, 1))
+    return tile(alpha), tile(alpha * fraction), tile(phi)
+
+
+def _neighbours(best, step):
+    # 3 x 3 x 3 Gitter um den besten Punkt je Reihe, in die Grenzen geklemmt
+    offsets = np.array([-1.0, 0.0, 1.0])
+    da, db, dp = [grid.ravel() for grid in np.meshgrid(offsets, offsets, offsets, indexing="ij")]
+    alpha = np.clip(best[0][:, None] + da * step[0], 1e-4, 1.0)
+    beta = np.clip(best[1][:, None] + db * step[1], 0.0, None)
+    beta = np.minimum(beta, alpha)
+    phi = np.clip(best[2][:, None] + dp * step[2], *PHI_BOUNDS)
+    return alpha, beta, phi
+
+
+def fit_damped_holt(values, starts=None):
+    """Alle Zeilen von `values` (S x T) fitten.
+
+    Ohne `starts` ohne NaN; sonst beginnt Reihe s bei Spalte starts[s] (links mit NaN
+    aufgefüllt), mindestens drei Beobachtungen je Reihe.
+    """
+    y = np.asarray(values, dtype=float)
+    starts = np.zeros(y.shape[0], dtype=int) if starts is None else np.asarray(starts, dtype=int)
+    if y.ndim != 2 or (y.shape[1] - starts < 3).any():
+        raise ValueError("Mindestens drei Beobachtungen je Reihe nötig")
+    rows = np.arange(y.shape[0])
+
+    alpha, beta, phi = _candidates(y.shape[0])
+    step = np.array([0.1, 0.05, 0.04])
+    best = None
+    for _ in range(REFINE_ROUNDS + 1):
+        sse, level, trend = _sse(y, alpha, beta, phi, starts)
+        pick = np.nanargmin(np.where(np.isfinite(sse), sse, np.inf), axis=1)
+        best = (alpha[rows, pick], beta[rows, pick], phi[rows, pick], level[rows, pick], trend[rows, pick], sse[rows, pick])
+        alpha, beta, phi = _neighbours(best, step)
+        step = step / 2
+    return HoltFit(*best)
+
+
+def forecast_damped_holt(fit, horizon):
+    """Prognosen für alle gefitteten Reihen (S x horizon)."""
+    steps = np.arange(1, horizon + 1)
+    # phi + phi^2 + ... + phi^h je Reihe und Schritt
+    damping = np.cumsum(fit.phi[:, None] ** steps[None, :], axis=1)
+    return fit.level[:, None] + damping * fit.trend[:, None]
+
+
+def batch_forecast(series_by_key, horizon, max_obs=500):
+    """Viele Kursreihen auf einmal prognostizieren; Dict Schlüssel -> Array der Länge `horizon`.
+
+    Jede Reihe behält ihre letzten höchstens `max_obs` Werte; kürzere Reihen werden links mit
+    NaN aufgefüllt und beginnen später, statt alle anderen auf ihre Länge zu kürzen.
+    Reihen mit weniger als drei Werten fehlen im Ergebnis.
+    """
+    cleaned = {}
+    for key, series in series_by_key.items():
+        values = np.asarray(series, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) >= 3:
+            cleaned[key] = values
+    if not cleaned:
+        return {}
+
+    length = min(max_obs, max(len(values) for values in cleaned.values()))
+    matrix = np.full((len(cleaned), length), np.nan)
+    starts = np.empty(len(cleaned), dtype=int)
+    for row, values in enumerate(cleaned.values()):
+        values = values[-length:]
+        starts[row] = length - len(values)
+        matrix[row, starts[row]:] = values
+    fit = fit_damped_holt(matrix, starts)
+    return dict(zip(cleaned, forecast_damped_holt(fit, horizon)))
@@ -0,0 +1,117 @@
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import yfinance as yf
+from tenacity import Retrying, retry_if_not_exception_type, stop_after_attempt, wait_exponential_jitter
+
+from providers import SourceUnavailable
+
+# --- Abruf-Schicht ---
+# Kurse aller Symbole (inkl. Benchmark) kommen in einer Multi-Ticker-Anfrage; was sich nicht
+# bündeln lässt (z. B. Ticker.info), läuft parallel über einen begrenzten Thread-Pool.
+
+YAHOO_HOST = "query2.finance.yahoo.com"
+MAX_WORKERS = 8
+MAX_PER_HOST = 4
+RETRY_ATTEMPTS = 3
+
+
+def _retrying():
+    return Retrying(
+        stop=stop_after_attempt(RETRY_ATTEMPTS),
+        wait=wait_exponential_jitter(initial=0.5, max=8),
+        # Offener Circuit Breaker und unbekannte Symbole: sofort aufgeben statt Backoff
+        retry=retry_if_not_exception_type((SourceUnavailable, LookupError)),
+        reraise=True
+    )
+
+
+def split_download(df, symbols):
+    """Ergebnis von yf.download(group_by="ticker") in ein DataFrame pro Symbol zerlegen."""
+    frames = {}
+    if df is None or df.empty:
+        return {symbol: pd.DataFrame() for symbol in symbols}
+    if not isinstance(df.columns, pd.MultiIndex):
+        # Nur ein Symbol angefragt und flache Spalten erhalten
+        return {symbols[0]: df}
+    tickers = df.columns.get_level_values(0)
+    for symbol in symbols:
+        if symbol in tickers:
+            frames[symbol] = df[symbol].dropna(how="all")
+        else:
+            frames[symbol] = pd.DataFrame()
+    return frames
+
+
+def download_batch(symbols, start, interval="1d"):
+    """Kurse mehrerer Symbole in einer Anfrage laden, Ergebnis als Dict Symbol -> DataFrame."""
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+    start = pd.Timestamp(start)
+    for attempt in _retrying():
+        with attempt:
+            df = yf.download(
+                symbols,
+                start=start.tz_localize(None) if start.tz is not None else start,
+                interval=interval,
+                auto_adjust=True,
+                group_by="ticker",
+                threads=True,
+                progress=False
+            )
+    return split_download(df, symbols)
+
+
+class FetchExecutor:
+    """Begrenzter Thread-Pool mit Limit pro Host sowie Retry mit Backoff."""
+
+    def __init__(self, max_workers=MAX_WORKERS, per_host=MAX_PER_HOST):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self._per_host = per_host
+        self._host_limits = {}
+        self._lock = threading.Lock()
+
+    def _host_limit(self, host):
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self._per_host)
+            return self._host_limits[host]
+
+    def _call(self, fn, args, kwargs, host):
+        limit = self._host_limit(host)
+        for attempt in _retrying():
+            with attempt:
+                # Semaphore nur während des Aufrufs halten, nicht während des Backoffs
+                with limit:
+                    return fn(*args, **kwargs)
+
+    def submit(self, fn, *args, host=YAHOO_HOST, **kwargs):
+        # Kontext mitgeben, damit Messpunkte dem aufrufenden Abschnitt zugeordnet werden
+        context = contextvars.copy_context()
+        return self._pool.submit(context.run, self._call, fn, args, kwargs, host)
+
+    def map(self, fn, items, host=YAHOO_HOST):
+        """`fn` für alle `items` parallel ausführen; Ergebnis oder Exception pro Item."""
+        futures = {item: self.submit(fn, item, host=host) for item in items}
+        results = {}
+        for item, future in futures.items():
+            try:
+                results[item] = future.result()
+            except Exception as e:
+                results[item] = e
+        return results
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = FetchExecutor()
+        return _executor
@@ -0,0 +1,186 @@
+import os
+import time
+import queue
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from cachetools import TTLCache
+
+from forecasting import fit_model, serialize_model, deserialize_model
+
+# --- Prognose-Dienst im Hintergrund ---
+# Fits laufen in einem Prozess-Pool statt im Streamlit-Skript-Thread. Anfragen blockieren nicht:
+# sie liefern "done" (Modell im Cache), "pending" (Job läuft), "busy" (Warteschlange voll)
+# oder "failed". Fertige Modelle landen im ForecastCache des Hauptprozesses, eingesammelt bei
+# jeder Anfrage und alle WATCH_SECONDS im Hintergrund.
+#
+# Das Timeout zählt ab dem Start im Worker, nicht ab dem Einreihen: der Worker meldet Beginn
+# und PID und bricht den Fit per SIGALRM selbst ab. Reagiert ein Worker darauf nicht (Fit
+# hängt in C-Code), wird nach KILL_GRACE_SECONDS nur dieser Prozess beendet; Jobs, die dabei
+# mit dem Pool abbrechen, werden in einem neuen Pool erneut eingereiht.
+
+FORECAST_WORKERS = int(os.environ.get("AKTIEN_FORECAST_WORKERS", max((os.cpu_count() or 2) - 1, 1)))
+FORECAST_MAX_PENDING = int(os.environ.get("AKTIEN_FORECAST_MAX_PENDING", 16))
+FORECAST_TIMEOUT_SECONDS = float(os.environ.get("AKTIEN_FORECAST_TIMEOUT", 120))
+WATCH_SECONDS = 5   # Takt, in dem fertige und hängende Jobs auch ohne Abfrage eingesammelt werden
+KILL_GRACE_SECONDS = 30
+
+DONE = "done"
+PENDING = "pending"
+BUSY = "busy"
+FAILED = "failed"
+
+_started_queue = None   # im Worker: Rückkanal für (Schlüssel, PID, Startzeit)
+
+
+class FitTimeout(Exception):
+    pass
+
+
+def _init_worker(started_queue):
+    global _started_queue
+    _started_queue = started_queue
+
+
+def _on_alarm(_signum, _frame):
+    raise FitTimeout()
+
+
+def run_fit_job(key, method, series, settings, init=None, timeout=None):
+    """Läuft im Worker-Prozess: Modell fitten und serialisiert zurückgeben.
+
+    Meldet den Beginn an den Hauptprozess und bricht nach `timeout` Sekunden selbst ab.
+    """
+    if _started_queue is not None:
+        _started_queue.put((key, os.getpid(), time.time()))
+    alarm = timeout and hasattr(signal, "setitimer")
+    if alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        model = fit_model(method, series, settings, init=init)
+    except FitTimeout:
+        raise TimeoutError(f"Zeitüberschreitung nach {timeout:.0f} s") from None
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return serialize_model(method, model)
+
+
+class ForecastService:
+    def __init__(self, cache, max_workers=FORECAST_WORKERS, max_pending=FORECAST_MAX_PENDING,
+                 timeout=FORECAST_TIMEOUT_SECONDS):
+        self.cache = cache
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        # spawn statt fork: der Streamlit-Server ist multithreaded
+        self._context = multiprocessing.get_context("spawn")
+        self._started = self._context.Queue()
+        self._pool = self._new_pool()
+        self._jobs = {}      # Schlüssel -> (Future, Pool, Job-Argumente)
+        self._running = {}   # Schlüssel -> (PID, Startzeit im Worker)
+        self._failed = TTLCache(maxsize=256, ttl=10 * 60)  # Schlüssel -> Fehlermeldung, danach neuer Versuch
+        self._lock = threading.Lock()
+        threading.Thread(target=self._watch, name="forecast-watch", daemon=True).start()
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self._context,
+                                   initializer=_init_worker, initargs=(self._started,))
+
+    def _submit(self, key, args):
+        # Unter self._lock; ein abgebrochener Pool wird einmal ersetzt
+        try:
+            future = self._pool.submit(run_fit_job, key, *args, timeout=self.timeout)
+        except BrokenProcessPool:
+            self._pool = self._new_pool()
+            future = self._pool.submit(run_fit_job, key, *args, timeout=self.timeout)
+        self._jobs[key] = (future, self._pool, args)
+        self._running.pop(key, None)
+
+    def _drain_started(self):
+        # Startmeldungen der Worker übernehmen (unter self._lock)
+        while True:
+            try:
+                key, pid, started = self._started.get_nowait()
+            except queue.Empty:
+                return
+            if key in self._jobs:
+                self._running[key] = (pid, started)
+
+    def _watch(self):
+        while True:
+            time.sleep(WATCH_SECONDS)
+            with self._lock:
+                self._drain_started()
+                for key in list(self._jobs):
+                    self._collect(key)
+
+    def _collect(self, key):
+        # Fertigen oder hängenden Job abschließen; liefert (Status, Modell oder Fehler)
+        future, pool, args = self._jobs[key]
+        if future.done():
+            try:
+                model = deserialize_model(key[2], future.result())
+            except BrokenProcessPool:
+                # Pool brach ab, weil ein anderer Worker beendet wurde: Job erneut einreihen
+                if pool is self._pool:
+                    self._pool = self._new_pool()
+                self._submit(key, args)
+                return PENDING, None
+            except Exception as e:
+                del self._jobs[key]
+                self._running.pop(key, None)
+                self._failed[key] = str(e)
+                return FAILED, str(e)
+            del self._jobs[key]
+            self._running.pop(key, None)
+            self.cache.put(key, model)
+            return DONE, model
+        running = self._running.get(key)
+        if running is not None and time.time() - running[1] > self.timeout + KILL_GRACE_SECONDS:
+            # Der Worker reagiert nicht auf sein eigenes Timeout: nur diesen Prozess beenden
+            pid = running[0]
+            del self._jobs[key]
+            del self._running[key]
+            self._failed[key] = f"Zeitüberschreitung nach {self.timeout:.0f} s"
+            try:
+                os.kill(pid, signal.SIGKILL if hasattr(signal, "SIGKILL") else signal.SIGTERM)
+            except OSError:
+                pass
+            return FAILED, self._failed[key]
+        return PENDING, None
+
+    def request(self, symbol, interval, method, series, settings=None):
+        """Modell nicht-blockierend anfordern; Rückgabe (Status, Modell oder Fehlermeldung, Cache-Schlüssel)."""
+        key = self.cache.key(symbol, interval, method, series, settings)
+        model = self.cache.lookup(key)
+        if model is not None:
+            return DONE, model, key
+
+        with self._lock:
+            if key in self._failed:
+                return FAILED, self._failed[key], key
+            if key in self._jobs:
+                self._drain_started()
+                status, payload = self._collect(key)
+                return status, payload, key
+            if len(self._jobs) >= self.max_pending:
+                return BUSY, None, key
+            self._submit(key, (method, series, key[3], self.cache.warm_start_params(key)))
+        return PENDING, None, key
+
+    def ready(self, keys):
+        """True, sobald für einen der Schlüssel ein Ergebnis vorliegt oder die Warteschlange wieder Platz hat."""
+        with self._lock:
+            self._drain_started()
+            for key in keys:
+                if key in self._jobs:
+                    if self._collect(key)[0] != PENDING:
+                        return True
+                elif key in self._failed or self.cache.lookup(key) is not None or len(self._jobs) < self.max_pending:
+                    return True
+        return False
@@ -0,0 +1,198 @@
+import os
+import pickle
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+from cachetools import LRUCache
+
+# --- Prognose-Cache ---
+# Gefittete Modelle je (Symbol, Intervall, Methode, Einstellungen, letzter Bar) im Speicher (LRU)
+# und optional auf der Platte. Ändert sich nur der Horizont, wird nur neu vorhergesagt.
+# Kommt ein neuer Bar hinzu, startet Prophet mit den Parametern des letzten Fits (Warm Start).
+# Prophet und statsmodels werden erst beim ersten Fit importiert (mehrere Sekunden Startzeit).
+
+FORECAST_CACHE_DIR = os.environ.get("AKTIEN_FORECAST_CACHE")  # None = nur im Speicher
+FORECAST_CACHE_SIZE = int(os.environ.get("AKTIEN_FORECAST_CACHE_SIZE", 32))
+
+PROPHET = "Prophet"
+ETS = "Exponential Smoothing"
+
+DEFAULT_SETTINGS = {
+    PROPHET: (("daily_seasonality", True),),
+    ETS: (("trend", "add"), ("damped_trend", True)),
+}
+
+# Abstand zukünftiger Bars je Intervall (Tagesdaten nur an Werktagen)
+FUTURE_OFFSETS = {
+    "1d": pd.offsets.BDay(1),
+    "1wk": pd.DateOffset(weeks=1),
+    "1mo": pd.DateOffset(months=1),
+}
+
+
+def last_bar_fingerprint(series):
+    """Kurzer Hash über Länge, ersten und letzten Bar einer Kursreihe."""
+    if series.empty:
+        return "leer"
+    raw = f"{len(series)}|{series.index[0]}|{series.index[-1]}|{float(series.iloc[-1]):.6f}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def future_index(last_ts, horizon, interval):
+    offset = FUTURE_OFFSETS.get(interval, pd.offsets.BDay(1))
+    return pd.DatetimeIndex([last_ts + offset * (step + 1) for step in range(horizon)])
+
+
+def stan_init(model):
+    """Parameter eines gefitteten Prophet-Modells als Startwerte für den nächsten Fit."""
+    params = {}
+    for name in ["k", "m", "sigma_obs"]:
+        params[name] = model.params[name][0][0]
+    for name in ["delta", "beta"]:
+        params[name] = model.params[name][0]
+    return params
+
+
+def _prophet_frame(series):
+    df = series.reset_index()
+    df.columns = ["ds", "y"]
+    # Prophet akzeptiert keine Zeitzonen
+    if getattr(df["ds"].dt, "tz", None) is not None:
+        df["ds"] = df["ds"].dt.tz_localize(None)
+    return df
+
+
+def fit_model(method, series, settings, init=None):
+    """Modell fitten; `init` sind Prophet-Startwerte aus einem früheren Fit derselben Reihe."""
+    options = dict(settings)
+    if method == PROPHET:
+        from prophet import Prophet
+        model = Prophet(**options)
+        if init is not None:
+            model.fit(_prophet_frame(series), init=init)
+        else:
+            model.fit(_prophet_frame(series))
+        return model
+    if method == ETS:
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+        return ExponentialSmoothing(series.to_numpy(dtype=float), seasonal=None, **options).fit()
+    raise ValueError(f"Unbekannte Prognosemethode: {method}")
+
+
+def serialize_model(method, model):
+    if method == PROPHET:
+        from prophet.serialize import model_to_json
+        return model_to_json(model).encode("utf-8")
+    return pickle.dumps(model)
+
+
+def deserialize_model(method, payload):
+    if method == PROPHET:
+        from prophet.serialize import model_from_json
+        return model_from_json(payload.decode("utf-8"))
+    return pickle.loads(payload)
+
+
+def predict(method, model, series, horizon, interval):
+    """Prognose als DataFrame mit ds, yhat, yhat_lower, yhat_upper."""
+    if method == PROPHET:
+        future = model.make_future_dataframe(periods=horizon)
+        forecast = model.predict(future)
+        return forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]]
+    values = model.forecast(horizon)
+    return pd.DataFrame({
+        "ds": future_index(series.index[-1], horizon, interval),
+        "yhat": np.asarray(values, dtype=float),
+        "yhat_lower": np.nan,
+        "yhat_upper": np.nan,
+    })
+
+
+class ForecastCache:
+    def __init__(self, maxsize=FORECAST_CACHE_SIZE, cache_dir=FORECAST_CACHE_DIR):
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._models = LRUCache(maxsize=maxsize)        # voller Schlüssel -> gefittetes Modell
+        self._latest = LRUCache(maxsize=maxsize)        # Schlüssel ohne Bar-Hash -> letztes Modell (Warm Start)
+        self._predictions = LRUCache(maxsize=4 * maxsize)  # (voller Schlüssel, Horizont) -> Prognose
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(symbol, interval, method, series, settings=None):
+        settings = settings or DEFAULT_SETTINGS[method]
+        return (symbol, interval, method, settings, last_bar_fingerprint(series))
+
+    # --- Persistenz ---
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.model")
+
+    def _load(self, key):
+        if not self.cache_dir or not os.path.exists(self._path(key)):
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return deserialize_model(key[2], f.read())
+        except Exception:
+            return None
+
+    def _store(self, key, model):
+        if not self.cache_dir:
+            return
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(serialize_model(key[2], model))
+        os.replace(tmp_path, self._path(key))
+
+    # --- Öffentliche Schnittstelle ---
+    def lookup(self, key):
+        """Gefittetes Modell aus Speicher oder Platte, ohne zu fitten."""
+        with self._lock:
+            model = self._models.get(key)
+        if model is None:
+            model = self._load(key)
+            if model is not None:
+                with self._lock:
+                    self._models[key] = model
+        return model
+
+    def put(self, key, model, persist=True):
+        with self._lock:
+            self._models[key] = model
+            self._latest[key[:-1]] = model
+        if persist:
+            self._store(key, model)
+
+    def warm_start_params(self, key):
+        """Prophet-Startwerte aus dem letzten Fit derselben Reihe (ältere Bars), sonst None."""
+        if key[2] != PROPHET:
+            return None
+        with self._lock:
+            previous = self._latest.get(key[:-1])
+        return stan_init(previous) if previous is not None else None
+
+    def model(self, symbol, interval, method, series, settings=None):
+        """Gefittetes Modell aus dem Cache oder neu gefittet (Prophet mit Warm Start)."""
+        key = self.key(symbol, interval, method, series, settings)
+        model = self.lookup(key)
+        if model is None:
+            model = fit_model(method, series, key[3], init=self.warm_start_params(key))
+            self.put(key, model)
+        return model
+
+    def predict(self, key, model, series, horizon):
+        """Prognose eines gefitteten Modells, je Horizont nur einmal berechnet."""
+        with self._lock:
+            forecast = self._predictions.get((key, horizon))
+        if forecast is None:
+            forecast = predict(key[2], model, series, horizon, key[1])
+            with self._lock:
+                self._predictions[(key, horizon)] = forecast
+        return forecast
+
+    def forecast(self, symbol, interval, method, series, horizon, settings=None):
+        key = self.key(symbol, interval, method, series, settings)
+        return self.predict(key, self.model(symbol, interval, method, series, settings), series, horizon)
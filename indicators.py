@@ -0,0 +1,239 @@
+import copy
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# --- Technische Indikatoren ---
+# Alle gewählten Indikatoren werden gemeinsam in einem Durchlauf über die Schlusskurse
+# berechnet (Präfixsummen für gleitende Mittel/Bollinger, eine EWM-Rekursion je Spanne).
+# Danach hält die Engine den laufenden Zustand (Fenster, Summen, EMA-Werte), sodass neue
+# Bars in O(1) je Bar angehängt werden statt die ganze Reihe neu zu rechnen.
+
+SMA_WINDOWS = {"SMA50": 50, "SMA200": 200}
+EMA_SPANS = {"EMA20": 20}
+RSI_PERIOD = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BOLLINGER_WINDOW, BOLLINGER_WIDTH = 20, 2.0
+
+# Auswählbare Indikatoren -> erzeugte Spalten
+INDICATOR_COLUMNS = {
+    "SMA50": ["SMA50"],
+    "SMA200": ["SMA200"],
+    "EMA20": ["EMA20"],
+    "RSI": ["RSI"],
+    "MACD": ["MACD", "MACD_Signal", "MACD_Hist"],
+    "BB": ["BB_Mid", "BB_Upper", "BB_Lower"],
+}
+
+
+def _alpha(span):
+    return 2.0 / (span + 1.0)
+
+
+def _ewm(values, alpha):
+    # Wie pandas ewm(adjust=False): y0 = x0, yt = (1 - a) * y(t-1) + a * xt
+    return pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+
+def _rsi(avg_gain, avg_loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100 - (100 / (1 + np.asarray(avg_gain) / np.asarray(avg_loss)))
+
+
+class IndicatorEngine:
+    """Indikatoren einer Kursreihe mit laufendem Zustand für inkrementelle Updates."""
+
+    def __init__(self, indicators):
+        self.indicators = tuple(sorted(set(indicators)))
+        self.columns = [column for name in self.indicators for column in INDICATOR_COLUMNS[name]]
+        windows = [SMA_WINDOWS[name] for name in self.indicators if name in SMA_WINDOWS]
+        if "BB" in self.indicators:
+            windows.append(BOLLINGER_WINDOW)
+        self._windows = sorted(set(windows))
+        self.result = pd.DataFrame(columns=self.columns, dtype=float)
+        self._state = None
+        self._before_last = None   # Zustand vor dem letzten Bar (für die noch offene Kerze)
+        self._close = np.empty(0)
+
+    # --- Voller Durchlauf ---
+    def _compute(self, close):
+        c = close.to_numpy(dtype=float)
+        n = len(c)
+        out = {}
+        state = {"count": n, "last": c[-1] if n else np.nan}
+
+        if self._windows:
+            positions = np.arange(1, n + 1)
+            sums = np.concatenate([[0.0], np.cumsum(c)])
+            squares = np.concatenate([[0.0], np.cumsum(c * c)])
+            window_sums = {}
+            for window in self._windows:
+                lower = np.maximum(positions - window, 0)
+                count = positions - lower
+                total = sums[positions] - sums[lower]
+                total_sq = squares[positions] - squares[lower]
+                window_sums[window] = (count, total, total_sq)
+            for name in self.indicators:
+                if name in SMA_WINDOWS:
+                    count, total, _ = window_sums[SMA_WINDOWS[name]]
+                    out[name] = total / count   # wie rolling(min_periods=1)
+            if "BB" in self.indicators:
+                count, total, total_sq = window_sums[BOLLINGER_WINDOW]
+                mid = total / count
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    var = np.maximum(total_sq - total * mid, 0.0) / (count - 1)
+                std = np.where(count >= BOLLINGER_WINDOW, np.sqrt(var), np.nan)
+                mid = np.where(count >= BOLLINGER_WINDOW, mid, np.nan)
+                out["BB_Mid"] = mid
+                out["BB_Upper"] = mid + BOLLINGER_WIDTH * std
+                out["BB_Lower"] = mid - BOLLINGER_WIDTH * std
+            buffer = deque(c[-max(self._windows):], maxlen=max(self._windows))
+            state["buffer"] = buffer
+            state["sums"] = {
+                window: (float(window_sums[window][1][-1]), float(window_sums[window][2][-1])) if n else (0.0, 0.0)
+                for window in self._windows
+            }
+
+        ema = {}
+        for name, span in EMA_SPANS.items():
+            if name in self.indicators:
+                out[name] = _ewm(c, _alpha(span))
+                ema[span] = out[name][-1] if n else np.nan
+
+        if "RSI" in self.indicators:
+            delta = np.diff(c, prepend=np.nan)
+            gain = np.where(delta > 0, delta, 0.0)
+            loss = np.where(delta < 0, -delta, 0.0)
+            avg_gain = _ewm(gain, 1.0 / RSI_PERIOD)   # entspricht ewm(com=13)
+            avg_loss = _ewm(loss, 1.0 / RSI_PERIOD)
+            out["RSI"] = _rsi(avg_gain, avg_loss)
+            state["rsi"] = (avg_gain[-1], avg_loss[-1]) if n else None
+
+        if "MACD" in self.indicators:
+            fast = _ewm(c, _alpha(MACD_FAST))
+            slow = _ewm(c, _alpha(MACD_SLOW))
+            macd = fast - slow
+            signal = _ewm(macd, _alpha(MACD_SIGNAL))
+            out["MACD"], out["MACD_Signal"], out["MACD_Hist"] = macd, signal, macd - signal
+            state["macd"] = (fast[-1], slow[-1], signal[-1]) if n else None
+
+        state["ema"] = ema
+        self._state = state
+        return pd.DataFrame({column: out[column] for column in self.columns}, index=close.index)
+
+    # --- Ein Bar, O(1) ---
+    def _step(self, value):
+        state = self._state
+        if state["count"] == 0:
+            # Erster Bar überhaupt: Startwerte wie im vollen Durchlauf
+            self._compute(pd.Series([value]))
+            return self._row_from_state()
+
+        if self._windows:
+            buffer = state["buffer"]
+            for window in self._windows:
+                total, total_sq = state["sums"][window]
+                if len(buffer) >= window:
+                    leaving = buffer[-window]
+                    total -= leaving
+                    total_sq -= leaving * leaving
+                total += value
+                total_sq += value * value
+                state["sums"][window] = (total, total_sq)
+            buffer.append(value)
+        for span in state["ema"]:
+            a = _alpha(span)
+            state["ema"][span] = (1 - a) * state["ema"][span] + a * value
+        if state.get("rsi") is not None:
+            delta = value - state["last"]
+            a = 1.0 / RSI_PERIOD
+            avg_gain, avg_loss = state["rsi"]
+            state["rsi"] = ((1 - a) * avg_gain + a * max(delta, 0.0), (1 - a) * avg_loss + a * max(-delta, 0.0))
+        if state.get("macd") is not None:
+            fast, slow, signal = state["macd"]
+            fast += _alpha(MACD_FAST) * (value - fast)
+            slow += _alpha(MACD_SLOW) * (value - slow)
+            signal += _alpha(MACD_SIGNAL) * ((fast - slow) - signal)
+            state["macd"] = (fast, slow, signal)
+        state["count"] += 1
+        state["last"] = value
+        return self._row_from_state()
+
+    def _row_from_state(self):
+        state = self._state
+        row = {}
+        count = state["count"]
+        for name in self.indicators:
+            if name in SMA_WINDOWS:
+                window = SMA_WINDOWS[name]
+                row[name] = state["sums"][window][0] / min(count, window)
+            elif name in EMA_SPANS:
+                row[name] = state["ema"][EMA_SPANS[name]]
+            elif name == "RSI":
+                row["RSI"] = float(_rsi(*state["rsi"]))
+            elif name == "MACD":
+                fast, slow, signal = state["macd"]
+                row["MACD"], row["MACD_Signal"], row["MACD_Hist"] = fast - slow, signal, fast - slow - signal
+            elif name == "BB":
+                if count >= BOLLINGER_WINDOW:
+                    total, total_sq = state["sums"][BOLLINGER_WINDOW]
+                    mid = total / BOLLINGER_WINDOW
+                    std = np.sqrt(max(total_sq - total * mid, 0.0) / (BOLLINGER_WINDOW - 1))
+                    row["BB_Mid"], row["BB_Upper"], row["BB_Lower"] = mid, mid + BOLLINGER_WIDTH * std, mid - BOLLINGER_WIDTH * std
+                else:
+                    row["BB_Mid"] = row["BB_Upper"] = row["BB_Lower"] = np.nan
+        return row
+
+    def _apply(self, values):
+        """Bars nacheinander anwenden; Zustand vor dem letzten Bar wird gemerkt."""
+        rows = []
+        for position, value in enumerate(values):
+            if position == len(values) - 1:
+                self._before_last = copy.deepcopy(self._state)
+            rows.append(self._step(float(value)))
+        return rows
+
+    def _full(self, close):
+        # Vektorisiert bis zum vorletzten Bar, der letzte über _step (Zustand davor wird gemerkt)
+        head = self._compute(close.iloc[:-1])
+        if len(close):
+            tail = pd.DataFrame(self._apply(close.to_numpy(dtype=float)[-1:]), index=close.index[-1:], columns=self.columns)
+            head = pd.concat([head, tail]) if len(head) else tail
+        self.result = head
+        self._close = close.to_numpy(dtype=float)
+
+    # --- Öffentliche Schnittstelle ---
+    def extend(self, df):
+        """Indikatoren für `df` liefern; nur Bars ab dem letzten bekannten werden neu gerechnet.
+
+        Der letzte bekannte Bar darf sich geändert haben (noch offene Kerze); er wird mit dem
+        gemerkten Zustand davor neu gerechnet. Weicht die ältere Historie ab, voller Durchlauf.
+        """
+        close = df["Close"].dropna() if "Close" in df.columns else pd.Series(dtype=float)
+        known = self.result.index
+        m = len(known)
+        if (
+            self._state is None or m == 0 or len(close) < m
+            or not close.index[:m].equals(known)
+            or not np.array_equal(close.to_numpy(dtype=float)[:m - 1], self._close[:m - 1])
+        ):
+            self._full(close)
+            return self.result
+
+        values = close.to_numpy(dtype=float)
+        if len(values) == m and values[-1] == self._close[-1]:
+            return self.result
+        self._state = self._before_last
+        rows = self._apply(values[m - 1:])
+        appended = pd.DataFrame(rows, index=close.index[m - 1:], columns=self.columns)
+        self.result = pd.concat([self.result.iloc[:-1], appended])
+        self._close = values
+        return self.result
+
+
+def indicator_frame(df, engine):
+    """OHLCV-Frame plus Indikatorspalten (Bars ohne Schlusskurs bleiben NaN)."""
+    if df.empty or not engine.columns:
+        return df
+    return df.join(engine.extend(df))
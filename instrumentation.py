@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Messpunkte pro Rerun ---
+# Für jeden Abschnitt der Seite: Wandzeit aufgeteilt in Netzwerk, Rechnen und Darstellung,
+# dazu Anzahl der Provider-Aufrufe und übertragene Bytes (geschätzt aus der Antwortgröße)
+# sowie der Speicherbedarf (RSS) des Worker-Prozesses am Ende des Reruns.
+# Export als JSON-Zeilen in die Datei AKTIEN_METRICS_LOG und im Prometheus-Textformat
+# (HTTP-Endpunkt /metrics auf AKTIEN_METRICS_PORT), beides nur wenn gesetzt. Fragment-Reruns
+# nach Abschluss des Seitenlaufs zählen als eigene, kurze Reruns (Feld "fragment").
+#
+#   AKTIEN_METRICS_LOG=data/metrics/reruns.jsonl streamlit run main.py
+
+METRICS_LOG = os.environ.get("AKTIEN_METRICS_LOG")   # ohne Wert kein Datei-Log (wächst je Rerun)
+METRICS_PORT = os.environ.get("AKTIEN_METRICS_PORT")
+
+# (RerunMetrics, Abschnittsname) des laufenden Skripts; wird an Fetch-Threads weitergereicht
+_current = contextvars.ContextVar("aktien_section", default=None)
+
+
+def payload_bytes(value):
+    """Größe einer Provider-Antwort in Bytes (DataFrame, Dict davon oder JSON-Dict)."""
+    if value is None:
+        return 0
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, dict) and value and all(hasattr(v, "memory_usage") for v in value.values()):
+        return sum(payload_bytes(v) for v in value.values())
+    try:
+        return len(json.dumps(value, default=str))
+    except Exception:
+        return 0
+
+
+def resident_bytes():
+    """Resident Set Size dieses Worker-Prozesses in Bytes (Linux, sonst None)."""
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _empty_section():
+    return {"wall": 0.0, "network": 0.0, "render": 0.0, "compute": 0.0, "calls": 0, "bytes": 0}
+
+
+class RerunMetrics:
+    def __init__(self, fragment=None):
+        self.started = time.time()
+        self.fragment = fragment   # Name des Fragments, falls nur dieses neu lief
+        self.finished = False
+        self.sections = {}
+        self._active = None      # (Name, Startzeit) des offenen Abschnitts
+        self._lock = threading.Lock()
+
+    def _section(self, name):
+        return self.sections.setdefault(name, _empty_section())
+
+    def enter(self, name):
+        """Neuen Abschnitt beginnen; der vorherige wird abgeschlossen."""
+        self._close_active()
+        self._active = (name, time.perf_counter())
+        _current.set((self, name))
+
+    def _close_active(self):
+        if self._active is None:
+            return
+        name, started = self._active
+        with self._lock:
+            self._section(name)["wall"] += time.perf_counter() - started
+        self._active = None
+
+    @contextmanager
+    def render(self):
+        """Zeit für Darstellung (HTML, Plotly, Streamlit-Elemente) im aktuellen Abschnitt."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._active is not None:
+                with self._lock:
+                    self._section(self._active[0])["render"] += time.perf_counter() - started
+
+    def record_call(self, section, seconds, nbytes):
+        with self._lock:
+            entry = self._section(section)
+            entry["network"] += seconds
+            entry["calls"] += 1
+            entry["bytes"] += nbytes
+
+    def finish(self):
+        """Rerun abschließen, Rechenzeit ableiten und in Log und Registry übernehmen."""
+        self._close_active()
+        _current.set(None)
+        self.finished = True
+        with self._lock:
+            for entry in self.sections.values():
+                # Netzwerkzeiten paralleler Aufrufe können die Wandzeit übersteigen
+                entry["network"] = min(entry["network"], entry["wall"])
+                entry["compute"] = max(entry["wall"] - entry["network"] - entry["render"], 0.0)
+            summary = {
+                "timestamp": self.started,
+                "total_seconds": time.time() - self.started,
+                "sections": {name: dict(entry) for name, entry in self.sections.items()},
+                "fragment": self.fragment,
+                "pid": os.getpid(),
+                "rss_bytes": resident_bytes(),
+            }
+        registry.add(summary)
+        _append_log(summary)
+        return summary
+
+
+def record_provider_call(method, seconds, nbytes):
+    """Von InstrumentedProvider aufgerufen; ordnet den Aufruf dem aktuellen Abschnitt zu."""
+    current = _current.get()
+    if current is None:
+        registry.add_unattributed(method, seconds, nbytes)
+        return
+    run, section = current
+    run.record_call(section, seconds, nbytes)
+
+
+class InstrumentedProvider:
+    """Hülle um einen Marktdaten-Provider, die Dauer, Aufrufe und Bytes misst."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.name = inner.name
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        result = getattr(self.inner, method)(*args)
+        record_provider_call(method, time.perf_counter() - started, payload_bytes(result))
+        return result
+
+    def history(self, symbols, start, interval="1d"):
+        return self._timed("history", symbols, start, interval)
+
+    def info(self, symbol):
+        return self._timed("info", symbol)
+
+
+def _append_log(summary):
+    if not METRICS_LOG:
+        return
+    try:
+        os.makedirs(os.path.dirname(METRICS_LOG), exist_ok=True)
+        with open(METRICS_LOG, "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary) + "\n")
+    except OSError:
+        pass
+
+
+class MetricsRegistry:
+    """Prozessweite Summen über alle Reruns, für den Prometheus-Export."""
+
+    def __init__(self):
+        self._totals = {}       # Abschnitt -> Summen
+        self._runs = 0
+        self._unattributed = {"calls": 0, "seconds": 0.0, "bytes": 0}
+        self._last_total = 0.0
+        self._last_rss = None
+        self._lock = threading.Lock()
+
+    def add(self, summary):
+        with self._lock:
+            self._runs += 1
+            if not summary.get("fragment"):
+                self._last_total = summary["total_seconds"]
+            self._last_rss = summary.get("rss_bytes")
+            for name, entry in summary["sections"].items():
+                totals = self._totals.setdefault(name, _empty_section())
+                for field, value in entry.items():
+                    totals[field] += value
+
+    def add_unattributed(self, method, seconds, nbytes):
+        with self._lock:
+            self._unattributed["calls"] += 1
+            self._unattributed["seconds"] += seconds
+            self._unattributed["bytes"] += nbytes
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP aktien_reruns_total Anzahl abgeschlossener Reruns.",
+            "# TYPE aktien_reruns_total counter",
+        ]
+        with self._lock:
+            lines.append(f"aktien_reruns_total {self._runs}")
+            lines += [
+                "# HELP aktien_rerun_last_seconds Dauer des letzten Reruns.",
+                "# TYPE aktien_rerun_last_seconds gauge",
+                f"aktien_rerun_last_seconds {self._last_total:.6f}",
+            ]
+            if self._last_rss is not None:
+                # Je Worker-Prozess; geteilte Panel-Seiten zählen in jedem Worker mit, der sie berührt
+                lines += [
+                    "# HELP aktien_worker_resident_bytes Resident Set Size des Worker-Prozesses.",
+                    "# TYPE aktien_worker_resident_bytes gauge",
+                    f'aktien_worker_resident_bytes{{pid="{os.getpid()}"}} {self._last_rss}',
+                ]
+            lines += [
+                "# HELP aktien_section_seconds_total Zeit je Abschnitt und Phase.",
+                "# TYPE aktien_section_seconds_total counter",
+            ]
+            for name, totals in sorted(self._totals.items()):
+                for phase in ["network", "compute", "render"]:
+                    lines.append(f'aktien_section_seconds_total{{section="{name}",phase="{phase}"}} {totals[phase]:.6f}')
+            lines += [
+                "# HELP aktien_provider_calls_total Provider-Aufrufe je Abschnitt.",
+                "# TYPE aktien_provider_calls_total counter",
+            ]
+            for name, totals in sorted(self._totals.items()):
+                lines.append(f'aktien_provider_calls_total{{section="{name}"}} {totals["calls"]}')
+            lines.append(f'aktien_provider_calls_total{{section="ohne"}} {self._unattributed["calls"]}')
+            lines += [
+                "# HELP aktien_provider_bytes_total Übertragene Bytes je Abschnitt (geschätzt).",
+                "# TYPE aktien_provider_bytes_total counter",
+            ]
+            for name, totals in sorted(self._totals.items()):
+                lines.append(f'aktien_provider_bytes_total{{section="{name}"}} {totals["bytes"]}')
+            lines.append(f'aktien_provider_bytes_total{{section="ohne"}} {self._unattributed["bytes"]}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # kein Zugriffslog auf stderr
+
+
+def start_metrics_server(port=METRICS_PORT):
+    """Prometheus-Endpunkt /metrics in einem Daemon-Thread starten (nur wenn ein Port gesetzt ist)."""
+    if not port:
+        return None
+    server = ThreadingHTTPServer(("0.0.0.0", int(port)), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
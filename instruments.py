@@ -0,0 +1,183 @@
+import os
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from trading_calendar import exchange_for_symbol, XETRA_EXCHANGE
+
+# --- Instrumentenstamm ---
+# Name, Symbol, ISIN, WKN, Börse und Währung für beliebig viele Wertpapiere, spaltenweise
+# als NumPy-Arrays. Gesucht wird über einen sortierten Präfix-Index (searchsorted) und
+# einen Trigramm-Index für Tippfehler; ISIN/WKN werden ohne Netzaufruf zu Symbolen aufgelöst.
+#
+# Datei (CSV oder Parquet) unter AKTIEN_INSTRUMENTS mit den Spalten
+# name, symbol, isin, wkn, exchange, currency; die eingebauten Listen kommen immer hinzu.
+
+INSTRUMENTS_PATH = os.environ.get(
+    "AKTIEN_INSTRUMENTS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "instruments.csv")
+)
+
+INSTRUMENT_COLUMNS = ["name", "symbol", "isin", "wkn", "exchange", "currency"]
+EXCHANGE_CURRENCIES = {XETRA_EXCHANGE: "EUR"}
+
+ISIN_PATTERN = re.compile(r"^[A-Z]{2}[A-Z0-9]{9}[0-9]$")
+WKN_PATTERN = re.compile(r"^[A-Z0-9]{6}$")
+
+# Ab diesem Trigramm-Jaccard gilt ein Name als ähnlich
+FUZZY_MIN_SCORE = 0.3
+
+
+def normalize(text):
+    """Kleinbuchstaben ohne Akzente/Umlaute-Punkte, Satzzeichen als Leerzeichen."""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii").lower()
+    return " ".join(re.sub(r"[^a-z0-9.\-^]+", " ", text).split())
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def records_from_lists(*stock_lists):
+    """Eingebaute Listen (Name -> symbol/isin/wkn) als Stammdatensätze."""
+    records = []
+    for stock_list in stock_lists:
+        for name, stock in stock_list.items():
+            exchange = exchange_for_symbol(stock["symbol"])
+            records.append({
+                "name": name,
+                "symbol": stock["symbol"],
+                "isin": stock.get("isin", ""),
+                "wkn": stock.get("wkn", ""),
+                "exchange": exchange,
+                "currency": EXCHANGE_CURRENCIES.get(exchange, "USD"),
+            })
+    return records
+
+
+def load_instrument_file(path=INSTRUMENTS_PATH):
+    """Stammdatei lesen (CSV oder Parquet); leerer Frame, wenn keine Datei vorhanden ist."""
+    if not path or not os.path.exists(path):
+        return pd.DataFrame(columns=INSTRUMENT_COLUMNS)
+    if path.endswith(".parquet"):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    df.columns = [str(column).strip().lower() for column in df.columns]
+    return df
+
+
+class InstrumentMaster:
+    def __init__(self, frame):
+        frame = frame.reindex(columns=INSTRUMENT_COLUMNS).fillna("").astype(str)
+        frame["symbol"] = frame["symbol"].str.strip().str.upper()
+        frame = frame[frame["symbol"] != ""].drop_duplicates("symbol", keep="first")
+        # Spaltenweise, Strings mit fester Breite (kompakt, kein Objekt pro Zelle)
+        self.columns = {column: frame[column].to_numpy(dtype=str) for column in INSTRUMENT_COLUMNS}
+        self.size = len(frame)
+
+        symbols, isins, wkns = self.columns["symbol"], self.columns["isin"], self.columns["wkn"]
+        self._by_symbol = {symbol: row for row, symbol in enumerate(symbols)}
+        self._by_isin = {isin.upper(): row for row, isin in enumerate(isins) if isin}
+        self._by_wkn = {wkn.upper(): row for row, wkn in enumerate(wkns) if wkn}
+
+        # Präfix-Index: ganzer Name, jedes Namenswort, Symbol, ISIN, WKN
+        keys, rows = [], []
+        trigram_rows = defaultdict(list)
+        trigram_counts = np.zeros(self.size, dtype=np.int32)
+        for row, name in enumerate(self.columns["name"]):
+            name_key = normalize(name)
+            row_keys = {name_key, *name_key.split(), symbols[row].lower(), isins[row].lower(), wkns[row].lower()}
+            for key in row_keys:
+                if key:
+                    keys.append(key)
+                    rows.append(row)
+            grams = _trigrams(name_key)
+            for gram in grams:
+                trigram_rows[gram].append(row)
+            trigram_counts[row] = len(grams)
+        order = np.argsort(np.array(keys, dtype=str), kind="stable")
+        self._keys = np.array(keys, dtype=str)[order]
+        self._key_rows = np.array(rows, dtype=np.int32)[order]
+        self._trigrams = {gram: np.array(gram_rows, dtype=np.int32) for gram, gram_rows in trigram_rows.items()}
+        self._trigram_counts = trigram_counts
+
+    @classmethod
+    def load(cls, path=INSTRUMENTS_PATH, builtin=()):
+        """Eingebaute Datensätze zuerst (gewinnen bei gleichem Symbol), dann die Stammdatei."""
+        frames = [pd.DataFrame(list(builtin), columns=INSTRUMENT_COLUMNS), load_instrument_file(path)]
+        return cls(pd.concat(frames, ignore_index=True))
+
+    # --- Zugriff ---
+    def record(self, row):
+        return {column: values[row] for column, values in self.columns.items()}
+
+    def row_for(self, symbol):
+        return self._by_symbol.get(symbol.strip().upper())
+
+    def lookup(self, symbol):
+        row = self.row_for(symbol)
+        return None if row is None else self.record(row)
+
+    def resolve(self, token):
+        """ISIN, WKN oder Symbol zu einem Symbol auflösen (unbekannte Eingaben bleiben Symbole)."""
+        token = token.strip().upper()
+        if ISIN_PATTERN.match(token) and token in self._by_isin:
+            return self.columns["symbol"][self._by_isin[token]]
+        if token in self._by_symbol:
+            return token
+        if WKN_PATTERN.match(token) and token in self._by_wkn:
+            return self.columns["symbol"][self._by_wkn[token]]
+        return token
+
+    # --- Suche ---
+    def _prefix_rows(self, query):
+        lo = np.searchsorted(self._keys, query, side="left")
+        hi = np.searchsorted(self._keys, query + "\U0010ffff", side="left")
+        return self._key_rows[lo:hi]
+
+    def _fuzzy_rows(self, query, limit):
+        grams = [gram for gram in _trigrams(query) if gram in self._trigrams]
+        if not grams or not self.size:
+            return np.empty(0, dtype=np.int32)
+        hits = np.zeros(self.size, dtype=np.int32)
+        for gram in grams:
+            hits[self._trigrams[gram]] += 1
+        candidates = np.flatnonzero(hits)
+        # Jaccard über Trigramm-Mengen
+        scores = hits[candidates] / (len(_trigrams(query)) + self._trigram_counts[candidates] - hits[candidates])
+        keep = scores >= FUZZY_MIN_SCORE
+        candidates, scores = candidates[keep], scores[keep]
+        top = np.argsort(-scores, kind="stable")[:limit]
+        return candidates[top]
+
+    def search(self, query, limit=10):
+        """Zeilennummern der besten Treffer: exakte Codes, dann Präfixe, dann ähnliche Namen."""
+        key = normalize(query)
+        if not key:
+            return []
+        found = []
+        exact = self.resolve(query)
+        if exact in self._by_symbol:
+            found.append(self._by_symbol[exact])
+        for row in self._prefix_rows(key):
+            if len(found) >= limit:
+                return found
+            if row not in found:
+                found.append(int(row))
+        if len(found) < limit:
+            for row in self._fuzzy_rows(key, limit):
+                if len(found) >= limit:
+                    break
+                if row not in found:
+                    found.append(int(row))
+        return found
+
+    def label(self, row):
+        record = self.record(row)
+        codes = ", ".join(code for code in [record["symbol"], record["isin"], record["wkn"]] if code)
+        return f"{record['name']} ({codes})"
@@ -1,18 +1,33 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots # Wichtig für Subplots im Detailchart
 import datetime
-from prophet import Prophet
-import plotly.express as px
-import matplotlib.pyplot as plt
+import time
+from functools import partial, wraps
+from cachetools import LRUCache
 import warnings
 warnings.filterwarnings("ignore")  # Prophet erzeugt viele FutureWarnings
 
-
-# NEUE IMPORT für Exponential Smoothing
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
+# Prophet und statsmodels werden erst beim ersten Fit geladen (siehe forecasting.py);
+# Importzeit und Speicher pro Modul misst: python startup_profile.py
+
+import sections
+from pipeline import SectionGraph
+from price_store import PriceStore, align_timestamp
+from forecasting import ForecastCache
+from forecast_service import ForecastService
+from ets_batch import batch_forecast
+from screener import build_screener_table, filter_screener_table, parse_symbol_list, universe_from_lists
+from meta_cache import MetaCache
+from snapshot import SnapshotSource
+from instruments import InstrumentMaster, records_from_lists
+from tables import render_table
+from risk import ROLLING_WINDOWS
+from downsampling import downsample_series, ohlc_buckets
+from resampling import base_interval
+from instrumentation import RerunMetrics, start_metrics_server
+from providers import get_provider
 
 # --- Dark Mode Umschalter ---
 dark_mode = st.toggle("Dark Mode ", value=False)
@@ -24,12 +39,14 @@ if dark_mode:
     table_bg = "#1e1e1e"
     table_text = "#FAFAFA"
     plotly_template_global = "plotly_dark" # Umbenannt, um Konflikte zu vermeiden
+    table_theme = "dark"
 else:
     background_color = "#FAFAFA"
     text_color = "#000000"
     table_bg = "#FFFFFF"
     table_text = "#000000"
     plotly_template_global = "plotly_white" # Umbenannt, um Konflikte zu vermeiden
+    table_theme = "light"
 
 # --- Globales CSS anwenden ---
 st.markdown(f"""
@@ -103,6 +120,98 @@ st.markdown(f"""
 # --- Layout & Design ---
 st.set_page_config(page_title="DZI Aktien Analyst", layout="wide")
 
+# --- Messpunkte für diesen Rerun (Debug-Panel, JSON-Log, Prometheus) ---
+@st.cache_resource
+def get_metrics_server():
+    return start_metrics_server()
+
+get_metrics_server()
+metrics = RerunMetrics()
+show_debug_panel = st.sidebar.checkbox("Debug-Panel (Laufzeiten)", value=False)
+
+def render_debug_panel(summary):
+    if not show_debug_panel:
+        return
+    with st.sidebar:
+        st.markdown(f"**Rerun: {summary['total_seconds']:.2f} s**")
+        if summary.get("rss_bytes") is not None:
+            st.caption(f"Worker {summary['pid']}: {summary['rss_bytes'] / 1e6:.0f} MB resident")
+        st.dataframe(pd.DataFrame([
+            {
+                "Abschnitt": name,
+                "Gesamt [s]": round(entry["wall"], 3),
+                "Netzwerk [s]": round(entry["network"], 3),
+                "Rechnen [s]": round(entry["compute"], 3),
+                "Darstellung [s]": round(entry["render"], 3),
+                "Aufrufe": entry["calls"],
+                "Bytes": entry["bytes"],
+            }
+            for name, entry in summary["sections"].items()
+        ]).set_index("Abschnitt"), use_container_width=True)
+        shared = get_provider().cache
+        st.caption(
+            f"Geteilter Cache: {shared.stats['hits']} Treffer, {shared.stats['coalesced']} gebündelt, "
+            f"{shared.stats['misses']} Abrufe, {shared.size_bytes() / 1e6:.1f} MB"
+        )
+        breakers = getattr(get_provider().inner, "breakers", {})
+        if breakers:
+            st.caption("Circuit Breaker: " + ", ".join(f"{b.name} {b.state}" for b in breakers.values()))
+
+def fragment_metrics(name):
+    # Fragment-Reruns laufen nach metrics.finish() des Seitenlaufs: dann als eigenen Rerun messen
+    def decorate(fn):
+        @wraps(fn)
+        def run(*args, **kwargs):
+            global metrics
+            if not metrics.finished:
+                return fn(*args, **kwargs)
+            metrics = RerunMetrics(fragment=name)
+            metrics.enter(name)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.finish()
+        return run
+    return decorate
+
+# --- Lokaler Kursdatenspeicher (prozessweit, überlebt Reruns) ---
+@st.cache_resource
+def get_price_store():
+    return PriceStore()
+
+price_store = get_price_store()
+
+# --- Cache für Unternehmens- und Fundamentaldaten (Ticker.info) ---
+@st.cache_resource
+def get_meta_cache():
+    return MetaCache()
+
+meta_cache = get_meta_cache()
+
+# --- Nächtlicher Snapshot (python snapshot.py); enthaltene Symbole ohne Live-Berechnung ---
+@st.cache_resource
+def get_snapshot_source():
+    return SnapshotSource()
+
+snapshot = get_snapshot_source().get()
+
+# --- Cache für gefittete Prognosemodelle ---
+@st.cache_resource
+def get_forecast_cache():
+    return ForecastCache()
+
+forecast_cache = get_forecast_cache()
+
+# --- Prognose-Dienst (Prozess-Pool, gemeinsam für alle Sessions) ---
+@st.cache_resource
+def get_forecast_service():
+    return ForecastService(forecast_cache)
+
+forecast_service = get_forecast_service()
+forecast_pending = [] # Cache-Schlüssel der Prognosen dieser Seite, die im Hintergrund laufen oder warten
+FORECAST_POLL_SECONDS = 2 # Takt, in dem ein Fragment den Stand laufender Prognosen abfragt
+live_refresh = None # Takt in Sekunden, solange der Live-Modus der Detailanalyse aktiv ist
+
 # --- Titel und Logo ---
 col1, col2 = st.columns([4, 1])
 with col1:
@@ -180,6 +289,56 @@ dax_stocks = {
     "Zalando": {"symbol": "ZAL.DE", "isin": "DE000ZAL1111", "wkn": "ZAL111"}
 }
 
+# --- Instrumentenstamm (Suche nach Name, Symbol, ISIN, WKN ohne Netzaufruf) ---
+@st.cache_resource
+def get_instrument_master():
+    return InstrumentMaster.load(builtin=records_from_lists(us_stocks, dax_stocks))
+
+instrument_master = get_instrument_master()
+
+# --- Screener-Modus ---
+# Ganzes Universum statt max. 3 Symbole; berechnet wird einmal, Sortieren und Filtern danach ohne Neuberechnung
+@st.cache_data(ttl=15 * 60, show_spinner=False)
+def load_screener_table(universe_items, include_fundamentals, day):
+    return build_screener_table(dict(universe_items), price_store, meta_cache if include_fundamentals else None, today=day)
+
+screener_mode = st.toggle("Screener-Modus (ganzes Universum)", value=False)
+
+if screener_mode:
+    metrics.enter("Screener")
+    universe_source = st.radio(
+        "Universum",
+        options=["US + DAX (eingebaut)", "Eigene Symbolliste"],
+        horizontal=True
+    )
+    if universe_source == "Eigene Symbolliste":
+        custom_symbols = st.text_area("Symbole durch Komma, Leerzeichen oder Zeilenumbruch getrennt (z. B. AAPL MSFT SAP.DE)")
+        universe = {sym: sym for sym in parse_symbol_list(custom_symbols)}
+    else:
+        universe = universe_from_lists(us_stocks, dax_stocks)
+    include_fundamentals = st.checkbox("Fundamentaldaten einbeziehen", value=True)
+
+    if universe:
+        with st.spinner(f"Berechne Kennzahlen für {len(universe)} Symbole ..."):
+            screener_df = load_screener_table(tuple(universe.items()), include_fundamentals, datetime.date.today())
+
+        col_search, col_sector, col_cap = st.columns([2, 2, 1])
+        with col_search:
+            screener_text = st.text_input("Suche (Symbol oder Name)", key="screener_search")
+        with col_sector:
+            sector_options = sorted(screener_df["Sektor"].dropna().unique()) if "Sektor" in screener_df.columns else []
+            screener_sectors = st.multiselect("Sektor", options=sector_options, key="screener_sectors")
+        with col_cap:
+            screener_min_cap = st.number_input("Min. Marktkap. [Mrd $]", min_value=0.0, value=0.0, step=10.0)
+
+        filtered_df = filter_screener_table(screener_df, screener_text, screener_sectors, screener_min_cap)
+        st.markdown(f"### Screener ({len(filtered_df)} von {len(screener_df)} Symbolen)")
+        st.dataframe(filtered_df, use_container_width=True, height=min(35 * len(filtered_df) + 40, 800))
+    else:
+        st.info("Bitte gib mindestens ein Symbol ein.")
+    render_debug_panel(metrics.finish())
+    st.stop()
+
 # --- Auswahlfelder ---
 col_dropdown, col_manual = st.columns([3, 2])
 with col_dropdown:
@@ -190,7 +349,16 @@ with col_dropdown:
         max_selections=3
     )
 with col_manual:
-    input_symbols = st.text_input("Oder gib bis zu 3 Symbole durch Komma getrennt ein (z. B. AAPL,MSFT)")
+    input_symbols = st.text_input("Oder gib bis zu 3 Symbole, ISINs oder WKNs durch Komma getrennt ein (z. B. AAPL,MSFT)")
+    search_query = st.text_input("Wertpapiersuche (Name, Symbol, ISIN, WKN)", key="instrument_search")
+    search_rows = instrument_master.search(search_query) if search_query else []
+    picked_symbols = st.multiselect(
+        "Treffer übernehmen",
+        options=[instrument_master.columns["symbol"][row] for row in search_rows],
+        format_func=lambda sym: instrument_master.label(instrument_master.row_for(sym)),
+        max_selections=3,
+        key="instrument_search_pick"
+    ) if search_rows else []
 
 # --- Benchmark-Auswahl korrekt ---
 benchmark_options = {
@@ -214,10 +382,21 @@ benchmark_symbol = benchmark_options.get(selected_benchmark_label)
 symbols = []
 meta_info = {}
 
-if input_symbols:
-    symbols = [sym.strip().upper() for sym in input_symbols.split(",")[:3]]
+manual_symbols = [instrument_master.resolve(token) for token in input_symbols.split(",") if token.strip()] if input_symbols else []
+manual_symbols = list(dict.fromkeys(manual_symbols + picked_symbols))[:3]
+
+if manual_symbols:
+    symbols = manual_symbols
     for sym in symbols:
-        meta_info[sym] = {"name": sym, "isin": "", "wkn": ""}
+        record = instrument_master.lookup(sym)
+        if record is not None:
+            meta_info[sym] = {"name": record["name"], "isin": record["isin"], "wkn": record["wkn"]}
+            continue
+        try:
+            info = meta_cache.info(sym)
+        except Exception:
+            info = {}
+        meta_info[sym] = {"name": info.get("longName") or info.get("shortName") or sym, "isin": "", "wkn": ""}
 elif selected_names:
     for name in selected_names:
         stock = us_stocks.get(name) or dax_stocks.get(name)
@@ -232,408 +411,242 @@ elif selected_names:
 # --- Zeitraum auswählen ---
 period_comparison = st.selectbox("Zeitraum für Vergleich", ["1mo", "3mo", "6mo", "1y", "2y", "5y"], index=3) # Umbenannt
 
-# --- Daten abrufen ---
-all_data = {}
-for symbol in symbols:
-    try:
-        df = yf.download(symbol, period=period_comparison, auto_adjust=True) # period_comparison verwenden
-        df = df[['Close']].copy()
-        df.rename(columns={'Close': symbol}, inplace=True)
-        df = df.pct_change().add(1).cumprod().multiply(100)
-        all_data[symbol] = df
-    except Exception as e:
-        st.error(f"Fehler beim Laden von {symbol}: {e}")
-
-if benchmark_symbol:
-    try:
-        df_benchmark = yf.download(benchmark_symbol, period=period_comparison, auto_adjust=True)[["Close"]]
-        df_benchmark = df_benchmark.pct_change().add(1).cumprod().multiply(100)
-        df_benchmark.rename(columns={"Close": "Benchmark"}, inplace=True)
-        all_data["Benchmark"] = df_benchmark
-    except Exception as e:
-        st.warning(f"Benchmark konnte nicht geladen werden: {e}")
-
-# --- Kursdaten abrufen ---
-all_data = {}
-
-# Aktiendaten abrufen
-for symbol in symbols:
-    try:
-        df = yf.download(symbol, period=period_comparison, auto_adjust=True)[["Close"]]
-        df = df.pct_change().add(1).cumprod().multiply(100)
-        df.rename(columns={"Close": symbol}, inplace=True)
-        all_data[symbol] = df
-    except Exception as e:
-        st.error(f"Fehler beim Laden von {symbol}: {e}")
-
-# Benchmark-Daten hinzufügen
-if benchmark_symbol:
-    try:
-        df_benchmark = yf.download(benchmark_symbol, period=period_comparison, auto_adjust=True)[["Close"]]
-        df_benchmark = df_benchmark.pct_change().add(1).cumprod().multiply(100)
-        df_benchmark.rename(columns={"Close": "Benchmark"}, inplace=True)
-        all_data["Benchmark"] = df_benchmark
-    except Exception as e:
-        st.warning(f"Benchmark konnte nicht geladen werden: {e}")
-
-# --- Chart anzeigen ---
-if all_data:
-    combined_df = pd.concat(all_data.values(), axis=1, join='inner')
-    st.markdown("### Kursvergleich")
-
-    fig = go.Figure()
-    for symbol in combined_df.columns:
-        is_benchmark = symbol == "Benchmark"
-        label = f"{benchmark_symbol} (Benchmark)" if is_benchmark else symbol
-        fig.add_trace(go.Scatter(
-            x=combined_df.index,
-            y=combined_df[symbol],
-            mode='lines',
-            name=str(label),
-            line=dict(
-                width=2,
-                dash="dot" if is_benchmark else "solid",
-                color="gray" if is_benchmark else None
-            )
-        ))
-
-    fig.update_layout(
-        xaxis_title="Datum",
-        yaxis_title="Indexiert (%)",
-        height=500,
-        template=plotly_template_global,
-        legend_title="Symbol",
-        plot_bgcolor=background_color,
-        paper_bgcolor=background_color,
-        font=dict(color=text_color)
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
-
-else:
-    st.warning("Keine Daten konnten geladen werden.")
-
-# --- Unternehmensinfos ---
-st.markdown("### Unternehmensdaten")
-
-rows = []
-for symbol in symbols:
-    try:
-        info = yf.Ticker(symbol).info
-        meta = meta_info.get(symbol, {})
-        rows.append({
-            "Symbol": symbol,
-            "Name": meta.get("name", info.get("longName", "N/A")),
-            "ISIN": meta.get("isin", ""),
-            "WKN": meta.get("wkn", ""),
-            "Branche": info.get("industry", "N/A"),
-            "Sektor": info.get("sector", "N/A"),
-            "Marktkap. [Mrd $]": round(info.get("marketCap", 0) / 1e9, 2),
-            "Div.-Rendite [%]": round(info.get("dividendYield", 0) * 100, 2) if info.get("dividendYield") else 0.0 # Multipliziere mit 100 für %
-        })
-    except Exception as e:
-        st.warning(f"Daten für {symbol} konnten nicht geladen werden: {e}")
-
-if rows:
-    df_info = pd.DataFrame(rows)
-
-    # Transponieren
-    df_info_transposed = df_info.set_index("Symbol").transpose()
-
-    # Prozentformatierung für Div.-Rendite und Marktkap. für Konsistenz
-    def format_mixed(val, index_name=""):
-        if isinstance(val, (int, float)):
-            if "Rendite" in index_name:
-                return f"{val:.2f} %"
-            elif "Marktkap" in index_name:
-                 return f"{val:,.2f}" # Tausender-Trennzeichen
-            return f"{val}"
-        return val
-
-    # HTML-Tabelle mit gestyltem Output
-    html_info = df_info_transposed.to_html(escape=False) # Vorheriges applymap hier nicht nötig
-
-    # Manuelle Formatierung nach dem to_html, um die Spaltennamen zu berücksichtigen
-    # Dies ist komplexer, aber die beste Methode, wenn applymap/map nicht mehr gewünscht ist
-    # Alternativ kann man `df_info_transposed.apply(lambda col: col.apply(lambda val: format_mixed(val, col.name)))` verwenden
-    # aber der HTML-Export ist robuster. Für Einfachheit bleiben wir bei der direkten HTML-Anzeige.
-    st.markdown(html_info, unsafe_allow_html=True) # Direct HTML for flexibility
-else:
-    st.info("Keine Unternehmensinformationen verfügbar.")
-
-# --- Fundamentaldaten ---
-st.markdown("### Fundamentaldaten")
-
-fundamentals = []
-
-for symbol in symbols:
-    try:
-        ticker = yf.Ticker(symbol) # Ticker-Objekt hier wiederholen
-        info = ticker.info
-
-        fundamentals.append({
-            "Symbol": symbol,
-            "KGV (PE)": round(info.get("trailingPE", 0), 2),
-            "EPS": round(info.get("trailingEps", 0), 2),
-            "Umsatz [Mrd $]": round(info.get("totalRevenue", 0) / 1e9, 2),
-            "Gewinn [Mrd $]": round(info.get("netIncomeToCommon", 0) / 1e9, 2),
-            "Mitarbeiter": info.get("fullTimeEmployees", "N/A"),
-            "Beta": round(info.get("beta", 0), 2),
-            "Analysten-Rating": f'{info.get("recommendationMean", "N/A")} ({info.get("recommendationKey", "N/A")})'
-        })
-    except Exception as e:
-        st.warning(f"Fehler beim Abruf der Fundamentaldaten für {symbol}: {e}")
-
-# --- Erweiterung: Dynamische Fundamentaldaten ---
-extra_fundamentals = []
-
-for symbol in symbols:
-    try:
-        ticker = yf.Ticker(symbol)
-        info = ticker.info
-
-        roe = info.get("returnOnEquity", None)
-        debt_to_equity = info.get("debtToEquity", None)
-        total_cash = info.get("totalCash", None)
-        total_cash_mrd = round(total_cash / 1e9, 2) if total_cash else None
-
-        extra_fundamentals.append({
-            "Symbol": symbol,
-            "Name": meta_info.get(symbol, {}).get("name", symbol),
-            "Eigenkapitalrendite (ROE) [%]": round(roe * 100, 2) if roe is not None else "n/a", # * 100 für Prozent
-            "Schuldenquote [%]": round(debt_to_equity, 2) if debt_to_equity is not None else "n/a",
-            "Cash-Reserven [Mrd $]": total_cash_mrd if total_cash_mrd is not None else "n/a"
-        })
-
-    except Exception as e:
-        st.warning(f"Fehler bei Zusatzkennzahlen für {symbol}: {e}")
-
-# --- Transponierte kombinierte Fundamentaldaten ---
-# Kombinieren von Basis- und erweiterten Daten
-combined_data = []
-# Sicherstellen, dass beide Listen gleich lang sind, oder entsprechend behandeln
-min_len = min(len(fundamentals), len(extra_fundamentals))
-for i in range(min_len):
-    base = fundamentals[i].copy() # Copy, um Original nicht zu ändern
-    extra = extra_fundamentals[i]
-    base.update({
-        "Eigenkapitalrendite (ROE) [%]": extra.get("Eigenkapitalrendite (ROE) [%]", "n/a"),
-        "Schuldenquote [%]": extra.get("Schuldenquote [%]", "n/a"),
-        "Cash-Reserven [Mrd $]": extra.get("Cash-Reserven [Mrd $]", "n/a")
-    })
-    combined_data.append(base)
-
-# In DataFrame umwandeln
-if combined_data:
-    df_combined = pd.DataFrame(combined_data).set_index("Symbol")
-
-    # Analysten-Rating als Badge formatieren
-    def format_badge(rating):
-        rating = str(rating).lower() # Sicherstellen, dass es ein String ist
-        if "strong buy" in rating:
-            return "<span style='background-color:#006400;color:white;padding:4px 8px;border-radius:6px;'>Strong Buy</span>"
-        elif "buy" in rating:
-            return "<span style='background-color:#28a745;color:white;padding:4px 8px;border-radius:6px;'>Buy</span>"
-        elif "hold" in rating or "neutral" in rating: # 'neutral' für Hold
-            return "<span style='background-color:#ffc107;color:white;padding:4px 8px;border-radius:6px;'>Hold</span>"
-        elif "sell" in rating:
-            return "<span style='background-color:#dc3545;color:white;padding:4px 8px;border-radius:6px;'>Sell</span>"
-        return f"<span style='background-color:#6c757d;color:white;padding:4px 8px;border-radius:6px;'>{rating.capitalize()}</span>" # capitalize für N/A
-
-    # Sicherstellen, dass die Spalte existiert, bevor .apply() aufgerufen wird
-    if "Analysten-Rating" in df_combined.columns:
-        df_combined["Analysten-Rating"] = df_combined["Analysten-Rating"].apply(format_badge)
-
-    # Transponieren und anzeigen
-    df_transposed_fund = df_combined.transpose()
-    #st.markdown("### 🧮 Fundamentaldaten & erweiterte Kennzahlen") # Titel hinzufügen
-    st.markdown(df_transposed_fund.to_html(escape=False), unsafe_allow_html=True)
-else:
-    st.info("Keine Fundamentaldaten verfügbar.")
-
-
-# --- Wertentwicklung berechnen ---
-st.markdown("### Wertentwicklung (Performance in %)")
-
+# --- Abschnitte berechnen (nur was sich seit dem letzten Rerun geändert hat) ---
 today = datetime.date.today()
-perf_periods = {
-    "Heute (%)": today - datetime.timedelta(days=1),
-    "1 Woche (%)": today - datetime.timedelta(days=7),
-    "1 Monat (%)": today - datetime.timedelta(days=30),
-    "6 Monate (%)": today - datetime.timedelta(days=182),
-    "1 Jahr (%)": today - datetime.timedelta(days=365),
-    "3 Jahre (%)": today - datetime.timedelta(days=3*365),
-    "5 Jahre (%)": today - datetime.timedelta(days=5*365)
-}
-
-perf_data = []
-
-for symbol in symbols:
-    try:
-        df_perf = yf.download(symbol, start=min(perf_periods.values()), end=today + datetime.timedelta(days=1), auto_adjust=True)
-
-        if df_perf.empty or "Close" not in df_perf:
-            raise ValueError("Keine gültigen Preisdaten erhalten für Performance-Berechnung")
-
-        row = {"Symbol": symbol}
-        for label, start_date in perf_periods.items():
-            # Sicherstellen, dass start_date als Timestamp behandelt wird, um Vergleich mit Index zu ermöglichen
-            start_price_series = df_perf[df_perf.index >= pd.Timestamp(start_date, tz=df_perf.index.tz)]['Close']
-            end_price = df_perf["Close"].iloc[-1]
-
-            if not start_price_series.empty:
-                # Sicherstellen, dass wir float-Werte haben
-                start_price_val = float(start_price_series.iloc[0])
-                end_price_val = float(end_price)
+data_epoch = int(time.time() // (15 * 60)) # Aktualisierungstakt für neue Bars
+graph = SectionGraph(st.session_state)
+
+def show_messages(messages):
+    for level, text in messages:
+        getattr(st, level)(text)
+
+def show_snapshot_age(section):
+    if snapshot is not None and section.data is not None:
+        st.caption(f"Stand: {snapshot.age_text()}")
+
+# --- Platzhalter in Seitenreihenfolge ---
+# Tabellen, die der Snapshot für alle Symbole enthält, werden vor dem Laden der Live-Kurse
+# gefüllt und erscheinen so sofort; der Rest folgt in der gewohnten Reihenfolge.
+live_box, fundamentals_box, performance_box, risk_box = (st.container() for _ in range(4))
+
+def snapshot_covers(table):
+    return snapshot is not None and snapshot.covers(table, symbols)
+
+def fundamentals_section():
+    metrics.enter("Fundamentaldaten")
+    with fundamentals_box:
+        st.markdown("### Fundamentaldaten")
+        fundamentals = graph.run(
+            "fundamentals", partial(sections.fundamentals_frame, meta_cache),
+            inputs=dict(symbols=tuple(symbols), meta_info=meta_info, day=today, snapshot=snapshot,
+                        epoch=meta_cache.versions(symbols))
+        )
+        show_snapshot_age(fundamentals)
+        show_messages(fundamentals.messages)
 
-                if start_price_val != 0: # Division durch Null vermeiden
-                    change = ((end_price_val - start_price_val) / start_price_val) * 100
-                    row[label] = round(change, 2)
-                else:
-                    row[label] = None # Oder 'N/A' wenn Startpreis 0 war
+        with metrics.render():
+            if fundamentals.data is not None:
+                # Basis- und erweiterte Kennzahlen transponiert, Analysten-Rating als Badge
+                st.markdown(render_table(fundamentals.data, sections.FUNDAMENTALS_FORMATS, theme=table_theme), unsafe_allow_html=True)
             else:
-                row[label] = None
-
-        perf_data.append(row)
-
-    except Exception as e:
-        st.warning(f"Fehler bei der Performance-Berechnung für {symbol}: {e}")
-
-# --- Tabelle anzeigen ---
-if perf_data:
-    perf_df = pd.DataFrame(perf_data)
-    perf_df.set_index("Symbol", inplace=True)
-
-    # Transponieren
-    perf_df_transposed = perf_df.transpose()
-
-    # HTML-Tabelle mit Prozentformatierung
-    def format_percent(val):
-        try:
-            if val is None: # Behandle None, falls oben None zugewiesen wurde
-                return "N/A"
-            return f"{val:.2f} %"
-        except:
-            return val
+                st.info("Keine Fundamentaldaten verfügbar.")
+
+def history_section(name, fn, covered, inputs):
+    # Vollständig aus dem Snapshot: ohne Abhängigkeit von den Live-Kursdaten
+    if covered:
+        return graph.run(name, partial(fn, None), inputs=inputs)
+    return graph.run(name, fn, deps=["histories"], inputs=inputs)
+
+def performance_section(covered):
+    metrics.enter("Wertentwicklung")
+    with performance_box:
+        st.markdown("### Wertentwicklung (Performance in %)")
+
+        # Ankerdaten je Börse über den Handelskalender, Renditen aller Symbole in einem Schritt
+        performance = history_section(
+            "performance", sections.performance_frame, covered,
+            inputs=dict(symbols=tuple(symbols), snapshot=snapshot)
+        )
+        show_snapshot_age(performance)
+        show_messages(performance.messages)
+
+        # --- Tabelle anzeigen ---
+        with metrics.render():
+            if performance.data is not None:
+                # HTML-Tabelle mit Prozentformatierung
+                st.markdown(render_table(performance.data, default="percent", theme=table_theme), unsafe_allow_html=True)
+            else:
+                st.info("Keine Performance-Daten verfügbar.")
+
+def risk_section(covered):
+    metrics.enter("Risiko")
+    with risk_box:
+        # Risikoanalyse: alle Symbole und Zeitfenster auf einer gemeinsamen Renditematrix
+        risk = history_section(
+            "risk", sections.risk_frame, covered,
+            inputs=dict(symbols=tuple(symbols), today=today, snapshot=snapshot)
+        )
 
-    perf_html = perf_df_transposed.map(format_percent).to_html(escape=False)
+        # --- Risikoanalyse als HTML-Tabelle anzeigen ---
+        st.markdown("### Risiko")
+        show_snapshot_age(risk)
+        show_messages(risk.messages)
 
-    st.markdown(perf_html, unsafe_allow_html=True)
-else:
-    st.info("Keine Performance-Daten verfügbar.")
-
-# Risikoanalyse
-periods_risk = { # Umbenannt, um Konflikt mit perf_periods zu vermeiden
-    "1 Monat": today - datetime.timedelta(days=30),
-    "6 Monate": today - datetime.timedelta(days=182),
-    "1 Jahr": today - datetime.timedelta(days=365),
-    "3 Jahre": today - datetime.timedelta(days=3 * 365),
-    "5 Jahre": today - datetime.timedelta(days=5 * 365)
-}
+        with metrics.render():
+            if risk.data is not None:
+                # Zeilen: zuerst Volatilität, dann Sharpe, dann Drawdown je Zeitraum; Spalten: Symbole
+                # Formatierung: Volatilität und Drawdown in Prozent, Sharpe Ratio als Zahl
+                st.markdown(render_table(risk.data, sections.RISK_FORMATS, theme=table_theme), unsafe_allow_html=True)
+            else:
+                st.info("Keine Risikoanalyse-Daten verfügbar.")
+
+covered = {table: snapshot_covers(table) for table in ["fundamentals", "performance", "risk"]}
+if covered["fundamentals"]:
+    fundamentals_section()
+if covered["performance"]:
+    performance_section(covered=True)
+if covered["risk"]:
+    risk_section(covered=True)
+
+metrics.enter("Kursvergleich")
+with live_box:
+    # Einmal 5 Jahre Tagesdaten pro Symbol aus dem lokalen Speicher, alle Abschnitte lesen daraus
+    history_symbols = list(symbols) + ([benchmark_symbol] if benchmark_symbol else [])
+    histories = graph.run(
+        "histories", partial(sections.load_histories, price_store),
+        inputs=dict(symbols=tuple(symbols), benchmark_symbol=benchmark_symbol, today=today,
+                    epoch=(data_epoch, price_store.versions(history_symbols)))
+    )
+    show_messages(histories.messages)
 
-risk_data = {}
+    comparison = graph.run(
+        "comparison", sections.comparison_frame, deps=["histories"],
+        inputs=dict(symbols=tuple(symbols), benchmark_symbol=benchmark_symbol, period=period_comparison, today=today)
+    )
 
-for symbol in symbols:
-    try: # try-block um yf.Ticker und hist.history
-        ticker = yf.Ticker(symbol)
-        hist = ticker.history(start=min(periods_risk.values()), end=today + datetime.timedelta(days=1)) # periods_risk verwenden
+    # --- Chart anzeigen ---
+    with metrics.render():
+        if comparison.data is not None:
+            combined_df = comparison.data
+            st.markdown("### Kursvergleich")
+
+            fig = go.Figure()
+            for symbol in combined_df.columns:
+                is_benchmark = symbol == "Benchmark"
+                label = f"{benchmark_symbol} (Benchmark)" if is_benchmark else symbol
+                # Form-erhaltend auf das Punktbudget ausdünnen (LTTB)
+                line_points = downsample_series(combined_df[symbol])
+                fig.add_trace(go.Scatter(
+                    x=line_points.index,
+                    y=line_points,
+                    mode='lines',
+                    name=str(label),
+                    line=dict(
+                        width=2,
+                        dash="dot" if is_benchmark else "solid",
+                        color="gray" if is_benchmark else None
+                    )
+                ))
+
+            fig.update_layout(
+                xaxis_title="Datum",
+                yaxis_title="Indexiert (%)",
+                height=500,
+                template=plotly_template_global,
+                legend_title="Symbol",
+                plot_bgcolor=background_color,
+                paper_bgcolor=background_color,
+                font=dict(color=text_color)
+            )
 
-        risk_data[symbol] = {}
-        for label, start_date in periods_risk.items(): # periods_risk verwenden
-            # tz_localize nur anwenden, wenn der Index keine Zeitzone hat
-            start_ts = pd.Timestamp(start_date)
-            if hist.index.tz is None:
-                 start_ts = start_ts.tz_localize('UTC') # oder eine passende Zeitzone
-                 df_risk = hist[hist.index >= start_ts].copy()
-            else:
-                 start_ts = start_ts.tz_localize(hist.index.tz)
-                 df_risk = hist[hist.index >= start_ts].copy()
-
-            if len(df_risk) > 1:
-                df_risk["Return"] = df_risk["Close"].pct_change()
-                # Entferne NaN-Werte aus der Return-Spalte für die Berechnung
-                clean_returns = df_risk["Return"].dropna()
-                if len(clean_returns) > 0: # Nur berechnen, wenn Returns vorhanden
-                    volatility = clean_returns.std() * (252 ** 0.5)
-                    # Sharpe Ratio: Annahme risikofreier Zinssatz = 0.
-                    # Berechnung vereinfacht: Mean Return / Std Dev of Return
-                    sharpe_ratio = clean_returns.mean() / clean_returns.std() * (252 ** 0.5) if clean_returns.std() != 0 else 0.0
-
-                    # Max Drawdown
-                    cumulative = (1 + clean_returns).cumprod()
-                    if not cumulative.empty:
-                        peak = cumulative.cummax()
-                        drawdown = (cumulative - peak) / peak
-                        max_drawdown = drawdown.min()
-                    else:
-                        max_drawdown = 0.0 # Standardwert, wenn keine Daten
-
-                    risk_data[symbol][f"Volatilität {label} (%)"] = round(volatility * 100, 2)
-                    risk_data[symbol][f"Sharpe Ratio {label}"] = round(sharpe_ratio, 2)
-                    risk_data[symbol][f"Max. Drawdown {label} (%)"] = round(max_drawdown * 100, 2)
-                else: # Keine Returns nach dropna
-                    risk_data[symbol][f"Volatilität {label} (%)"] = None
-                    risk_data[symbol][f"Sharpe Ratio {label}"] = None
-                    risk_data[symbol][f"Max. Drawdown {label} (%)"] = None
-            else: # Weniger als 2 Datenpunkte
-                risk_data[symbol][f"Volatilität {label} (%)"] = None
-                risk_data[symbol][f"Sharpe Ratio {label}"] = None
-                risk_data[symbol][f"Max. Drawdown {label} (%)"] = None
-    except Exception as e:
-        st.warning(f"Fehler bei Risikoanalyse für {symbol}: {e}")
-
-df_risk = pd.DataFrame(risk_data).T # Umbenannt, um Konflikt mit anderen df zu vermeiden
-
-# --- Risikoanalyse als HTML-Tabelle anzeigen ---
-st.markdown("### Risiko")
-
-if not df_risk.empty:
-    df_transposed_risk = df_risk.T # Transponieren nur, wenn df_risk nicht leer ist
-    # Index umsortieren: zuerst Volatilität, dann Sharpe, dann Drawdown
-    sort_order = []
-    for metric in ["Volatilität", "Sharpe Ratio", "Max. Drawdown"]:
-        for period_label in periods_risk.keys(): # Korrekte Verwendung von periods_risk.keys()
-            sort_order.append(f"{metric} {period_label} (%)" if "Drawdown" in metric or "Volatilität" in metric else f"{metric} {period_label}")
-
-    # Index sortieren - nur die vorhandenen Indizes verwenden
-    valid_sort_order = [idx for idx in sort_order if idx in df_transposed_risk.index]
-    df_sorted_risk = df_transposed_risk.reindex(valid_sort_order)
-
-    # Formatierung anwenden
-    def format_metric(val):
-        try:
-            if val is None:
-                return "N/A"
-            # Nur Volatilität und Drawdown als Prozent formatieren
-            if "Volatilität" in str(df_sorted_risk.index[df_sorted_risk.values == val]) or \
-               "Drawdown" in str(df_sorted_risk.index[df_sorted_risk.values == val]): # Dies ist eine sehr einfache, aber potenziell ungenaue Weise zu prüfen.
-                return f"{val:.2f} %"
-            return f"{val:.2f}" # Für Sharpe Ratio und andere numerische Werte
-        except (ValueError, TypeError):
-            return "-"
-
-    # Bessere Formatierung: Iteriere über die Indizes, um den Typ zu bestimmen
-    formatted_data = {}
-    for col in df_sorted_risk.columns:
-        formatted_data[col] = []
-        for idx in df_sorted_risk.index:
-            val = df_sorted_risk.loc[idx, col]
-            if "Volatilität" in idx or "Drawdown" in idx:
-                formatted_data[col].append(f"{val:.2f} %" if isinstance(val, (int, float)) else "N/A")
-            elif "Sharpe Ratio" in idx:
-                 formatted_data[col].append(f"{val:.2f}" if isinstance(val, (int, float)) else "N/A")
-            else:
-                 formatted_data[col].append(val if val is not None else "N/A") # Für andere Fälle, die hier nicht vorkommen sollten
+            st.plotly_chart(fig, use_container_width=True)
 
-    df_formatted_risk = pd.DataFrame(formatted_data, index=df_sorted_risk.index)
+        else:
+            st.warning("Keine Daten konnten geladen werden.")
 
+    # --- Unternehmensinfos ---
+    metrics.enter("Unternehmensdaten")
+    st.markdown("### Unternehmensdaten")
 
-    risk_html_sorted = df_formatted_risk.to_html(escape=False)
-    st.markdown(risk_html_sorted, unsafe_allow_html=True)
-else:
-    st.info("Keine Risikoanalyse-Daten verfügbar.")
+    company_info = graph.run(
+        "company_info", partial(sections.company_info_frame, meta_cache),
+        inputs=dict(symbols=tuple(symbols), meta_info=meta_info, day=today, epoch=meta_cache.versions(symbols))
+    )
+    show_messages(company_info.messages)
+
+    with metrics.render():
+        if company_info.data is not None:
+            # HTML-Tabelle mit gestyltem Output
+            st.markdown(render_table(company_info.data, sections.COMPANY_INFO_FORMATS, theme=table_theme), unsafe_allow_html=True)
+        else:
+            st.info("Keine Unternehmensinformationen verfügbar.")
+
+if not covered["fundamentals"]:
+    fundamentals_section()
+if not covered["performance"]:
+    performance_section(covered=False)
+if not covered["risk"]:
+    risk_section(covered=False)
+
+# --- Rollierende Risikoanalyse (gegen die Benchmark) ---
+metrics.enter("Rollierendes Risiko")
+st.markdown("### Rollierende Risikoanalyse")
+
+rolling_window_label = st.selectbox(
+    "Rollierendes Fenster", options=list(ROLLING_WINDOWS.keys()), index=1, key="rolling_window_select"
+)
+rolling = graph.run(
+    "rolling_risk", sections.rolling_risk_frames, deps=["histories"],
+    inputs=dict(symbols=tuple(symbols), benchmark_symbol=benchmark_symbol, window=ROLLING_WINDOWS[rolling_window_label])
+)
+show_messages(rolling.messages)
+
+with metrics.render():
+    if rolling.data is not None:
+        rolling_tabs = st.tabs([*rolling.data["rolling"].keys(), "Korrelationsmatrix"])
+        for tab, (metric_name, metric_df) in zip(rolling_tabs, rolling.data["rolling"].items()):
+            with tab:
+                fig_rolling = go.Figure()
+                for symbol in metric_df.columns:
+                    line_points = downsample_series(metric_df[symbol])
+                    fig_rolling.add_trace(go.Scatter(x=line_points.index, y=line_points, mode="lines", name=str(symbol)))
+                fig_rolling.update_layout(
+                    xaxis_title="Datum",
+                    yaxis_title=metric_name,
+                    height=400,
+                    template=plotly_template_global,
+                    legend_title="Symbol",
+                    plot_bgcolor=background_color,
+                    paper_bgcolor=background_color,
+                    font=dict(color=text_color)
+                )
+                st.plotly_chart(fig_rolling, use_container_width=True)
+
+        with rolling_tabs[-1]:
+            correlation = rolling.data["correlation"]
+            if not correlation.empty:
+                fig_corr = go.Figure(go.Heatmap(
+                    z=correlation.to_numpy(),
+                    x=[str(column) for column in correlation.columns],
+                    y=[str(column) for column in correlation.index],
+                    zmin=-1, zmax=1,
+                    colorscale="RdBu",
+                    text=correlation.round(2).to_numpy(),
+                    texttemplate="%{text}"
+                ))
+                fig_corr.update_layout(
+                    height=150 + 40 * len(correlation),
+                    template=plotly_template_global,
+                    plot_bgcolor=background_color,
+                    paper_bgcolor=background_color,
+                    font=dict(color=text_color)
+                )
+                st.plotly_chart(fig_corr, use_container_width=True)
+    else:
+        st.info("Keine Daten für die rollierende Risikoanalyse verfügbar.")
 
 # --- Detailanalyse mit Candlestick-Chart ---
+metrics.enter("Detailanalyse")
 st.markdown("## Detailanalyse einzelner Aktien")
 
 # Sicherstellen, dass es Symbole zur Auswahl gibt
@@ -651,6 +664,18 @@ if detail_symbol: # Nur fortfahren, wenn ein Symbol ausgewählt ist
         key="detail_interval_select"
     )
 
+    # --- Live-Modus (nur Intraday): im gewählten Takt nur neue Bars nachladen ---
+    if interval in ["15m", "1h"]:
+        live_mode = st.toggle("Live-Modus (automatisch aktualisieren)", key="live_mode_toggle")
+        if live_mode:
+            live_refresh = st.select_slider(
+                "Aktualisierung alle",
+                options=[15, 30, 60, 120, 300],
+                value=60,
+                format_func=lambda seconds: f"{seconds} s",
+                key="live_refresh_select"
+            )
+
     if interval in ["1d", "1wk", "1mo"]:
         forecast_method = st.radio(
             "Prognosemethode wählen:",
@@ -674,178 +699,287 @@ if detail_symbol: # Nur fortfahren, wenn ein Symbol ausgewählt ist
     show_sma200 = st.checkbox("SMA 200 anzeigen", key="show_sma200_check")
     show_volume = st.checkbox("Volumen anzeigen", key="show_volume_check")
     show_rsi = st.checkbox("RSI anzeigen", key="show_rsi_check")
-
-    interval_period_map = {
-        "15m": "15d",
-        "1h": "40d",
-        "1d": "1y",
-        "1wk": "5y",
-        "1mo": "8y"
-    }
-    period_detail = interval_period_map.get(interval) # Umbenannt
-
-    # --- Kursdaten laden ---
-    df_detail = yf.download(detail_symbol, period=period_detail, interval=interval, auto_adjust=True) # df_detail umbenannt
-    df_detail.index = pd.to_datetime(df_detail.index)
-    df_detail.sort_index(inplace=True)
-
-    # --- MultiIndex fixen (z. B. durch group_by='ticker') ---
-    if isinstance(df_detail.columns, pd.MultiIndex):
-        df_detail.columns = df_detail.columns.get_level_values(0)
-
-    df_detail = df_detail.copy()
-
-    # --- Candlestick-Plot ---
-    if not df_detail.empty and all(col in df_detail.columns for col in ["Open", "High", "Low", "Close", "Volume"]): # Volume hinzugefügt
-        # Subplots vorbereiten
-        rows = 1
-        row_heights = [0.6]
-        subplot_titles = [f"Candlestick-Chart für {detail_symbol}"]
-
-        if show_volume:
-            rows += 1
-            row_heights.append(0.2)
-            subplot_titles.append("Volumen")
-        if show_rsi:
-            rows += 1
-            row_heights.append(0.2)
-            subplot_titles.append("RSI (14)")
-
-        fig_detail = make_subplots( # fig_detail umbenannt
-            rows=rows, cols=1,
-            shared_xaxes=True,
-            vertical_spacing=0.03,
-            row_heights=row_heights,
-            subplot_titles=subplot_titles
+    show_ema20 = st.checkbox("EMA 20 anzeigen", key="show_ema20_check")
+    show_bollinger = st.checkbox("Bollinger-Bänder (20, 2) anzeigen", key="show_bollinger_check")
+    show_macd = st.checkbox("MACD (12, 26, 9) anzeigen", key="show_macd_check")
+    selected_indicators = [
+        name for name, selected in [
+            ("SMA50", show_sma50), ("SMA200", show_sma200), ("EMA20", show_ema20),
+            ("RSI", show_rsi), ("MACD", show_macd), ("BB", show_bollinger)
+        ] if selected
+    ]
+
+    # --- Detaildaten und Chart als Fragment: im Live-Modus läuft nur dieser Teil im Takt neu ---
+    # Kein Warten im Skript-Thread; Eingaben bleiben während des Takts bedienbar.
+    @st.fragment(run_every=live_refresh)
+    @fragment_metrics("Detailanalyse")
+    def detail_chart():
+        detail_epoch = int(time.time() // (live_refresh or (60 if interval in ["15m", "1h"] else 15 * 60)))
+
+        # --- Kursdaten laden (aus dem lokalen Speicher, nur fehlende Bars werden nachgeladen) ---
+        df_detail = graph.run(
+            "detail_data", partial(sections.detail_frame, price_store),
+            inputs=dict(symbol=detail_symbol, interval=interval, epoch=(detail_epoch, price_store.versions([detail_symbol], base_interval(interval))), live=live_refresh is not None)
+        )
+        stale_bar = price_store.stale_since(detail_symbol, base_interval(interval))
+        if stale_bar is not None:
+            st.caption(f"Kursdaten evtl. nicht aktuell (letzter Bar {stale_bar:%d.%m.%Y %H:%M}), Aktualisierung läuft im Hintergrund.")
+        # Indikatoren nur neu berechnen, wenn sich Daten oder Auswahl geändert haben;
+        # bei neuen Bars rechnet die Engine aus der Session nur diese nach
+        indicator_engines = st.session_state.setdefault("_indicator_engines", LRUCache(maxsize=8))
+        df_detail = graph.run(
+            "detail_indicators", partial(sections.detail_indicators, indicator_engines), deps=["detail_data"],
+            inputs=dict(symbol=detail_symbol, interval=interval, indicators=selected_indicators)
         )
 
-        # --- Exponential Smoothing Forecast ---
-        if forecast_method == "Exponential Smoothing":
-            df_forecast = df_detail["Close"].dropna()
+        # --- Ausschnitt und Auflösung ---
+        # Standardmäßig werden Kerzen und Linien auf ein Punktbudget reduziert; ein engerer
+        # Ausschnitt zeigt automatisch mehr Details, bis hin zur vollen Auflösung.
+        full_resolution = st.checkbox("Volle Auflösung (alle Datenpunkte an den Browser senden)", key="full_resolution_check")
+        df_view = df_detail
+        if len(df_detail) > 1:
+            # Slider arbeitet mit naiven Zeitstempeln (Wandzeit der Börse)
+            range_min, range_max = (ts.tz_localize(None).to_pydatetime() for ts in (df_detail.index[0], df_detail.index[-1]))
+            view_start, view_end = st.slider(
+                "Ausschnitt",
+                min_value=range_min,
+                max_value=range_max,
+                value=(range_min, range_max),
+                key=f"detail_range_{detail_symbol}_{interval}"
+            )
+            df_view = df_detail[
+                (df_detail.index >= align_timestamp(view_start, df_detail.index)) &
+                (df_detail.index <= align_timestamp(view_end, df_detail.index))
+            ]
+
+        def plot_series(series):
+            return series if full_resolution else downsample_series(series)
+
+        df_candles = df_view if full_resolution else ohlc_buckets(df_view)
+
+        # --- Candlestick-Plot ---
+        with metrics.render():
+            if not df_view.empty and all(col in df_view.columns for col in ["Open", "High", "Low", "Close", "Volume"]): # Volume hinzugefügt
+                # Subplots vorbereiten
+                rows = 1
+                row_heights = [0.6]
+                subplot_titles = [f"Candlestick-Chart für {detail_symbol}"]
+
+                if show_volume:
+                    rows += 1
+                    row_heights.append(0.2)
+                    subplot_titles.append("Volumen")
+                if show_rsi:
+                    rows += 1
+                    row_heights.append(0.2)
+                    subplot_titles.append("RSI (14)")
+                if show_macd:
+                    rows += 1
+                    row_heights.append(0.2)
+                    subplot_titles.append("MACD (12, 26, 9)")
+
+                fig_detail = make_subplots( # fig_detail umbenannt
+                    rows=rows, cols=1,
+                    shared_xaxes=True,
+                    vertical_spacing=0.03,
+                    row_heights=row_heights,
+                    subplot_titles=subplot_titles
+                )
+
+                # --- Prognose (Fit im Hintergrund-Prozess, Chart erscheint sofort) ---
+                if forecast_method in ["Exponential Smoothing", "Prophet"]:
+                    forecast_series = df_detail["Close"].dropna()
+                    status, payload, forecast_key = forecast_service.request(detail_symbol, interval, forecast_method, forecast_series)
+
+                    if status == "done":
+                        try:
+                            forecast = forecast_cache.predict(forecast_key, payload, forecast_series, forecast_horizon)
+
+                            if forecast_method == "Exponential Smoothing":
+                                fig_detail.add_trace(go.Scatter(
+                                    x=forecast["ds"],
+                                    y=forecast["yhat"],
+                                    mode="lines",
+                                    name="Forecast (ETS)",
+                                    line=dict(color="#FF6600", dash="dash")
+                                ), row=1, col=1)
+                            else:
+                                fig_detail.add_trace(go.Scatter(
+                                    x=forecast["ds"],
+                                    y=forecast["yhat"],
+                                    mode="lines",
+                                    name="Forecast (Prophet)",
+                                    line=dict(color="magenta", dash="dot")
+                                ), row=1, col=1)
+
+                                # Optional: Konfidenzintervall darstellen
+                                fig_detail.add_trace(go.Scatter(
+                                    x=forecast["ds"].tolist() + forecast["ds"][::-1].tolist(),
+                                    y=forecast["yhat_upper"].tolist() + forecast["yhat_lower"][::-1].tolist(),
+                                    fill='toself',
+                                    fillcolor='rgba(255, 0, 255, 0.1)',
+                                    line=dict(color='rgba(255,255,255,0)'),
+                                    hoverinfo="skip",
+                                    showlegend=False
+                                ), row=1, col=1)
+
+                        except Exception as e:
+                            st.warning(f"{forecast_method} Forecast fehlgeschlagen: {e}")
+                    elif status == "failed":
+                        st.warning(f"{forecast_method} Forecast fehlgeschlagen: {payload}")
+                    else:
+                        st.info(f"{forecast_method}-Prognose wird im Hintergrund berechnet und erscheint automatisch.")
+                        forecast_pending.append(forecast_key)
+
+                fig_detail.add_trace(go.Candlestick(
+                    x=df_candles.index,
+                    open=df_candles["Open"],
+                    high=df_candles["High"],
+                    low=df_candles["Low"],
+                    close=df_candles["Close"],
+                    name="Kurs",
+                    increasing_line_color='green',
+                    decreasing_line_color='red',
+                    showlegend=True
+                ), row=1, col=1) # Row und Col explizit gesetzt
+
+                # --- SMA 50 ---
+                if show_sma50:
+                    fig_detail.add_trace(go.Scatter(
+                        x=plot_series(df_view["SMA50"]).index, y=plot_series(df_view["SMA50"]), mode="lines",
+                        name="SMA 50", line=dict(color='orange', width=2)
+                    ), row=1, col=1)
+
+                # --- SMA 200 ---
+                if show_sma200:
+                    fig_detail.add_trace(go.Scatter(
+                        x=plot_series(df_view["SMA200"]).index, y=plot_series(df_view["SMA200"]), mode="lines",
+                        name="SMA 200", line=dict(color='teal', width=2)
+                    ), row=1, col=1)
+
+                # --- EMA 20 ---
+                if show_ema20:
+                    fig_detail.add_trace(go.Scatter(
+                        x=plot_series(df_view["EMA20"]).index, y=plot_series(df_view["EMA20"]), mode="lines",
+                        name="EMA 20", line=dict(color='royalblue', width=1.5)
+                    ), row=1, col=1)
+
+                # --- Bollinger-Bänder ---
+                if show_bollinger:
+                    for column, label in [("BB_Upper", "Bollinger oben"), ("BB_Lower", "Bollinger unten")]:
+                        fig_detail.add_trace(go.Scatter(
+                            x=plot_series(df_view[column]).index, y=plot_series(df_view[column]), mode="lines",
+                            name=label, line=dict(color='gray', width=1, dash="dot")
+                        ), row=1, col=1)
+
+                row_idx_current = 2 # Start für Volumen/RSI/MACD
+                if show_volume:
+                    fig_detail.add_trace(go.Bar(
+                        x=df_candles.index, y=df_candles["Volume"],
+                        name="Volumen", marker_color="lightgray"
+                    ), row=row_idx_current, col=1)
+                    row_idx_current += 1
+
+                if show_rsi:
+                    fig_detail.add_trace(go.Scatter(
+                        x=plot_series(df_view["RSI"]).index, y=plot_series(df_view["RSI"]),
+                        mode="lines", name="RSI",
+                        line=dict(color="purple")
+                    ), row=row_idx_current, col=1)
+                    # RSI Überkaufte/Überverkaufte Bereiche
+                    fig_detail.add_hline(y=70, line_dash="dot", line_color="red", row=row_idx_current, col=1)
+                    fig_detail.add_hline(y=30, line_dash="dot", line_color="green", row=row_idx_current, col=1)
+                    row_idx_current += 1
+
+                if show_macd:
+                    fig_detail.add_trace(go.Bar(
+                        x=plot_series(df_view["MACD_Hist"]).index, y=plot_series(df_view["MACD_Hist"]),
+                        name="MACD-Histogramm", marker_color="lightgray"
+                    ), row=row_idx_current, col=1)
+                    for column, label, color in [("MACD", "MACD", "darkblue"), ("MACD_Signal", "Signal", "orange")]:
+                        fig_detail.add_trace(go.Scatter(
+                            x=plot_series(df_view[column]).index, y=plot_series(df_view[column]),
+                            mode="lines", name=label, line=dict(color=color)
+                        ), row=row_idx_current, col=1)
+
+
+                # Layout finalisieren
+                fig_detail.update_layout(
+                    height=250 * rows + 150,
+                    showlegend=True,
+                    template=plotly_template_global,
+                    xaxis_rangeslider_visible=False,
+                    plot_bgcolor=background_color,  # <- Hintergrundfarbe Plotbereich
+                    paper_bgcolor=background_color,  # <- Hintergrundfarbe gesamter Chart
+                    font=dict(color=text_color),  # <- Schriftfarbe (Achsen, Titel etc.)
+                    uirevision=f"{detail_symbol}-{interval}"  # Zoom/Pan bleibt bei Live-Updates erhalten
+                )
+                # Update X-Achsen-Bereich für alle Subplots
+                fig_detail.update_xaxes(rangeslider_visible=False, row=1, col=1) # Für Hauptchart den Rangeslider entfernen
+                # Andere X-Achsen sollen auch keine Rangeslider haben, aber ihre Ranges vom Hauptchart teilen
+                for i in range(2, rows + 1):
+                     fig_detail.update_xaxes(rangeslider_visible=False, row=i, col=1)
+
+
+                st.plotly_chart(fig_detail, use_container_width=True)
+            else:
+                st.warning(f"Für {detail_symbol} konnten im Intervall {interval} keine ausreichenden Kursdaten geladen oder der Chart nicht erstellt werden. Bitte wähle ein anderes Intervall oder eine andere Aktie.")
 
-            try:
-                model = ExponentialSmoothing(df_forecast, trend="add", seasonal=None, damped_trend=True).fit()
-                forecast = model.forecast(forecast_horizon)
-
-                fig_detail.add_trace(go.Scatter(
-                    x=forecast.index,
-                    y=forecast,
-                    mode="lines",
-                    name="Forecast (ETS)",
-                    line=dict(color="#FF    6600", dash="dash")
-                ), row=1, col=1)
-
-            except Exception as e:
-                st.warning(f"Exponential Smoothing Forecast fehlgeschlagen: {e}")
-
-        # --- Prophet Forecast ---
-        elif forecast_method == "Prophet":
-            try:
-                df_prophet = df_detail["Close"].dropna().reset_index()
-                df_prophet.columns = ["ds", "y"]
-
-                model = Prophet(daily_seasonality=True)
-                model.fit(df_prophet)
-
-                future = model.make_future_dataframe(periods=forecast_horizon)
-                forecast = model.predict(future)
-
-                fig_detail.add_trace(go.Scatter(
-                    x=forecast["ds"],
-                    y=forecast["yhat"],
-                    mode="lines",
-                    name="Forecast (Prophet)",
-                    line=dict(color="magenta", dash="dot")
-                ), row=1, col=1)
-
-                # Optional: Konfidenzintervall darstellen
-                fig_detail.add_trace(go.Scatter(
-                    x=forecast["ds"].tolist() + forecast["ds"][::-1].tolist(),
-                    y=forecast["yhat_upper"].tolist() + forecast["yhat_lower"][::-1].tolist(),
-                    fill='toself',
-                    fillcolor='rgba(255, 0, 255, 0.1)',
-                    line=dict(color='rgba(255,255,255,0)'),
-                    hoverinfo="skip",
-                    showlegend=False
-                ), row=1, col=1)
-
-            except Exception as e:
-                st.warning(f"Prophet Forecast fehlgeschlagen: {e}")
-
-        fig_detail.add_trace(go.Candlestick(
-            x=df_detail.index,
-            open=df_detail["Open"],
-            high=df_detail["High"],
-            low=df_detail["Low"],
-            close=df_detail["Close"],
-            name="Kurs",
-            increasing_line_color='green',
-            decreasing_line_color='red',
-            showlegend=True
-        ), row=1, col=1) # Row und Col explizit gesetzt
-
-        # --- SMA 50 ---
-        if show_sma50:
-            df_detail["SMA50"] = df_detail["Close"].rolling(window=50, min_periods=1).mean()
-            fig_detail.add_trace(go.Scatter(
-                x=df_detail.index, y=df_detail["SMA50"], mode="lines",
-                name="SMA 50", line=dict(color='orange', width=2)
-            ), row=1, col=1)
-
-        # --- SMA 200 ---
-        if show_sma200:
-            df_detail["SMA200"] = df_detail["Close"].rolling(window=200, min_periods=1).mean()
-            fig_detail.add_trace(go.Scatter(
-                x=df_detail.index, y=df_detail["SMA200"], mode="lines",
-                name="SMA 200", line=dict(color='teal', width=2)
-            ), row=1, col=1)
-
-        row_idx_current = 2 # Start für Volumen/RSI
-        if show_volume:
-            fig_detail.add_trace(go.Bar(
-                x=df_detail.index, y=df_detail["Volume"],
-                name="Volumen", marker_color="lightgray"
-            ), row=row_idx_current, col=1)
-            row_idx_current += 1
-
-        if show_rsi:
-            # RSI Berechnung
-            delta = df_detail["Close"].diff()
-            gain = delta.where(delta > 0, 0)
-            loss = -delta.where(delta < 0, 0)
-            avg_gain = gain.ewm(com=13, adjust=False).mean() # Exponentieller gleitender Durchschnitt
-            avg_loss = loss.ewm(com=13, adjust=False).mean()
-            rs = avg_gain / avg_loss
-            df_detail["RSI"] = 100 - (100 / (1 + rs))
-
-            fig_detail.add_trace(go.Scatter(
-                x=df_detail.index, y=df_detail["RSI"],
-                mode="lines", name="RSI",
-                line=dict(color="purple")
-            ), row=row_idx_current, col=1)
-            # RSI Überkaufte/Überverkaufte Bereiche
-            fig_detail.add_hline(y=70, line_dash="dot", line_color="red", row=row_idx_current, col=1)
-            fig_detail.add_hline(y=30, line_dash="dot", line_color="green", row=row_idx_current, col=1)
-
-
-        # Layout finalisieren
-        fig_detail.update_layout(
-            height=250 * rows + 150,
-            showlegend=True,
-            template=plotly_template_global,
-            xaxis_rangeslider_visible=False,
-            plot_bgcolor=background_color,  # <- Hintergrundfarbe Plotbereich
-            paper_bgcolor=background_color,  # <- Hintergrundfarbe gesamter Chart
-            font=dict(color=text_color)  # <- Schriftfarbe (Achsen, Titel etc.)
-        )
-        # Update X-Achsen-Bereich für alle Subplots
-        fig_detail.update_xaxes(rangeslider_visible=False, row=1, col=1) # Für Hauptchart den Rangeslider entfernen
-        # Andere X-Achsen sollen auch keine Rangeslider haben, aber ihre Ranges vom Hauptchart teilen
-        for i in range(2, rows + 1):
-             fig_detail.update_xaxes(rangeslider_visible=False, row=i, col=1)
+    detail_chart()
 
 
-        st.plotly_chart(fig_detail, use_container_width=True)
-    else:
-        st.warning(f"Für {detail_symbol} konnten im Intervall {interval} keine ausreichenden Kursdaten geladen oder der Chart nicht erstellt werden. Bitte wähle ein anderes Intervall oder eine andere Aktie.")
+    # --- Prognosen für alle ausgewählten Aktien (parallel über alle Kerne) ---
+    if forecast_method in ["Exponential Smoothing", "Prophet"] and len(symbols) > 1:
+        if st.checkbox("Prognose für alle ausgewählten Aktien berechnen", key="forecast_all_check"):
+            overview_histories = sections.interval_history_many(price_store, symbols, interval)
+            overview_rows = []
+
+            overview_series = {
+                symbol: overview_histories[symbol]["Close"].dropna()
+                for symbol in symbols
+                if not overview_histories[symbol].empty and overview_histories[symbol]["Close"].count() > 2
+            }
+
+            # ETS: alle Reihen in einem vektorisierten Fit (gedämpfter Holt-Trend wie statsmodels)
+            requests_by_symbol = {}
+            if forecast_method == "Exponential Smoothing":
+                batch_forecasts = batch_forecast(overview_series, forecast_horizon)
+                for symbol, values in batch_forecasts.items():
+                    requests_by_symbol[symbol] = (overview_series[symbol], ("batch", values, None))
+            else:
+                # Prophet: zuerst alle Jobs einreihen, dann Status abfragen
+                for symbol, series in overview_series.items():
+                    requests_by_symbol[symbol] = (series, forecast_service.request(symbol, interval, forecast_method, series))
+
+            for symbol, (series, (status, payload, key)) in requests_by_symbol.items():
+                row = {"Symbol": symbol, "Letzter Kurs": round(float(series.iloc[-1]), 2)}
+                if status in ("done", "batch"):
+                    if status == "batch":
+                        target = float(payload[-1])
+                    else:
+                        target = float(forecast_cache.predict(key, payload, series, forecast_horizon)["yhat"].iloc[-1])
+                    row[f"Prognose (+{forecast_horizon})"] = round(target, 2)
+                    row["Veränderung (%)"] = round((target / float(series.iloc[-1]) - 1) * 100, 2)
+                    row["Status"] = "fertig"
+                elif status == "failed":
+                    row["Status"] = f"fehlgeschlagen: {payload}"
+                else:
+                    row["Status"] = "wird berechnet" if status == "pending" else "wartet (Warteschlange voll)"
+                    forecast_pending.append(key)
+                overview_rows.append(row)
+
+            if overview_rows:
+                st.markdown("### Prognoseübersicht")
+                st.dataframe(pd.DataFrame(overview_rows).set_index("Symbol"), use_container_width=True)
+
+render_debug_panel(metrics.finish())
+
+# --- Laufende Hintergrund-Prognosen: ein Fragment fragt im Takt ab, die Seite lädt erst bei Ergebnissen neu ---
+# Kein Warten im Skript-Thread; der Rerun liest alles Übrige aus den Caches.
+if forecast_pending:
+    @st.fragment(run_every=FORECAST_POLL_SECONDS)
+    def forecast_poll(keys):
+        if forecast_service.ready(keys):
+            st.rerun()
 
+    forecast_poll(tuple(forecast_pending))
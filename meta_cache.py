@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import threading
+from functools import partial
+
+from cachetools import TLRUCache, TTLCache
+
+from fetching import get_executor
+from providers import get_provider
+
+# --- Cache für Ticker.info ---
+# Fundamentaldaten ändern sich höchstens täglich; ein Abruf pro Symbol und TTL genügt.
+# Im Speicher LRU-begrenzt, auf der Platte als JSON, damit ein Neustart nicht kalt startet.
+# Nach Ablauf der TTL wird der alte Eintrag noch bis META_STALE_SECONDS sofort geliefert und
+# im Hintergrund erneuert (stale-while-revalidate). Unbekannte Symbole landen
+# für META_NEGATIVE_TTL in einem Negativ-Cache und werden so lange nicht erneut abgefragt.
+
+META_CACHE_PATH = os.environ.get(
+    "AKTIEN_META_CACHE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "meta", "info_cache.json")
+)
+META_TTL_SECONDS = int(os.environ.get("AKTIEN_META_TTL", 24 * 60 * 60))
+META_MAX_SYMBOLS = int(os.environ.get("AKTIEN_META_MAX_SYMBOLS", 512))
+META_STALE_SECONDS = int(os.environ.get("AKTIEN_META_STALE", 7 * 24 * 60 * 60))
+META_NEGATIVE_TTL = int(os.environ.get("AKTIEN_META_NEGATIVE_TTL", 10 * 60))
+
+
+def _is_valid_info(info):
+    # Für unbekannte Symbole liefert Yahoo ein leeres oder fast leeres Dict
+    return isinstance(info, dict) and len(info) > 1
+
+
+class MetaCache:
+    def __init__(self, path=META_CACHE_PATH, ttl=META_TTL_SECONDS, maxsize=META_MAX_SYMBOLS, provider=None,
+                 stale=META_STALE_SECONDS, negative_ttl=META_NEGATIVE_TTL):
+        self.path = path
+        self.provider = provider or get_provider()
+        self.ttl = ttl
+        self.stale = stale
+        # Einträge sind (fetched_at, info); frisch bis fetched_at + ttl, danach noch `stale` Sekunden lieferbar
+        self._cache = TLRUCache(
+            maxsize=maxsize, ttu=lambda _key, value, _now: value[0] + self.ttl + self.stale, timer=time.time
+        )
+        self._failed = TTLCache(maxsize=1024, ttl=negative_ttl)   # Symbol -> Fehlermeldung
+        self._refreshing = set()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()   # serialisiert Schreibvorgänge, nicht die Leser
+        self._load()
+
+    # --- Persistenz ---
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except Exception:
+            return
+        now = time.time()
+        # Älteste zuerst einfügen, damit die LRU-Reihenfolge stimmt
+        for symbol, entry in sorted(stored.items(), key=lambda item: item[1].get("fetched_at", 0)):
+            if entry.get("fetched_at", 0) + self.ttl + self.stale > now:
+                self._cache[symbol] = (entry["fetched_at"], entry.get("info", {}))
+
+    def _save(self):
+        """Geänderten Stand schreiben; unter self._lock wird nur kopiert, serialisiert wird danach."""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                stored = {symbol: {"fetched_at": value[0], "info": value[1]} for symbol, value in self._cache.items()}
+                self._dirty = False
+            self._write(stored)
+
+    def _write(self, stored):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(stored, f, default=str)
+        os.replace(tmp_path, self.path)
+
+    # --- Netzwerkzugriff ---
+    def _fetch(self, symbol, persist=True):
+        try:
+            info = self.provider.info(symbol)
+        except LookupError as e:
+            # Unbekanntes Symbol; Störungen der Quelle fängt der Circuit Breaker im Provider ab
+            self._remember_failure(symbol, str(e))
+            raise
+        if not _is_valid_info(info):
+            message = f"Keine Daten für {symbol} (unbekanntes Symbol?)"
+            self._remember_failure(symbol, message)
+            raise LookupError(message)
+        with self._lock:
+            self._cache[symbol] = (time.time(), info)
+            self._failed.pop(symbol, None)
+            self._dirty = True
+        if persist:
+            self._save()
+        return info
+
+    def _remember_failure(self, symbol, message):
+        with self._lock:
+            self._failed[symbol] = message
+
+    def _refresh(self, symbol):
+        try:
+            self._fetch(symbol)
+        except Exception:
+            pass   # alter Eintrag bleibt bis zum Ende des Stale-Fensters gültig
+        finally:
+            with self._lock:
+                self._refreshing.discard(symbol)
+
+    def _revalidate(self, symbol):
+        with self._lock:
+            if symbol in self._refreshing or symbol in self._failed:
+                return
+            self._refreshing.add(symbol)
+        get_executor().submit(self._refresh, symbol)
+
+    # --- Öffentliche Schnittstelle ---
+    def info(self, symbol, persist=True):
+        """Ticker.info für `symbol`, höchstens einmal pro TTL aus dem Netz.
+
+        Abgelaufene Einträge kommen sofort zurück und werden im Hintergrund erneuert.
+        Bekannte Fehlschläge lösen bis zum Ablauf des Negativ-Caches LookupError aus.
+        Mit persist=False schreibt der Aufrufer die Datei später einmal für alle (info_many).
+        """
+        with self._lock:
+            entry = self._cache.get(symbol)
+            failure = self._failed.get(symbol)
+        if entry is not None:
+            if time.time() - entry[0] > self.ttl:
+                self._revalidate(symbol)
+            return entry[1]
+        if failure is not None:
+            raise LookupError(failure)
+        return self._fetch(symbol, persist)
+
+    def stale_since(self, symbol):
+        """Abrufzeit, falls der gelieferte Eintrag älter als die TTL ist, sonst None."""
+        with self._lock:
+            entry = self._cache.get(symbol)
+        if entry is not None and time.time() - entry[0] > self.ttl:
+            return entry[0]
+        return None
+
+    def versions(self, symbols):
+        """Abrufzeiten der Einträge je Symbol (für Cache-Schlüssel der Abschnitte)."""
+        with self._lock:
+            return tuple(self._cache[symbol][0] if symbol in self._cache else None for symbol in symbols)
+
+    def info_many(self, symbols):
+        """Ticker.info für mehrere Symbole; fehlende Einträge werden parallel geladen."""
+        with self._lock:
+            missing = [symbol for symbol in dict.fromkeys(symbols)
+                       if symbol not in self._cache and symbol not in self._failed]
+        # Parallel laden, die Datei danach einmal für den ganzen Stapel schreiben
+        fetched = get_executor().map(partial(self.info, persist=False), missing) if missing else {}
+        result = {}
+        for symbol in symbols:
+            if symbol in fetched:
+                result[symbol] = fetched[symbol]
+                continue
+            try:
+                result[symbol] = self.info(symbol, persist=False)
+            except Exception as e:
+                result[symbol] = e
+        self._save()
+        return result
+
+    def invalidate(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._cache.clear()
+                self._failed.clear()
+            else:
+                self._cache.pop(symbol, None)
+                self._failed.pop(symbol, None)
+            self._dirty = True
+        self._save()
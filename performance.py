@@ -0,0 +1,76 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from price_store import align_timestamp
+from trading_calendar import exchange_for_symbol, last_trading_day, previous_trading_day
+
+# --- Performance-Engine ---
+# Ankerdaten aller Zeiträume werden einmal pro Börse über den Handelskalender bestimmt,
+# die Renditen aller Symbole kommen danach aus einem Gather über die Kursmatrix.
+
+# None = vorheriger Handelstag ("Heute" vergleicht den letzten Schlusskurs mit dem davor)
+PERF_WINDOWS = {
+    "Heute (%)": None,
+    "1 Woche (%)": pd.DateOffset(weeks=1),
+    "1 Monat (%)": pd.DateOffset(months=1),
+    "6 Monate (%)": pd.DateOffset(months=6),
+    "1 Jahr (%)": pd.DateOffset(years=1),
+    "3 Jahre (%)": pd.DateOffset(years=3),
+    "5 Jahre (%)": pd.DateOffset(years=5),
+}
+
+
+@lru_cache(maxsize=128)
+def window_anchors(exchange, reference):
+    """Ankerdatum je Zeitraum: letzter Handelstag am oder vor (Referenz - Offset)."""
+    anchors = []
+    for offset in PERF_WINDOWS.values():
+        if offset is None:
+            anchors.append(previous_trading_day(exchange, reference))
+        else:
+            anchors.append(last_trading_day(exchange, reference - offset))
+    return tuple(anchors)
+
+
+def _naive_day(ts):
+    ts = pd.Timestamp(ts)
+    return (ts.tz_localize(None) if ts.tz is not None else ts).normalize()
+
+
+def compute_performance(prices):
+    """Wertentwicklung in % für alle Symbole (Zeilen) und Zeiträume (Spalten)."""
+    labels = list(PERF_WINDOWS)
+    if prices.empty:
+        return pd.DataFrame(columns=labels, index=pd.Index([], name="Symbol"))
+
+    prices = prices.sort_index()
+    symbols = list(prices.columns)
+    filled = prices.ffill().to_numpy(dtype=float)
+    end_prices = filled[-1]
+    result = np.full((len(symbols), len(labels)), np.nan)
+
+    by_exchange = {}
+    for i, symbol in enumerate(symbols):
+        by_exchange.setdefault(exchange_for_symbol(symbol), []).append(i)
+
+    for exchange, cols in by_exchange.items():
+        cols = np.array(cols)
+        # Referenz ist der letzte Handelstag, für den Kurse dieser Börse vorliegen
+        last_valid = prices.iloc[:, cols].last_valid_index()
+        if last_valid is None:
+            continue
+        anchors = window_anchors(exchange, _naive_day(last_valid))
+        positions = prices.index.searchsorted(
+            [align_timestamp(anchor, prices.index) for anchor in anchors], side="right"
+        ) - 1
+        # Schlusskurs am oder vor dem Ankertag (Zeiträume x Symbole)
+        start_prices = filled[np.maximum(positions, 0)][:, cols]
+        start_prices[positions < 0] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            changes = (end_prices[cols] / start_prices - 1) * 100
+        changes[start_prices == 0] = np.nan
+        result[cols] = changes.T
+
+    return pd.DataFrame(np.round(result, 2), index=pd.Index(symbols, name="Symbol"), columns=labels)
@@ -0,0 +1,47 @@
+import hashlib
+
+# --- Abschnitts-DAG ---
+# Jeder Abschnitt ist eine Funktion expliziter Eingaben (Widgets) und der Ergebnisse seiner
+# Vorgänger. Das Ergebnis wird pro Session gemerkt; ein Rerun rechnet nur Abschnitte neu,
+# deren Eingaben oder Vorgänger sich geändert haben. Darstellung (Theme) gehört nicht dazu.
+
+SECTION_STATE_KEY = "_section_cache"
+
+
+def fingerprint(value):
+    """Stabiler Hash für Widget-Eingaben (Zahlen, Strings, Tupel, Listen, Dicts, Daten)."""
+    if isinstance(value, dict):
+        value = sorted((str(k), fingerprint(v)) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        value = [fingerprint(v) for v in value]
+    return hashlib.sha1(repr(value).encode("utf-8")).hexdigest()
+
+
+class SectionGraph:
+    def __init__(self, state):
+        # state: dict-artig, in der App st.session_state
+        self._cache = state.setdefault(SECTION_STATE_KEY, {})
+        self._versions = {}
+        self.recomputed = []   # in diesem Lauf neu berechnete Abschnitte
+
+    def run(self, name, fn, inputs=None, deps=()):
+        """Abschnitt `name` ausführen oder gemerktes Ergebnis liefern.
+
+        `fn` wird als fn(*Ergebnisse der deps, **inputs) aufgerufen.
+        """
+        inputs = inputs or {}
+        key = fingerprint((inputs, [(dep, self._versions[dep]) for dep in deps]))
+        entry = self._cache.get(name)
+        if entry is None or entry["key"] != key:
+            result = fn(*[self._cache[dep]["result"] for dep in deps], **inputs)
+            entry = {"key": key, "version": (entry["version"] + 1) if entry else 1, "result": result}
+            self._cache[name] = entry
+            self.recomputed.append(name)
+        self._versions[name] = entry["version"]
+        return entry["result"]
+
+    def invalidate(self, name=None):
+        if name is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(name, None)
@@ -0,0 +1,169 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import threading
+
+import numpy as np
+import pandas as pd
+
+# --- Spaltenorientiertes Kurs-Panel ---
+# Alle Symbole eines Intervalls in drei Dateien: OHLCV als float32 (Zeilen x 5), Zeitstempel
+# als int64 (Nanosekunden seit Epoche, UTC) und Zeilen-Offsets je Symbol, dazu ein
+# Symbolverzeichnis in meta.json. Die Dateien werden read-only per np.load(mmap_mode="r")
+# eingeblendet: alle Worker-Prozesse teilen sich dieselben Seiten im Page-Cache, und ein
+# Symbol ist ein zusammenhängender Zeilenbereich, also eine Sicht ohne Kopie.
+#
+# Neue Stände werden als eigenes Versionsverzeichnis geschrieben und über die Datei CURRENT
+# atomar umgeschaltet; Leser mit altem Mapping bleiben gültig, bis sie neu öffnen.
+#
+#   python price_panel.py                   # Panel "1d" für das Universum aus main.py bauen
+#   python price_panel.py --symbols AAPL,SAP.DE --interval 1d
+
+PANEL_DIR = os.environ.get(
+    "AKTIEN_PRICE_PANEL",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "panel")
+)
+PANEL_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+KEEP_VERSIONS = 2
+RECHECK_SECONDS = 60
+
+
+class PricePanel:
+    """Read-only Sicht auf einen Panel-Stand (ein Intervall)."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.version = meta["version"]
+        self.built_at = meta["built_at"]
+        self.symbols = meta["symbols"]
+        self.timezones = meta["timezones"]
+        self._positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.values = np.load(os.path.join(path, "values.npy"), mmap_mode="r")
+        self.timestamps = np.load(os.path.join(path, "timestamps.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"))
+
+    def __contains__(self, symbol):
+        return symbol in self._positions
+
+    def frame(self, symbol):
+        """OHLCV eines Symbols als DataFrame über dem eingeblendeten Speicher (keine Kopie)."""
+        position = self._positions.get(symbol)
+        if position is None:
+            return None
+        lo, hi = int(self.offsets[position]), int(self.offsets[position + 1])
+        index = pd.DatetimeIndex(self.timestamps[lo:hi].view("datetime64[ns]"))
+        tz = self.timezones[position]
+        if tz:
+            index = index.tz_localize("UTC").tz_convert(tz)
+        return pd.DataFrame(self.values[lo:hi], index=index, columns=PANEL_COLUMNS, copy=False)
+
+
+def _utc_nanoseconds(index):
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.as_unit("ns").asi8
+
+
+def write_panel(frames, interval, root=PANEL_DIR):
+    """Neuen Panel-Stand aus Symbol -> OHLCV-DataFrame schreiben und aktivieren; liefert die Version."""
+    frames = {symbol: df for symbol, df in frames.items() if df is not None and not df.empty}
+    version = time.strftime("v%Y%m%d-%H%M%S")
+    interval_dir = os.path.join(root, interval)
+    target = os.path.join(interval_dir, version)
+    tmp_target = target + ".tmp"
+    os.makedirs(tmp_target, exist_ok=True)
+
+    symbols = list(frames)
+    lengths = [len(frames[symbol]) for symbol in symbols]
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    values = np.empty((int(offsets[-1]), len(PANEL_COLUMNS)), dtype=np.float32)
+    timestamps = np.empty(int(offsets[-1]), dtype=np.int64)
+    for position, symbol in enumerate(symbols):
+        df = frames[symbol].sort_index()
+        lo, hi = offsets[position], offsets[position + 1]
+        values[lo:hi] = df.reindex(columns=PANEL_COLUMNS).to_numpy(dtype=np.float32)
+        timestamps[lo:hi] = _utc_nanoseconds(df.index)
+
+    np.save(os.path.join(tmp_target, "values.npy"), values)
+    np.save(os.path.join(tmp_target, "timestamps.npy"), timestamps)
+    np.save(os.path.join(tmp_target, "offsets.npy"), offsets)
+    with open(os.path.join(tmp_target, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": version,
+            "interval": interval,
+            "built_at": time.time(),
+            "symbols": symbols,
+            "timezones": [str(frames[symbol].index.tz) if frames[symbol].index.tz is not None else None for symbol in symbols],
+        }, f)
+    os.replace(tmp_target, target)
+
+    # Zeiger atomar umsetzen, dann alte Stände bis auf die letzten KEEP_VERSIONS entfernen
+    pointer = os.path.join(interval_dir, "CURRENT")
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer + ".tmp", pointer)
+    versions = sorted(name for name in os.listdir(interval_dir) if name.startswith("v") and not name.endswith(".tmp"))
+    for old in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(interval_dir, old), ignore_errors=True)
+    return version
+
+
+class PanelSource:
+    """Aktueller Panel-Stand je Intervall; prüft höchstens alle `recheck` Sekunden auf neue Stände."""
+
+    def __init__(self, root=PANEL_DIR, recheck=RECHECK_SECONDS):
+        self.root = root
+        self.recheck = recheck
+        self._panels = {}    # Intervall -> (Version, PricePanel oder None, Prüfzeit)
+        self._lock = threading.Lock()
+
+    def _current_version(self, interval):
+        try:
+            with open(os.path.join(self.root, interval, "CURRENT"), "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def get(self, interval):
+        now = time.time()
+        with self._lock:
+            entry = self._panels.get(interval)
+            if entry is not None and now - entry[2] < self.recheck:
+                return entry[1]
+            version = self._current_version(interval)
+            if entry is not None and entry[0] == version:
+                self._panels[interval] = (version, entry[1], now)
+                return entry[1]
+            panel = None
+            if version:
+                try:
+                    panel = PricePanel(os.path.join(self.root, interval, version))
+                except (OSError, ValueError, KeyError):
+                    panel = None
+            self._panels[interval] = (version, panel, now)
+            return panel
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Kurs-Panel (memory-mapped) aus dem lokalen Speicher bauen")
+    parser.add_argument("--interval", default="1d", help="Intervall, z. B. 1d")
+    parser.add_argument("--period", default="5y", help="Zeitraum, z. B. 5y")
+    parser.add_argument("--symbols", default=None, help="Kommagetrennte Symbole statt des Universums aus main.py")
+    args = parser.parse_args(argv)
+
+    from price_store import PriceStore
+    from screener import universe_from_main, parse_symbol_list
+    symbols = parse_symbol_list(args.symbols) if args.symbols else list(universe_from_main())
+    frames = PriceStore().history_many(symbols, args.interval, period=args.period)
+    version = write_panel(frames, args.interval)
+    print(f"Panel {args.interval} {version}: {sum(1 for df in frames.values() if not df.empty)} Symbole")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,396 @@
+import os
+import time
+import datetime
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pandas as pd
+from cachetools import TTLCache
+
+from providers import get_provider
+from shared_cache import SizedLRU
+from price_panel import PanelSource
+
+# --- Lokaler OHLCV-Speicher ---
+# Pro (Symbol, Intervall) liegt eine Parquet-Datei auf der Platte. Vorhandene Bars
+# werden behalten, nachgeladen wird nur das fehlende Ende seit dem letzten Bar. Symbole aus dem
+# Kurs-Panel (price_panel.py) lesen aus dessen geteilter Sicht; im Prozess liegt dann nur das
+# eigene Ende seit dem Panel-Bau; zusammengeführt wird beim Lesen, einmal je neuem Ende.
+#
+# Das Nachladen der Enden läuft im Hintergrund (stale-while-revalidate): history_many wartet
+# höchstens STALE_WAIT_SECONDS und liefert sonst den bekannten Stand, markiert über
+# stale_since(). Symbole, für die Yahoo keine Daten kennt (z. B. Tippfehler), werden für
+# NEGATIVE_TTL_SECONDS nicht erneut angefragt.
+
+STORE_DIR = os.environ.get(
+    "AKTIEN_PRICE_STORE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "prices")
+)
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Zeiträume im yfinance-Format in Kalendertage umrechnen
+PERIOD_DAYS = {
+    "1d": 1,
+    "5d": 5,
+    "15d": 15,
+    "40d": 40,
+    "1mo": 30,
+    "3mo": 91,
+    "6mo": 182,
+    "1y": 365,
+    "2y": 2 * 365,
+    "5y": 5 * 365,
+    "8y": 8 * 365,
+}
+
+# Obergrenze für Kursdaten im Speicher (über alle Sessions); Verdrängtes kommt von der Platte
+PRICE_MEMORY_MB = float(os.environ.get("AKTIEN_PRICE_MEMORY_MB", 512))
+
+STALE_WAIT_SECONDS = float(os.environ.get("AKTIEN_STALE_WAIT", 2))
+NEGATIVE_TTL_SECONDS = float(os.environ.get("AKTIEN_PRICE_NEGATIVE_TTL", 10 * 60))
+
+# Wie lange ein geprüfter Bestand als aktuell gilt, bevor das Ende erneut abgefragt wird (Sekunden)
+REFRESH_AFTER = {
+    "15m": 60,
+    "1h": 5 * 60,
+    "1d": 15 * 60,
+    "1wk": 60 * 60,
+    "1mo": 6 * 60 * 60,
+}
+
+
+def period_start(period, today=None):
+    """Startdatum für einen yfinance-Zeitraum wie "1y" oder "15d"."""
+    today = today or datetime.date.today()
+    return pd.Timestamp(today - datetime.timedelta(days=PERIOD_DAYS[period]))
+
+
+def align_timestamp(ts, index):
+    """Zeitstempel an die Zeitzone eines DatetimeIndex anpassen."""
+    ts = pd.Timestamp(ts)
+    tz = getattr(index, "tz", None)
+    if tz is None:
+        return ts.tz_localize(None) if ts.tz is not None else ts
+    return ts.tz_localize(tz) if ts.tz is None else ts.tz_convert(tz)
+
+
+def normalize_ohlcv(df):
+    """yfinance-Ausgabe auf flache OHLCV-Spalten und sortierten Index bringen."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+    # MultiIndex fixen (yfinance liefert (Price, Ticker))
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    df = df[[col for col in OHLCV_COLUMNS if col in df.columns]].copy()
+    df.index = pd.to_datetime(df.index)
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    return df.dropna(how="all")
+
+
+def _overlay(df, new):
+    """Bars aus `new` über `df` legen; überlappende werden ersetzt (der letzte Bar kann noch in Bildung sein)."""
+    if df is None or df.empty:
+        return new
+    merged = pd.concat([df[df.index < new.index[0]], new, df[df.index > new.index[-1]]])
+    return merged[~merged.index.duplicated(keep="last")].sort_index()
+
+
+class PriceStore:
+    def __init__(self, root=STORE_DIR, provider=None, panels=None):
+        self.root = root
+        self.provider = provider or get_provider()
+        # Memory-mapped Panel (price_panel.py): geteilt über Prozesse, Vorrang vor älterem Parquet
+        self.panels = panels if panels is not None else PanelSource()
+        os.makedirs(self.root, exist_ok=True)
+        # (symbol, interval) -> DataFrame; bei Panel-Symbolen nur das eigene Ende ab dem Panel
+        self._frames = SizedLRU(int(PRICE_MEMORY_MB * 1024 * 1024))
+        # (symbol, interval) -> Panel-Sicht (keine Kopie), Basis für das Ende in self._frames
+        self._bases = {}
+        # Panel-Sicht plus Ende als eine Kopie je Stand des Endes, geteilt von allen Sessions
+        self._joined = SizedLRU(int(PRICE_MEMORY_MB * 1024 * 1024))
+        self._joined_tails = {}   # (symbol, interval) -> Ende, aus dem self._joined gebaut wurde
+        self._checked = {}   # (symbol, interval) -> Zeitpunkt der letzten Aktualisierung
+        self._covered = {}   # (symbol, interval) -> frühester bereits angefragter Start
+        self._invalid = TTLCache(maxsize=1024, ttl=NEGATIVE_TTL_SECONDS)   # (symbol, interval) ohne Kursdaten
+        self._refreshing = {}   # (symbol, interval) -> Future der laufenden Hintergrund-Aktualisierung
+        self._stale = {}     # (symbol, interval) -> letzter Bar, solange veraltet ausgeliefert
+        self._refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="price-refresh")
+        # (symbol, interval) -> Zähler für Aktualisierungen, die erst nach Auslieferung des alten
+        # Stands eintrafen; Teil des Abschnitts-Schlüssels, damit nur betroffene Sessions neu rechnen
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    # --- Dateizugriff ---
+    def _path(self, symbol, interval):
+        safe_symbol = "".join(c if c.isalnum() or c in "-._" else "_" for c in symbol)
+        return os.path.join(self.root, f"{safe_symbol}__{interval}.parquet")
+
+    def _read(self, symbol, interval):
+        path = self._path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            # Beschädigte Datei ignorieren, wird beim nächsten Schreiben ersetzt
+            return None
+
+    def _load(self, symbol, interval):
+        """(Panel-Sicht oder None, eigener Bestand) von der Platte.
+
+        Die Panel-Sicht bleibt ohne Kopie die Basis; privat gehalten wird nur, was eine neuere
+        Parquet-Datei über das Panel hinaus enthält. Beginnt die Datei vor dem Panel (nachgeladener
+        Anfang), gilt allein die Datei.
+        """
+        panel = self.panels.get(interval) if self.panels else None
+        base = panel.frame(symbol) if panel is not None and symbol in panel else None
+        if base is None or base.empty:
+            return None, self._read(symbol, interval)
+        try:
+            newer = os.path.getmtime(self._path(symbol, interval)) > panel.built_at
+        except OSError:
+            newer = False
+        stored = self._read(symbol, interval) if newer else None
+        if stored is None or stored.empty:
+            return base, base.iloc[:0]
+        if stored.index[0] < base.index[0]:
+            return None, stored
+        # Ab dem letzten Panel-Bar, da dieser beim Panel-Bau noch in Bildung sein konnte
+        return base, stored.iloc[stored.index.searchsorted(base.index[-1]):]
+
+    def _ensure(self, key):
+        """Eigenen Bestand (unter self._lock) liefern, bei Bedarf mit Panel-Sicht von der Platte laden."""
+        own = self._frames.get(key)
+        if own is None:
+            # Noch nicht geladen oder aus dem LRU verdrängt: Panel und Datei neu abgleichen
+            base, own = self._load(*key)
+            if base is None:
+                self._bases.pop(key, None)
+            else:
+                self._bases[key] = base
+            if own is not None:
+                self._frames[key] = own
+        return own
+
+    def _current(self, key):
+        """Aktueller Bestand (unter self._lock): Panel-Sicht plus eigenes Ende, sonst der eigene Bestand."""
+        own = self._ensure(key)
+        base = self._bases.get(key)
+        if own is None or base is None:
+            return own
+        if own.empty:
+            return base
+        joined = self._joined.get(key)
+        if joined is None or self._joined_tails.get(key) is not own:
+            # Einmal je neuem Ende zusammenführen, im Datentyp des Panels (float32)
+            tail = own.reindex(columns=base.columns).astype(base.dtypes.to_dict())
+            joined = pd.concat([base.iloc[:base.index.searchsorted(own.index[0])], tail])
+            self._joined[key] = joined
+            self._joined_tails[key] = own
+        return joined
+
+    def _write(self, symbol, interval, df):
+        path = self._path(symbol, interval)
+        tmp_path = path + ".tmp"
+        df.to_parquet(tmp_path)
+        os.replace(tmp_path, path)  # atomar ersetzen, damit parallele Leser keine halben Dateien sehen
+
+    # --- Netzwerkzugriff ---
+    def _download(self, symbols, interval, start, fresh=False):
+        # Enden und Live-Takte am geteilten Antwort-Cache vorbei, sonst friert der letzte Bar ein
+        fetch = getattr(self.provider, "history_uncached", self.provider.history) if fresh else self.provider.history
+        frames = fetch(symbols, start, interval)
+        return {symbol: normalize_ohlcv(frames.get(symbol)) for symbol in symbols}
+
+    def _needs_backfill(self, key, df, start):
+        # Bereits einmal ab diesem Start geladen (z. B. Börsengang liegt später): nicht erneut laden
+        covered = self._covered.get(key)
+        if covered is not None and start >= covered:
+            return False
+        # Toleranz für Wochenenden und Feiertage am Anfang des Zeitraums
+        return align_timestamp(start, df.index) < df.index[0] - pd.Timedelta(days=7)
+
+    def _merge(self, key, fetched):
+        """Neue Bars einmischen und speichern (unter self._lock, Bestand über _ensure geladen)."""
+        symbol, interval = key
+        if fetched.empty:
+            return
+        base = self._bases.get(key)
+        if base is not None and fetched.index[0] >= base.index[0]:
+            # Panel bleibt Basis, nur das eigene Ende wächst; die Datei erhält den vollen Stand
+            own = self._frames.get(key)
+            tail = _overlay(own, fetched)
+            if own is not None and tail.equals(own):
+                return   # erneut abgefragter Bar unverändert: Ende und geteilte Kopie bleiben
+            self._frames[key] = tail
+            self._write(symbol, interval, _overlay(base, tail))
+            return
+        merged = _overlay(self._current(key), fetched)
+        self._bases.pop(key, None)
+        self._joined.pop(key, None)
+        self._joined_tails.pop(key, None)
+        self._frames[key] = merged
+        self._write(symbol, interval, merged)
+
+    def _refresh(self, symbols, interval, start):
+        """Hintergrund: fehlende Enden laden und einmischen; bei Fehlschlag bleibt der alte Stand."""
+        try:
+            fetched = self._download(symbols, interval, start, fresh=True)
+            failed = False
+        except Exception:
+            fetched, failed = {}, True
+        now = time.time()
+        with self._lock:
+            for symbol in symbols:
+                key = (symbol, interval)
+                self._refreshing.pop(key, None)
+                # Auch nach einem Fehlschlag erst nach REFRESH_AFTER erneut versuchen
+                self._checked[key] = now
+                df = self._current(key)
+                if symbol not in fetched:
+                    if failed and df is not None and not df.empty:
+                        self._stale[key] = df.index[-1]
+                    continue
+                self._merge(key, fetched[symbol])
+                if self._stale.pop(key, None) is not None:
+                    self._versions[key] = self._versions.get(key, 0) + 1
+
+    def _mark_invalid(self, interval, fetched):
+        # Je Symbol: leer bei einer Quelle, die normal antwortet (Breaker geschlossen, letzter Abruf
+        # erfolgreich), heißt unbekannt, auch wenn der Abruf nur dieses Symbol enthielt
+        if not self.provider.responding("history"):
+            return
+        with self._lock:
+            for symbol, df in fetched.items():
+                if df.empty:
+                    self._invalid[(symbol, interval)] = True
+
+    # --- Öffentliche Schnittstelle ---
+    def history_many(self, symbols, interval="1d", start=None, period=None):
+        """OHLCV-Bars mehrerer Symbole ab `start` (oder für `period`), Fehlendes gebündelt nachladen."""
+        if start is None:
+            start = period_start(period or "1y")
+        start = pd.Timestamp(start)
+        symbols = list(dict.fromkeys(symbols))
+        now = time.time()
+
+        frames = {}
+        full_fetch = []   # Symbole ohne (ausreichenden) Bestand
+        tail_fetch = {}   # Symbol -> Datum des letzten gespeicherten Bars
+        pending = []      # Hintergrund-Aktualisierungen, auf die kurz gewartet wird
+        with self._lock:
+            for symbol in symbols:
+                key = (symbol, interval)
+                if key in self._invalid:
+                    frames[symbol] = None   # bekannt ohne Kursdaten: nicht erneut anfragen
+                    continue
+                df = self._current(key)
+                frames[symbol] = df
+                if df is None or df.empty or self._needs_backfill(key, df, start):
+                    full_fetch.append(symbol)
+                elif key in self._refreshing:
+                    pending.append(self._refreshing[key])
+                elif now - self._checked.get(key, 0) > REFRESH_AFTER.get(interval, 15 * 60):
+                    tail_fetch[symbol] = pd.Timestamp(df.index[-1].date())
+            if tail_fetch:
+                # Kontext mitgeben wie FetchExecutor.submit, damit Messpunkte beim Abschnitt landen
+                context = contextvars.copy_context()
+                future = self._refresh_pool.submit(context.run, self._refresh, list(tail_fetch), interval,
+                                                   min(tail_fetch.values()))
+                for symbol in tail_fetch:
+                    self._refreshing[(symbol, interval)] = future
+                pending.append(future)
+
+        # Fehlender Bestand muss geladen werden (eine Multi-Ticker-Anfrage); Enden nur kurz abwarten
+        fetched = {}
+        full_error = None
+        if full_fetch:
+            try:
+                fetched = self._download(full_fetch, interval, start)
+            except Exception as e:
+                full_error = e
+            else:
+                self._mark_invalid(interval, {symbol: fetched[symbol] for symbol in full_fetch
+                                              if frames[symbol] is None or frames[symbol].empty})
+        if pending:
+            wait(set(pending), timeout=STALE_WAIT_SECONDS)
+
+        result = {}
+        with self._lock:
+            for symbol in symbols:
+                key = (symbol, interval)
+                if symbol in fetched:
+                    self._ensure(key)
+                    self._merge(key, fetched[symbol])
+                    self._checked[key] = now
+                    self._stale.pop(key, None)
+                    if symbol in full_fetch:
+                        self._covered[key] = start
+                # Hintergrund-Aktualisierung ggf. schon eingemischt
+                df = self._current(key)
+                if symbol not in fetched:
+                    future = self._refreshing.get(key)
+                    if future is not None and not future.done() and df is not None and not df.empty:
+                        self._stale[key] = df.index[-1]
+                if df is None:
+                    df = pd.DataFrame(columns=OHLCV_COLUMNS)
+                    self._frames[key] = df
+                # Positions-Slice statt Maske: Sicht auf den gemeinsamen Bestand, keine Kopie je Session
+                result[symbol] = df if df.empty else df.iloc[df.index.searchsorted(align_timestamp(start, df.index)):]
+
+        if full_error is not None and all(df.empty for df in result.values()):
+            raise full_error
+        return result
+
+    def versions(self, symbols, interval="1d"):
+        """Stand der nachgereichten Aktualisierungen je Symbol (für Cache-Schlüssel der Abschnitte)."""
+        with self._lock:
+            return tuple(self._versions.get((symbol, interval), 0) for symbol in symbols)
+
+    def stale_since(self, symbol, interval="1d"):
+        """Letzter Bar, falls der gelieferte Stand veraltet ist (Aktualisierung läuft oder schlug fehl)."""
+        with self._lock:
+            return self._stale.get((symbol, interval))
+
+    def refresh_tail(self, symbol, interval):
+        """Nur Bars ab dem letzten gespeicherten abfragen (Live-Modus) und einmischen.
+
+        Der letzte Bar wird mit angefragt, weil er noch in Bildung sein kann. Liefert den
+        Zeitstempel des ersten geänderten Bars, None ohne Bestand, ohne neue Daten oder bei
+        gestörter Quelle (dann bleibt der bekannte Stand, markiert über stale_since()).
+        """
+        key = (symbol, interval)
+        with self._lock:
+            df = self._current(key)
+        if df is None or df.empty:
+            return None
+
+        last = df.index[-1]
+        try:
+            fetched = self._download([symbol], interval, last, fresh=True)[symbol]
+        except Exception:
+            with self._lock:
+                self._stale[key] = last
+            return None
+        if not fetched.empty:
+            fetched = fetched[fetched.index >= align_timestamp(last, fetched.index)]
+        with self._lock:
+            self._ensure(key)
+            self._merge(key, fetched)
+            self._checked[key] = time.time()
+            self._stale.pop(key, None)
+        return None if fetched.empty else fetched.index[0]
+
+    def history(self, symbol, interval="1d", start=None, period=None):
+        """OHLCV-Bars ab `start` (oder für `period`) liefern, fehlendes Ende nachladen."""
+        return self.history_many([symbol], interval, start=start, period=period)[symbol]
+
+
+def close_matrix(histories):
+    """Schlusskurse mehrerer Symbole als ausgerichtete Matrix (Datum x Symbol)."""
+    closes = {symbol: df["Close"] for symbol, df in histories.items() if df is not None and not df.empty}
+    if not closes:
+        return pd.DataFrame()
+    return pd.concat(closes, axis=1, join="outer").sort_index()
@@ -0,0 +1,321 @@
+import os
+import json
+import time
+import random
+import threading
+
+import pandas as pd
+
+from instrumentation import InstrumentedProvider
+from shared_cache import SharedCache
+
+# --- Marktdaten-Provider ---
+# Einheitliche Schnittstelle für Kurshistorie sowie Metadaten/Fundamentaldaten (Ticker.info).
+# Neben yfinance gibt es einen Aufnahme-Provider, der echte Antworten als Parquet/JSON
+# ablegt, und einen Replay-Provider, der sie offline mit simulierter Latenz wieder ausliefert.
+#
+#   AKTIEN_PROVIDER=yfinance   (Standard) live von Yahoo
+#   AKTIEN_PROVIDER=record     live von Yahoo und Antworten nach AKTIEN_RECORDINGS schreiben
+#   AKTIEN_PROVIDER=replay     nur aus AKTIEN_RECORDINGS, Latenz über AKTIEN_REPLAY_LATENCY
+#                              ("0.3" = 300 ms, "0.3,0.1" = 300 ms +/- 100 ms)
+#
+# Für reproduzierbare Kaltstart-Messungen AKTIEN_PRICE_STORE und AKTIEN_META_CACHE auf leere
+# Verzeichnisse zeigen lassen, sonst bedienen die lokalen Caches die Anfragen.
+
+RECORDINGS_DIR = os.environ.get(
+    "AKTIEN_RECORDINGS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "recordings")
+)
+
+# Circuit Breaker je Quelle (Provider und Endpunkt): nach BREAKER_FAILURES Fehlern in Folge
+# wird BREAKER_COOLDOWN Sekunden lang sofort abgelehnt; Aufrufe über BREAKER_SLOW Sekunden
+# zählen als Fehler, auch wenn sie ein Ergebnis liefern.
+BREAKER_FAILURES = int(os.environ.get("AKTIEN_BREAKER_FAILURES", 3))
+BREAKER_COOLDOWN = float(os.environ.get("AKTIEN_BREAKER_COOLDOWN", 60))
+BREAKER_SLOW = float(os.environ.get("AKTIEN_BREAKER_SLOW", 15))
+
+
+class SourceUnavailable(RuntimeError):
+    """Quelle gilt als gestört (Circuit Breaker offen); wird nicht wiederholt."""
+
+
+def _safe_name(symbol):
+    return "".join(c if c.isalnum() or c in "-._" else "_" for c in symbol)
+
+
+class MarketDataProvider:
+    """Basisklasse; Implementierungen liefern normalisierte OHLCV-Frames und info-Dicts."""
+
+    name = "basis"
+
+    def history(self, symbols, start, interval="1d"):
+        """Dict Symbol -> OHLCV-DataFrame ab `start` (leer, wenn keine Daten)."""
+        raise NotImplementedError
+
+    def info(self, symbol):
+        """Metadaten und Fundamentaldaten eines Symbols (Felder wie in Ticker.info)."""
+        raise NotImplementedError
+
+    def responding(self, endpoint="history"):
+        """Ob die Quelle für `endpoint` zuletzt normal geantwortet hat (ohne Breaker: immer)."""
+        return True
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = "yfinance"
+
+    def history(self, symbols, start, interval="1d"):
+        from fetching import download_batch
+        from price_store import normalize_ohlcv
+        frames = download_batch(symbols, start, interval=interval)
+        return {symbol: normalize_ohlcv(df) for symbol, df in frames.items()}
+
+    def info(self, symbol):
+        import yfinance as yf
+        return yf.Ticker(symbol).info or {}
+
+
+class RecordingProvider(MarketDataProvider):
+    """Reicht Anfragen an `inner` durch und speichert jede Antwort unter `root`."""
+
+    name = "record"
+
+    def __init__(self, inner, root=RECORDINGS_DIR):
+        self.inner = inner
+        self.root = root
+        os.makedirs(os.path.join(root, "history"), exist_ok=True)
+        os.makedirs(os.path.join(root, "info"), exist_ok=True)
+        self._lock = threading.Lock()
+
+    def history(self, symbols, start, interval="1d"):
+        frames = self.inner.history(symbols, start, interval)
+        with self._lock:
+            for symbol, df in frames.items():
+                if df.empty:
+                    continue
+                path = os.path.join(self.root, "history", f"{_safe_name(symbol)}__{interval}.parquet")
+                if os.path.exists(path):
+                    # Mit früheren Aufnahmen zusammenführen, neuere Bars gewinnen
+                    df = pd.concat([pd.read_parquet(path), df])
+                    df = df[~df.index.duplicated(keep="last")].sort_index()
+                df.to_parquet(path)
+        return frames
+
+    def info(self, symbol):
+        info = self.inner.info(symbol)
+        path = os.path.join(self.root, "info", f"{_safe_name(symbol)}.json")
+        with self._lock, open(path, "w", encoding="utf-8") as f:
+            json.dump(info, f, default=str)
+        return info
+
+
+class ReplayProvider(MarketDataProvider):
+    """Liefert aufgenommene Antworten ohne Netz, mit reproduzierbarer simulierter Latenz."""
+
+    name = "replay"
+
+    def __init__(self, root=RECORDINGS_DIR, latency=0.0, jitter=0.0, seed=0):
+        self.root = root
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _sleep(self):
+        if self.latency <= 0 and self.jitter <= 0:
+            return
+        with self._lock:
+            delay = max(self.latency + self._random.uniform(-self.jitter, self.jitter), 0.0)
+        time.sleep(delay)
+
+    def history(self, symbols, start, interval="1d"):
+        from price_store import align_timestamp
+        self._sleep()  # eine Multi-Ticker-Anfrage = eine Latenz
+        frames = {}
+        for symbol in symbols:
+            path = os.path.join(self.root, "history", f"{_safe_name(symbol)}__{interval}.parquet")
+            if not os.path.exists(path):
+                frames[symbol] = pd.DataFrame()
+                continue
+            df = pd.read_parquet(path)
+            frames[symbol] = df[df.index >= align_timestamp(start, df.index)] if not df.empty else df
+        return frames
+
+    def info(self, symbol):
+        self._sleep()
+        path = os.path.join(self.root, "info", f"{_safe_name(symbol)}.json")
+        if not os.path.exists(path):
+            raise KeyError(f"Keine Aufnahme für {symbol} in {self.root}")
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+class SharedProvider(MarketDataProvider):
+    """Prozessweit geteilte Antworten: gleiche Anfragen mehrerer Sessions laufen nur einmal.
+
+    Ergebnisse werden von allen Aufrufern gemeinsam genutzt und dürfen nicht verändert werden.
+    """
+
+    def __init__(self, inner, cache=None):
+        self.inner = inner
+        self.name = inner.name
+        self.cache = cache or SharedCache()
+
+    def history(self, symbols, start, interval="1d"):
+        key = ("history", tuple(symbols), str(pd.Timestamp(start)), interval)
+        return self.cache.get_or_load(key, lambda: self.inner.history(symbols, start, interval))
+
+    def history_uncached(self, symbols, start, interval="1d"):
+        """Wie history, aber ohne gemerkte Antwort: für Enden und Live-Takte, deren letzter Bar
+        sich noch ändert. Gleichzeitige gleiche Anfragen laufen trotzdem nur einmal."""
+        key = ("history", tuple(symbols), str(pd.Timestamp(start)), interval)
+        return self.cache.coalesce(key, lambda: self.inner.history(symbols, start, interval))
+
+    def info(self, symbol):
+        return self.cache.get_or_load(("info", symbol), lambda: self.inner.info(symbol))
+
+    def responding(self, endpoint="history"):
+        return self.inner.responding(endpoint)
+
+
+class CircuitBreaker:
+    """Geschlossen -> offen nach `failures` Fehlern in Folge -> nach `cooldown` ein Probeaufruf."""
+
+    def __init__(self, name, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN, slow=BREAKER_SLOW):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self.slow = slow
+        self._consecutive = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "geschlossen"
+            return "halboffen" if time.monotonic() - self._opened_at >= self.cooldown else "offen"
+
+    @property
+    def healthy(self):
+        """Geschlossen und der letzte bewertete Aufruf war erfolgreich."""
+        with self._lock:
+            return self._opened_at is None and self._consecutive == 0
+
+    def _admit(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.cooldown - (time.monotonic() - self._opened_at)
+            if remaining > 0 or self._probing:
+                raise SourceUnavailable(
+                    f"{self.name} vorübergehend nicht erreichbar (neuer Versuch in {max(remaining, 1):.0f} s)"
+                )
+            self._probing = True   # genau ein Probeaufruf, alle anderen lehnen weiter ab
+
+    def _record(self, ok):
+        with self._lock:
+            self._probing = False
+            if ok:
+                self._consecutive = 0
+                self._opened_at = None
+                return
+            self._consecutive += 1
+            if self._opened_at is not None or self._consecutive >= self.failures:
+                self._opened_at = time.monotonic()
+
+    def call(self, fn, *args, judge=None):
+        """`fn(*args)` über den Breaker; `judge(result)` -> True/False/None (None = ohne Aussage)."""
+        self._admit()
+        started = time.monotonic()
+        try:
+            result = fn(*args)
+        except LookupError:
+            # Unbekanntes Symbol ist kein Ausfall der Quelle
+            self._record(True)
+            raise
+        except Exception:
+            self._record(False)
+            raise
+        verdict = judge(result) if judge else True
+        if time.monotonic() - started > self.slow:
+            verdict = False
+        if verdict is None:
+            with self._lock:
+                self._probing = False
+        else:
+            self._record(verdict)
+        return result
+
+
+class GuardedProvider(MarketDataProvider):
+    """Circuit Breaker je Endpunkt vor einem Provider: bei Störung sofort ablehnen statt warten."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.name = inner.name
+        self.breakers = {
+            "history": CircuitBreaker(f"{inner.name}/history"),
+            "info": CircuitBreaker(f"{inner.name}/info"),
+        }
+        self._known = set()   # Symbole, für die die Quelle schon Kurse geliefert hat
+        self._lock = threading.Lock()
+
+    def _history_verdict(self, symbols, frames):
+        # yf.download meldet Störungen nicht als Exception, sondern mit leeren Frames. Ganz leer
+        # zählt nur als Fehler, wenn ein Symbol dabei ist, das schon Daten hatte; sonst können es
+        # auch lauter Tippfehler sein (ohne Aussage).
+        delivered = [symbol for symbol, df in frames.items() if df is not None and not df.empty]
+        with self._lock:
+            if delivered:
+                self._known.update(delivered)
+                return True
+            return False if any(symbol in self._known for symbol in symbols) else None
+
+    def history(self, symbols, start, interval="1d"):
+        return self.breakers["history"].call(
+            self.inner.history, symbols, start, interval, judge=lambda frames: self._history_verdict(symbols, frames)
+        )
+
+    def info(self, symbol):
+        return self.breakers["info"].call(self.inner.info, symbol, judge=lambda info: True if info else None)
+
+    def responding(self, endpoint="history"):
+        return self.breakers[endpoint].healthy
+
+
+def _parse_latency(value):
+    parts = [float(part) for part in value.split(",") if part.strip()] if value else []
+    return (parts + [0.0, 0.0])[:2]
+
+
+def create_provider(kind=None):
+    """Provider gemäß `kind` bzw. AKTIEN_PROVIDER erzeugen."""
+    kind = (kind or os.environ.get("AKTIEN_PROVIDER", "yfinance")).lower()
+    if kind == "yfinance":
+        return YFinanceProvider()
+    if kind == "record":
+        return RecordingProvider(YFinanceProvider())
+    if kind == "replay":
+        latency, jitter = _parse_latency(os.environ.get("AKTIEN_REPLAY_LATENCY", ""))
+        return ReplayProvider(latency=latency, jitter=jitter)
+    raise ValueError(f"Unbekannter Provider: {kind}")
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """Prozessweiter Standard-Provider (geteilt über Sessions, mit Messpunkten für Aufrufe und Bytes).
+
+    Gemessen werden nur echte Abrufe; wer auf einen laufenden Abruf wartet, löst keinen aus.
+    Bei offenem Circuit Breaker wird gar nicht erst abgerufen (SourceUnavailable).
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = SharedProvider(GuardedProvider(InstrumentedProvider(create_provider())))
+        return _provider
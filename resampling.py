@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from trading_calendar import EXCHANGE_SESSIONS, EXCHANGE_TIMEZONES
+
+# --- Abgeleitete Intervalle ---
+# Wochen- und Monatsbars entstehen aus Tagesbars, Stundenbars aus 15-Minuten-Bars. Ein
+# Intervallwechsel braucht so keinen eigenen Abruf, und alle Intervalle zeigen dieselben Kurse.
+# Zusammengefasst wird in lokaler Börsenzeit: Wochen beginnen montags, Monate am Ersten,
+# Stunden ab Handelsbeginn (NYSE 9:30, 10:30, ..., 15:30; Xetra 9:00, ..., 17:00), Bars
+# außerhalb der Handelszeit fallen weg. Labels wie bei Yahoo: Beginn des Zeitraums.
+
+DERIVED_INTERVALS = {
+    "1h": "15m",
+    "1wk": "1d",
+    "1mo": "1d",
+}
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def base_interval(interval):
+    """Intervall, das tatsächlich gespeichert und abgerufen wird."""
+    return DERIVED_INTERVALS.get(interval, interval)
+
+
+def _local_index(index, exchange):
+    tz = EXCHANGE_TIMEZONES[exchange]
+    return index.tz_localize(tz) if index.tz is None else index.tz_convert(tz)
+
+
+def bucket_starts(index, interval, exchange):
+    """Beginn des Ziel-Bars je Quell-Bar (naive lokale Börsenzeit) und Maske der verwendeten Bars."""
+    local = _local_index(index, exchange).tz_localize(None)
+    days = local.normalize()
+    if interval == "1wk":
+        return days - pd.to_timedelta(days.weekday, unit="D"), np.ones(len(index), dtype=bool)
+    if interval == "1mo":
+        return days - pd.to_timedelta(days.day - 1, unit="D"), np.ones(len(index), dtype=bool)
+    if interval == "1h":
+        session_open, session_close = EXCHANGE_SESSIONS[exchange]
+        opens = days + pd.Timedelta(hours=session_open.hour, minutes=session_open.minute)
+        length = pd.Timedelta(hours=session_close.hour - session_open.hour,
+                              minutes=session_close.minute - session_open.minute)
+        offset = local - opens
+        inside = np.asarray((offset >= pd.Timedelta(0)) & (offset < length))
+        return opens + offset.floor("h"), inside
+    raise ValueError(f"Intervall {interval} lässt sich nicht ableiten")
+
+
+def resample_ohlcv(df, interval, exchange):
+    """OHLCV-Bars (sortiert) auf `interval` zusammenfassen; Zeitzone des Eingangs bleibt erhalten."""
+    if df is None or df.empty:
+        return df
+    df = df[df["Close"].notna()] if "Close" in df.columns else df
+    starts, inside = bucket_starts(df.index, interval, exchange)
+    keys = starts.as_unit("ns").asi8[inside]
+    values = df.reindex(columns=OHLCV_COLUMNS).to_numpy(dtype=float)[inside]
+    if not len(keys):
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    # Gruppen sind zusammenhängende Zeilenbereiche, da der Index sortiert ist
+    first = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]]))
+    last = np.concatenate([first[1:], [len(keys)]]) - 1
+    aggregated = np.column_stack([
+        values[first, 0],
+        np.fmax.reduceat(values[:, 1], first),
+        np.fmin.reduceat(values[:, 2], first),
+        values[last, 3],
+        np.add.reduceat(np.nan_to_num(values[:, 4]), first),
+    ])
+
+    index = pd.DatetimeIndex(keys[first].view("datetime64[ns]"))
+    if df.index.tz is not None:
+        index = index.tz_localize(EXCHANGE_TIMEZONES[exchange]).tz_convert(df.index.tz)
+    return pd.DataFrame(aggregated, index=index, columns=OHLCV_COLUMNS)
@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+from price_store import align_timestamp
+
+# --- Risiko-Engine ---
+# Volatilität, Sharpe Ratio und Max. Drawdown für alle Symbole und alle Zeitfenster auf
+# einer gemeinsamen Renditematrix (Datum x Symbol). Fensteranfänge per searchsorted,
+# Mittelwert und Streuung über Präfixsummen statt Kopie und Neuberechnung je Fenster.
+
+TRADING_DAYS = 252
+RISK_METRICS = ["Volatilität", "Sharpe Ratio", "Max. Drawdown"]
+
+
+def returns_matrix(prices):
+    """Tagesrenditen; Lücken (z. B. Feiertage anderer Börsen) bleiben NaN und zählen nicht mit."""
+    values = prices.to_numpy(dtype=float)
+    filled = prices.ffill().to_numpy(dtype=float)
+    returns = np.full_like(filled, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = filled[1:] / filled[:-1] - 1
+    returns[np.isnan(values)] = np.nan
+    return returns, filled
+
+
+def _prefix_sums(values):
+    # Nullzeile voranstellen, damit Summe(j..n) = P[n] - P[j]
+    return np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+
+
+def compute_risk(prices, windows, trading_days=TRADING_DAYS):
+    """Risikokennzahlen als Tabelle mit einer Zeile pro (Symbol, Zeitraum)."""
+    columns = ["Symbol", "Zeitraum", "Volatilität (%)", "Sharpe Ratio", "Max. Drawdown (%)"]
+    if prices.empty:
+        return pd.DataFrame(columns=columns)
+
+    prices = prices.sort_index()
+    returns, filled = returns_matrix(prices)
+    valid = ~np.isnan(returns)
+
+    # Vor dem Aufsummieren zentrieren, damit die Varianz aus Präfixsummen numerisch stabil bleibt
+    counts_total = valid.sum(axis=0)
+    center = np.where(counts_total > 0, np.where(valid, returns, 0.0).sum(axis=0) / np.maximum(counts_total, 1), 0.0)
+    centered = np.where(valid, returns - center, 0.0)
+
+    sum_r = _prefix_sums(centered)
+    sum_r2 = _prefix_sums(centered ** 2)
+    count = _prefix_sums(valid.astype(float))
+    n = len(prices)
+    annualize = np.sqrt(trading_days)
+
+    frames = []
+    for label, start in windows.items():
+        # Erster Bar ab Fensterbeginn; die erste Rendite im Fenster ist die des Folgetags
+        first = prices.index.searchsorted(align_timestamp(start, prices.index), side="left")
+        j = min(first + 1, n)
+
+        cnt = count[n] - count[j]
+        s = sum_r[n] - sum_r[j]
+        q = sum_r2[n] - sum_r2[j]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = s / cnt
+            std = np.sqrt(np.maximum((q - s * mean) / (cnt - 1), 0.0))
+            volatility = std * annualize
+            sharpe = np.where(std > 0, (mean + center) / std * annualize, 0.0)
+
+            # Drawdown gegen das laufende Hoch innerhalb des Fensters
+            window_prices = filled[j:]
+            if len(window_prices):
+                peak = np.fmax.accumulate(window_prices, axis=0)
+                drawdown = window_prices / peak - 1
+                max_drawdown = np.where(np.isnan(drawdown), np.inf, drawdown).min(axis=0)
+                max_drawdown = np.where(np.isinf(max_drawdown), np.nan, max_drawdown)
+            else:
+                max_drawdown = np.full(prices.shape[1], np.nan)
+
+        enough = cnt >= 2
+        frames.append(pd.DataFrame({
+            "Symbol": prices.columns,
+            "Zeitraum": label,
+            "Volatilität (%)": np.where(enough, np.round(volatility * 100, 2), np.nan),
+            "Sharpe Ratio": np.where(enough, np.round(sharpe, 2), np.nan),
+            "Max. Drawdown (%)": np.where(enough, np.round(max_drawdown * 100, 2), np.nan),
+        }))
+
+    return pd.concat(frames, ignore_index=True)[columns]
+
+
+def risk_display_frame(risk_table, windows):
+    """Tabelle in die Anzeigeform bringen: Zeilen Kennzahl je Zeitraum, Spalten Symbole."""
+    if risk_table.empty:
+        return pd.DataFrame()
+    value_columns = {
+        "Volatilität": ("Volatilität (%)", "Volatilität {label} (%)"),
+        "Sharpe Ratio": ("Sharpe Ratio", "Sharpe Ratio {label}"),
+        "Max. Drawdown": ("Max. Drawdown (%)", "Max. Drawdown {label} (%)"),
+    }
+    symbols = list(dict.fromkeys(risk_table["Symbol"]))
+    by_window = risk_table.set_index(["Zeitraum", "Symbol"])
+    rows = {}
+    for metric in RISK_METRICS:
+        column, row_label = value_columns[metric]
+        for label in windows:
+            rows[row_label.format(label=label)] = by_window.loc[label, column].reindex(symbols)
+    display = pd.DataFrame(rows).T
+    # NaN als None, damit die Anzeige "N/A" zeigt
+    return display.astype(object).where(display.notna(), None)
+
+
+# --- Rollierende Kennzahlen gegen die Benchmark ---
+# Gleitende Summen über Präfixsummen (ein Durchlauf, O(n) je Symbol unabhängig von der
+# Fensterlänge). Beta und Korrelation nur über Tage, an denen Symbol und Benchmark handeln.
+
+ROLLING_WINDOWS = {
+    "1 Monat": 21,
+    "3 Monate": 63,
+    "6 Monate": 126,
+    "1 Jahr": 252,
+}
+
+
+def _window_diff(prefix, window):
+    # Summe über die letzten `window` Zeilen je Zeile (kürzer am Anfang)
+    n = prefix.shape[0] - 1
+    upper = np.arange(1, n + 1)
+    lower = np.maximum(upper - window, 0)
+    return prefix[upper] - prefix[lower]
+
+
+def rolling_risk(prices, benchmark=None, window=63, trading_days=TRADING_DAYS, min_fraction=0.8):
+    """Rollierende Volatilität (%) je Symbol sowie Beta und Korrelation gegen `benchmark`.
+
+    `prices`: Schlusskurse (Datum x Symbol); `benchmark`: Spalte in `prices` oder None.
+    Liefert ein Dict Kennzahl -> DataFrame (Datum x Symbol), Werte erst ab genügend Daten.
+    """
+    if prices.empty:
+        return {}
+    prices = prices.sort_index()
+    returns, _ = returns_matrix(prices)
+    valid = ~np.isnan(returns)
+    min_periods = max(int(window * min_fraction), 2)
+    symbols = [column for column in prices.columns if column != benchmark]
+    columns = [prices.columns.get_loc(symbol) for symbol in symbols]
+
+    # Zentrieren um den Gesamtmittelwert, damit die Momente aus Präfixsummen stabil bleiben
+    x = returns[:, columns]
+    x_valid = valid[:, columns]
+    x_center = np.nanmean(np.where(x_valid, x, np.nan), axis=0) if x.size else np.zeros(len(columns))
+    x_center = np.nan_to_num(x_center)
+    xc = np.where(x_valid, x - x_center, 0.0)
+
+    count = _window_diff(_prefix_sums(x_valid.astype(float)), window)
+    s = _window_diff(_prefix_sums(xc), window)
+    q = _window_diff(_prefix_sums(xc ** 2), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        volatility = np.sqrt(np.maximum((q - s * s / count) / (count - 1), 0.0)) * np.sqrt(trading_days) * 100
+    volatility[count < min_periods] = np.nan
+    result = {"Volatilität (%)": pd.DataFrame(volatility, index=prices.index, columns=symbols)}
+
+    if benchmark is None or benchmark not in prices.columns:
+        return result
+
+    b = returns[:, prices.columns.get_loc(benchmark)]
+    b_valid = valid[:, prices.columns.get_loc(benchmark)]
+    b_center = np.nanmean(b[b_valid]) if b_valid.any() else 0.0
+    pair = x_valid & b_valid[:, None]
+    xp = np.where(pair, x - x_center, 0.0)
+    bp = np.where(pair, (b - b_center)[:, None], 0.0)
+
+    n_pair = _window_diff(_prefix_sums(pair.astype(float)), window)
+    sx = _window_diff(_prefix_sums(xp), window)
+    sb = _window_diff(_prefix_sums(bp), window)
+    sxx = _window_diff(_prefix_sums(xp ** 2), window)
+    sbb = _window_diff(_prefix_sums(bp ** 2), window)
+    sxb = _window_diff(_prefix_sums(xp * bp), window)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sxb - sx * sb / n_pair
+        var_x = np.maximum(sxx - sx * sx / n_pair, 0.0)
+        var_b = np.maximum(sbb - sb * sb / n_pair, 0.0)
+        beta = np.where(var_b > 0, cov / var_b, np.nan)
+        correlation = np.where((var_x > 0) & (var_b > 0), cov / np.sqrt(var_x * var_b), np.nan)
+    enough = n_pair >= min_periods
+    result["Beta"] = pd.DataFrame(np.where(enough, beta, np.nan), index=prices.index, columns=symbols)
+    result["Korrelation"] = pd.DataFrame(np.where(enough, np.clip(correlation, -1, 1), np.nan), index=prices.index, columns=symbols)
+    return result
+
+
+def correlation_matrix(prices, min_periods=20):
+    """Korrelation der Tagesrenditen aller Spalten (paarweise über gemeinsame Handelstage)."""
+    if prices.empty:
+        return pd.DataFrame()
+    returns, _ = returns_matrix(prices.sort_index())
+    return pd.DataFrame(returns, columns=prices.columns).corr(min_periods=min_periods)
@@ -0,0 +1,112 @@
+import os
+import ast
+import datetime
+
+import pandas as pd
+
+from price_store import period_start, close_matrix
+from performance import compute_performance
+from risk import compute_risk
+
+# --- Screener ---
+# Performance, Risiko und Fundamentaldaten für ein ganzes Universum in einer Tabelle
+# (eine Zeile pro Symbol). Kurse kommen gebündelt aus dem PriceStore, Ticker.info
+# parallel aus dem MetaCache, die Kennzahlen vektorisiert aus den Engines.
+
+# Namen der eingebauten Aktienlisten in main.py
+UNIVERSE_LISTS = ["us_stocks", "dax_stocks"]
+
+SCREENER_RISK_WINDOWS = {
+    "1 Jahr": lambda today: today - datetime.timedelta(days=365),
+    "3 Jahre": lambda today: today - datetime.timedelta(days=3 * 365),
+}
+
+
+def universe_from_lists(*stock_lists):
+    """Symbol -> Name aus den eingebauten Aktienlisten."""
+    return {stock["symbol"]: name for stock_list in stock_lists for name, stock in stock_list.items()}
+
+
+def universe_from_main(path=None):
+    """Symbol -> Name aus us_stocks/dax_stocks in main.py, ohne Streamlit zu importieren (für CLI-Jobs)."""
+    path = path or os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    stock_lists = [
+        ast.literal_eval(node.value) for node in tree.body
+        if isinstance(node, ast.Assign) and any(getattr(target, "id", None) in UNIVERSE_LISTS for target in node.targets)
+    ]
+    return universe_from_lists(*stock_lists)
+
+
+def parse_symbol_list(text):
+    """Symbole aus Freitext (Komma, Semikolon, Leerzeichen oder Zeilenumbruch getrennt)."""
+    for separator in [";", "\n", "\t", " "]:
+        text = text.replace(separator, ",")
+    return list(dict.fromkeys(sym.strip().upper() for sym in text.split(",") if sym.strip()))
+
+
+def _fundamentals_row(info):
+    market_cap = info.get("marketCap")
+    dividend_yield = info.get("dividendYield")
+    roe = info.get("returnOnEquity")
+    return {
+        "Sektor": info.get("sector"),
+        "Branche": info.get("industry"),
+        "Marktkap. [Mrd $]": round(market_cap / 1e9, 2) if market_cap else None,
+        "KGV (PE)": round(info["trailingPE"], 2) if isinstance(info.get("trailingPE"), (int, float)) else None,
+        "Div.-Rendite [%]": round(dividend_yield * 100, 2) if dividend_yield else None,
+        "Beta": round(info["beta"], 2) if isinstance(info.get("beta"), (int, float)) else None,
+        "Eigenkapitalrendite (ROE) [%]": round(roe * 100, 2) if roe is not None else None,
+        "Analysten-Rating": info.get("recommendationKey"),
+    }
+
+
+def build_screener_table(universe, price_store, meta_cache=None, today=None):
+    """Screener-Tabelle für `universe` (Symbol -> Name), eine Zeile pro Symbol."""
+    today = today or datetime.date.today()
+    symbols = list(universe)
+    histories = price_store.history_many(symbols, "1d", start=period_start("5y", today) - datetime.timedelta(days=7))
+    prices = close_matrix(histories)
+
+    table = pd.DataFrame(index=pd.Index(symbols, name="Symbol"))
+    table["Name"] = [universe[symbol] for symbol in symbols]
+
+    if not prices.empty:
+        table = table.join(compute_performance(prices))
+
+        windows = {label: start(today) for label, start in SCREENER_RISK_WINDOWS.items()}
+        risk = compute_risk(prices, windows)
+        risk_wide = risk.pivot(index="Symbol", columns="Zeitraum")
+        risk_wide.columns = [f"{metric.replace(' (%)', '')} {label}{' (%)' if '(%)' in metric else ''}"
+                             for metric, label in risk_wide.columns]
+        table = table.join(risk_wide)
+
+    if meta_cache is not None:
+        infos = meta_cache.info_many(symbols)
+        fundamentals = pd.DataFrame.from_dict(
+            {symbol: _fundamentals_row(info) for symbol, info in infos.items() if isinstance(info, dict)},
+            orient="index"
+        )
+        if not fundamentals.empty:
+            table = table.join(fundamentals)
+            # Für manuelle Symbole den Namen aus Ticker.info übernehmen
+            for symbol, info in infos.items():
+                if isinstance(info, dict) and table.at[symbol, "Name"] == symbol:
+                    table.at[symbol, "Name"] = info.get("longName") or info.get("shortName") or symbol
+
+    return table
+
+
+def filter_screener_table(table, text="", sectors=None, min_market_cap=None):
+    """Filter ohne Neuberechnung: Freitext auf Symbol/Name, Sektor, Mindest-Marktkapitalisierung."""
+    mask = pd.Series(True, index=table.index)
+    if text:
+        needle = text.strip().lower()
+        mask &= table.index.str.lower().str.contains(needle, regex=False) | \
+            table["Name"].astype(str).str.lower().str.contains(needle, regex=False)
+    if sectors and "Sektor" in table.columns:
+        mask &= table["Sektor"].isin(sectors)
+    if min_market_cap and "Marktkap. [Mrd $]" in table.columns:
+        mask &= table["Marktkap. [Mrd $]"].fillna(0) >= min_market_cap
+    return table[mask]
@@ -0,0 +1,308 @@
+import datetime
+from collections import namedtuple
+
+import pandas as pd
+
+from price_store import period_start, align_timestamp, close_matrix
+from performance import compute_performance
+from risk import compute_risk, risk_display_frame, rolling_risk, correlation_matrix
+from indicators import IndicatorEngine, indicator_frame
+from resampling import base_interval, resample_ohlcv
+from trading_calendar import exchange_for_symbol
+
+# --- Rechenkern der Seite ---
+# Jeder Abschnitt ist eine reine Funktion seiner Eingaben und liefert Daten plus Meldungen
+# (Stufe, Text); angezeigt wird erst in main.py. So kann der SectionGraph Ergebnisse merken.
+
+SectionResult = namedtuple("SectionResult", ["data", "messages"])
+
+# Risikoanalyse: Zeitfenster in Kalendertagen
+RISK_WINDOW_DAYS = {
+    "1 Monat": 30,
+    "6 Monate": 182,
+    "1 Jahr": 365,
+    "3 Jahre": 3 * 365,
+    "5 Jahre": 5 * 365,
+}
+
+
+def history_start(today):
+    # 5 Jahre plus Puffer für den 5-Jahres-Anker der Performance
+    return period_start("5y", today) - datetime.timedelta(days=7)
+
+
+def risk_windows(today):
+    return {label: today - datetime.timedelta(days=days) for label, days in RISK_WINDOW_DAYS.items()}
+
+
+# --- Kursdaten ---
+def load_histories(price_store, symbols, benchmark_symbol, today, epoch):
+    """Tagesdaten aller Symbole und der Benchmark (eine Multi-Ticker-Anfrage).
+
+    `epoch` wechselt im Aktualisierungstakt und sorgt dafür, dass neue Bars geholt werden;
+    in main.py gehört auch PriceStore.versions() der Symbole dazu, damit nachgereichte Bars ankommen.
+    """
+    messages = []
+    try:
+        histories = price_store.history_many(
+            list(symbols) + ([benchmark_symbol] if benchmark_symbol else []), "1d", start=history_start(today)
+        )
+    except Exception as e:
+        return SectionResult({}, [("error", f"Fehler beim Laden der Kursdaten: {e}")])
+
+    for symbol in symbols:
+        if symbol in histories and histories[symbol].empty:
+            messages.append(("error", f"Fehler beim Laden von {symbol}: keine Kursdaten erhalten"))
+    if benchmark_symbol and benchmark_symbol in histories and histories[benchmark_symbol].empty:
+        messages.append(("warning", f"Benchmark konnte nicht geladen werden: keine Kursdaten für {benchmark_symbol}"))
+    stale = {symbol: price_store.stale_since(symbol, "1d") for symbol in histories}
+    stale = {symbol: last for symbol, last in stale.items() if last is not None}
+    if stale:
+        listing = ", ".join(f"{symbol} ({last:%d.%m.%Y})" for symbol, last in stale.items())
+        messages.append(("info", f"Kursdaten evtl. nicht aktuell, Stand letzter Bar: {listing}. Aktualisierung läuft im Hintergrund."))
+    return SectionResult(histories, messages)
+
+
+# --- Kursvergleich ---
+def comparison_frame(histories, symbols, benchmark_symbol, period, today):
+    """Indexierte Kurse (Start = 100) aller Symbole und der Benchmark, inner gejoint."""
+    comparison_start = period_start(period, today)
+    all_data = {}
+    for symbol in list(symbols) + ([benchmark_symbol] if benchmark_symbol else []):
+        hist = histories.data.get(symbol)
+        if hist is None or hist.empty:
+            continue
+        column = "Benchmark" if symbol == benchmark_symbol else symbol
+        df = hist.loc[hist.index >= align_timestamp(comparison_start, hist.index), ["Close"]]
+        df = df.pct_change().add(1).cumprod().multiply(100)
+        df.rename(columns={"Close": column}, inplace=True)
+        all_data[column] = df
+
+    if not all_data:
+        return SectionResult(None, [])
+    return SectionResult(pd.concat(all_data.values(), axis=1, join='inner'), [])
+
+
+# --- Unternehmensdaten ---
+# Formatregeln für tables.render_table: (Teilstring des Zeilennamens, Art)
+COMPANY_INFO_FORMATS = [("Marktkap.", "billions"), ("Div.-Rendite", "ratio")]
+
+
+def _stale_info_note(meta_cache, symbols):
+    # Hinweis auf Ticker.info-Einträge, die nach Ablauf der TTL noch geliefert werden
+    stale = {symbol: meta_cache.stale_since(symbol) for symbol in symbols}
+    listing = ", ".join(
+        f"{symbol} ({datetime.datetime.fromtimestamp(fetched):%d.%m.%Y})"
+        for symbol, fetched in stale.items() if fetched is not None
+    )
+    if not listing:
+        return []
+    return [("caption", f"Unternehmensdaten evtl. nicht aktuell, Stand: {listing}. Aktualisierung läuft im Hintergrund.")]
+
+
+def company_info_frame(meta_cache, symbols, meta_info, day, epoch=None):
+    # Ticker.info aller Symbole parallel vorladen; danach nur noch Cache-Treffer.
+    # `epoch` (MetaCache.versions()) wechselt, sobald eine Hintergrund-Aktualisierung ankommt
+    meta_cache.info_many(symbols)
+    rows = []
+    messages = []
+    for symbol in symbols:
+        try:
+            info = meta_cache.info(symbol)
+            meta = meta_info.get(symbol, {})
+            rows.append({
+                "Symbol": symbol,
+                "Name": meta.get("name", info.get("longName", "N/A")),
+                "ISIN": meta.get("isin", ""),
+                "WKN": meta.get("wkn", ""),
+                "Branche": info.get("industry", "N/A"),
+                "Sektor": info.get("sector", "N/A"),
+                "Marktkap. [Mrd $]": round(info.get("marketCap", 0) / 1e9, 2),
+                "Div.-Rendite [%]": round(info.get("dividendYield", 0) * 100, 2) if info.get("dividendYield") else 0.0 # Multipliziere mit 100 für %
+            })
+        except Exception as e:
+            messages.append(("warning", f"Daten für {symbol} konnten nicht geladen werden: {e}"))
+
+    messages += _stale_info_note(meta_cache, [row["Symbol"] for row in rows])
+    if not rows:
+        return SectionResult(None, messages)
+    return SectionResult(pd.DataFrame(rows).set_index("Symbol").transpose(), messages)
+
+
+# --- Fundamentaldaten ---
+FUNDAMENTALS_FORMATS = [
+    ("Analysten-Rating", "badge"),
+    ("[Mrd $]", "billions"),
+    ("Mitarbeiter", "integer"),
+    ("[%]", "ratio"),
+    ("KGV", "ratio"),
+    ("EPS", "ratio"),
+    ("Beta", "ratio"),
+]
+
+
+def fundamentals_row(info):
+    """Kennzahlen eines Symbols aus Ticker.info (eine Spalte der Fundamentaldaten-Tabelle)."""
+    row = {
+        "KGV (PE)": round(info.get("trailingPE", 0), 2),
+        "EPS": round(info.get("trailingEps", 0), 2),
+        "Umsatz [Mrd $]": round(info.get("totalRevenue", 0) / 1e9, 2),
+        "Gewinn [Mrd $]": round(info.get("netIncomeToCommon", 0) / 1e9, 2),
+        "Mitarbeiter": info.get("fullTimeEmployees", "N/A"),
+        "Beta": round(info.get("beta", 0), 2),
+        "Analysten-Rating": f'{info.get("recommendationMean", "N/A")} ({info.get("recommendationKey", "N/A")})'
+    }
+
+    # --- Erweiterung: Dynamische Fundamentaldaten ---
+    roe = info.get("returnOnEquity", None)
+    debt_to_equity = info.get("debtToEquity", None)
+    total_cash = info.get("totalCash", None)
+    total_cash_mrd = round(total_cash / 1e9, 2) if total_cash else None
+    row.update({
+        "Eigenkapitalrendite (ROE) [%]": round(roe * 100, 2) if roe is not None else "n/a", # * 100 für Prozent
+        "Schuldenquote [%]": round(debt_to_equity, 2) if debt_to_equity is not None else "n/a",
+        "Cash-Reserven [Mrd $]": total_cash_mrd if total_cash_mrd is not None else "n/a"
+    })
+    return row
+
+
+def _snapshot_note(snapshot, missing):
+    # Hinweis, welche Symbole nicht aus dem nächtlichen Snapshot kommen
+    if snapshot is None or not missing:
+        return []
+    return [("caption", f"Live berechnet (nicht im Snapshot): {', '.join(missing)}")]
+
+
+def fundamentals_frame(meta_cache, symbols, meta_info, day, snapshot=None, epoch=None):
+    """Basis- und erweiterte Fundamentaldaten, transponiert (Kennzahlen x Symbole).
+
+    Symbole aus dem Snapshot kommen ohne Ticker.info-Abruf; nur fehlende werden live geladen.
+    `epoch` (MetaCache.versions()) wechselt, sobald eine Hintergrund-Aktualisierung ankommt.
+    Das Analysten-Rating bleibt Text; das Badge entsteht erst beim Rendern (tables.py).
+    """
+    stored, missing = snapshot.rows("fundamentals", symbols) if snapshot is not None else (None, list(symbols))
+    rows = {}
+    messages = []
+    for symbol in missing:
+        try:
+            rows[symbol] = fundamentals_row(meta_cache.info(symbol))
+        except Exception as e:
+            messages.append(("warning", f"Fehler beim Abruf der Fundamentaldaten für {symbol}: {e}"))
+
+    live = pd.DataFrame.from_dict(rows, orient="index") if rows else None
+    frames = [df for df in (stored, live) if df is not None and not df.empty]
+    if not frames:
+        return SectionResult(None, messages)
+    df_combined = pd.concat(frames)
+    df_combined = df_combined.reindex([symbol for symbol in symbols if symbol in df_combined.index])
+    df_combined.index.name = "Symbol"
+    return SectionResult(df_combined.transpose(),
+                         messages + _stale_info_note(meta_cache, list(rows)) + _snapshot_note(snapshot, list(rows)))
+
+
+# --- Wertentwicklung ---
+def performance_frame(histories, symbols, snapshot=None):
+    """Performance in % (Zeiträume x Symbole), fehlende Werte als None.
+
+    Mit `snapshot` kommen enthaltene Symbole aus der nächtlichen Vorberechnung; enthält er
+    alle, darf `histories` None sein.
+    """
+    messages = []
+    stored, missing = snapshot.rows("performance", symbols) if snapshot is not None else (None, list(symbols))
+    perf_symbols = [s for s in missing if histories.data.get(s) is not None and not histories.data[s].empty]
+    for symbol in missing:
+        if symbol not in perf_symbols:
+            messages.append(("warning", f"Fehler bei der Performance-Berechnung für {symbol}: Keine gültigen Preisdaten erhalten für Performance-Berechnung"))
+
+    perf_df = compute_performance(close_matrix({symbol: histories.data[symbol] for symbol in perf_symbols}))
+    if stored is not None and not stored.empty:
+        perf_df = pd.concat([stored, perf_df]) if not perf_df.empty else stored
+        perf_df = perf_df.reindex([symbol for symbol in symbols if symbol in perf_df.index])
+    if perf_df.empty:
+        return SectionResult(None, messages)
+    perf_df_transposed = perf_df.transpose().astype(object)
+    return SectionResult(perf_df_transposed.where(perf_df_transposed.notna(), None),
+                         messages + _snapshot_note(snapshot, perf_symbols))
+
+
+# --- Risiko ---
+RISK_FORMATS = [("Volatilität", "percent"), ("Drawdown", "percent"), ("Sharpe Ratio", "ratio")]
+
+
+def risk_frame(histories, symbols, today, snapshot=None):
+    """Volatilität, Sharpe Ratio und Max. Drawdown (Kennzahl je Zeitraum x Symbole).
+
+    Mit `snapshot` kommen enthaltene Symbole aus der nächtlichen Vorberechnung; enthält er
+    alle, darf `histories` None sein.
+    """
+    windows = risk_windows(today)
+    stored, missing = snapshot.rows("risk", symbols) if snapshot is not None else (None, list(symbols))
+    risk_prices = close_matrix({symbol: histories.data.get(symbol) for symbol in missing})
+    df_risk = compute_risk(risk_prices, windows)
+    live_symbols = list(dict.fromkeys(df_risk["Symbol"]))
+    if stored is not None and not stored.empty:
+        df_risk = pd.concat([stored.reset_index(), df_risk], ignore_index=True)
+        order = {symbol: i for i, symbol in enumerate(symbols)}
+        df_risk = df_risk.sort_values("Symbol", key=lambda column: column.map(order), kind="stable")
+    if df_risk.empty:
+        return SectionResult(None, [])
+    return SectionResult(risk_display_frame(df_risk, windows), _snapshot_note(snapshot, live_symbols))
+
+
+# --- Rollierende Risikoanalyse ---
+def rolling_risk_frames(histories, symbols, benchmark_symbol, window):
+    """Rollierende Volatilität, Beta und Korrelation gegen die Benchmark sowie Korrelationsmatrix."""
+    columns = list(symbols) + ([benchmark_symbol] if benchmark_symbol and benchmark_symbol not in symbols else [])
+    prices = close_matrix({symbol: histories.data.get(symbol) for symbol in columns})
+    if prices.empty:
+        return SectionResult(None, [])
+    messages = []
+    if benchmark_symbol and benchmark_symbol not in prices.columns:
+        messages.append(("info", "Beta und Korrelation benötigen Kursdaten der Benchmark."))
+    rolling = rolling_risk(prices, benchmark=benchmark_symbol if benchmark_symbol in prices.columns else None, window=window)
+    correlation = correlation_matrix(prices.rename(columns={benchmark_symbol: "Benchmark"}) if benchmark_symbol else prices)
+    return SectionResult({"rolling": rolling, "correlation": correlation}, messages)
+
+
+# --- Detailanalyse ---
+# Angezeigter Zeitraum je Intervall; abgeleitete Intervalle laden ihn in den Basisbars
+INTERVAL_PERIODS = {
+    "15m": "15d",
+    "1h": "40d",
+    "1d": "1y",
+    "1wk": "5y",
+    "1mo": "8y"
+}
+
+
+def interval_history_many(price_store, symbols, interval):
+    """Bars für `interval`; 1h, 1wk und 1mo werden aus gespeicherten 15m- bzw. 1d-Bars abgeleitet."""
+    base = base_interval(interval)
+    frames = price_store.history_many(symbols, base, period=INTERVAL_PERIODS[interval])
+    if base == interval:
+        return frames
+    return {symbol: resample_ohlcv(df, interval, exchange_for_symbol(symbol)) for symbol, df in frames.items()}
+
+
+def detail_frame(price_store, symbol, interval, epoch, live=False):
+    """OHLCV-Bars für die Detailanalyse aus dem lokalen Speicher.
+
+    Im Live-Modus wird bei jedem Takt (`epoch`) nur ab dem letzten bekannten Bar nachgeladen.
+    Abgeleitete Intervalle laden nichts eigenes, sondern fassen die Basisbars zusammen.
+    """
+    if live:
+        price_store.refresh_tail(symbol, base_interval(interval))
+    return interval_history_many(price_store, [symbol], interval)[symbol]
+
+
+def detail_indicators(engines, df_detail, symbol, interval, indicators):
+    """Gewählte Indikatoren als zusätzliche Spalten.
+
+    Die Engine je (Symbol, Intervall, Auswahl) liegt in `engines` (pro Session) und rechnet
+    bei neuen Bars nur diese nach.
+    """
+    key = (symbol, interval, tuple(sorted(indicators)))
+    engine = engines.get(key)
+    if engine is None:
+        engine = engines[key] = IndicatorEngine(indicators)
+    return indicator_frame(df_detail, engine)
@@ -0,0 +1,124 @@
+import os
+import time
+import threading
+from concurrent.futures import Future
+
+from cachetools import LRUCache, TLRUCache
+
+from instrumentation import payload_bytes
+
+# --- Prozessweiter Daten-Cache ---
+# Alle Browser-Sessions eines Streamlit-Prozesses teilen sich diese Objekte. Gleichzeitige
+# Anfragen mit demselben Schlüssel (z. B. 30 Sessions mit der Standardauswahl um 9:00)
+# warten auf einen einzigen laufenden Abruf (Single-Flight); Ergebnisse bleiben kurz im
+# Speicher, begrenzt über die geschätzte Größe in Bytes.
+
+SHARED_CACHE_MB = float(os.environ.get("AKTIEN_SHARED_CACHE_MB", 256))
+SHARED_CACHE_TTL = float(os.environ.get("AKTIEN_SHARED_CACHE_TTL", 60))
+
+
+def _sizeof(value):
+    return max(payload_bytes(value), 1)
+
+
+class SingleFlight:
+    """Führt `fn` pro Schlüssel nur einmal gleichzeitig aus; weitere Aufrufer erhalten dasselbe Ergebnis."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Liefert (Ergebnis, True, falls auf einen laufenden Abruf gewartet wurde)."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class SizedLRU(LRUCache):
+    """LRU-Cache, dessen Grenze die geschätzte Größe der Werte in Bytes ist.
+
+    Nicht thread-sicher; Aufrufer halten ihre eigene Sperre. Zu große Werte werden nicht gemerkt.
+    """
+
+    def __init__(self, max_bytes):
+        super().__init__(maxsize=max_bytes, getsizeof=_sizeof)
+
+    def __setitem__(self, key, value):
+        if self.getsizeof(value) > self.maxsize:
+            self.pop(key, None)
+            return
+        super().__setitem__(key, value)
+
+
+class SharedCache:
+    """Thread-sicherer TTL-Cache mit Byte-Grenze und Single-Flight beim Laden."""
+
+    def __init__(self, max_bytes=SHARED_CACHE_MB * 1024 * 1024, ttl=SHARED_CACHE_TTL):
+        self.max_bytes = int(max_bytes)
+        self.ttl = ttl
+        self._cache = TLRUCache(
+            maxsize=self.max_bytes, ttu=lambda _key, _value, now: now + self.ttl,
+            timer=time.monotonic, getsizeof=_sizeof
+        )
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    def _store(self, key, value):
+        with self._lock:
+            # Einzelne Werte über der Grenze werden nicht gemerkt, nur durchgereicht
+            if _sizeof(value) <= self.max_bytes:
+                self._cache[key] = value
+
+    def get_or_load(self, key, loader):
+        with self._lock:
+            try:
+                value = self._cache[key]
+                self.stats["hits"] += 1
+                return value
+            except KeyError:
+                pass
+
+        def load():
+            value = loader()
+            self._store(key, value)
+            return value
+
+        value, coalesced = self._flight.do(key, load)
+        with self._lock:
+            self.stats["coalesced" if coalesced else "misses"] += 1
+        return value
+
+    def coalesce(self, key, loader):
+        """Gleichzeitige Abrufe bündeln, das Ergebnis aber nicht merken (z. B. sich bildende Bars)."""
+        value, coalesced = self._flight.do(key, loader)
+        with self._lock:
+            self.stats["coalesced" if coalesced else "misses"] += 1
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+    def size_bytes(self):
+        with self._lock:
+            return self._cache.currsize
@@ -0,0 +1,204 @@
+import os
+import sys
+import time
+import pickle
+import argparse
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+# --- Nächtlicher Snapshot der Übersichtstabellen ---
+# Wertentwicklung, Risiko und Fundamentaldaten für das ganze Universum werden nach
+# Börsenschluss ohne Streamlit vorberechnet und als versionierte Datei abgelegt. Die App
+# zeigt enthaltene Symbole direkt aus dem Snapshot und rechnet nur fehlende live.
+# Tabellen sind je Symbol indiziert (Risiko: eine Zeile je Symbol und Zeitraum).
+#
+# Neue Stände werden wie beim Kurs-Panel geschrieben und über die Datei CURRENT atomar
+# umgeschaltet. Kursdaten und Ticker.info werden parallel geladen; dabei werden auch der
+# lokale Kursspeicher, der Info-Cache und (ohne --no-panel) das Kurs-Panel "1d" aufgewärmt.
+#
+#   python snapshot.py                      # Universum aus main.py
+#   python snapshot.py --symbols AAPL,SAP.DE --no-panel
+#
+#   # crontab: werktags nach US-Börsenschluss (Serverzeit MEZ)
+#   30 22 * * 1-5  cd /pfad/zur/app && python snapshot.py
+
+SNAPSHOT_DIR = os.environ.get(
+    "AKTIEN_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "snapshots")
+)
+SNAPSHOT_MAX_AGE_HOURS = float(os.environ.get("AKTIEN_SNAPSHOT_MAX_AGE", 96))   # deckt Wochenenden ab
+SNAPSHOT_TABLES = ("performance", "risk", "fundamentals")
+KEEP_VERSIONS = 3
+RECHECK_SECONDS = 60
+
+
+class Snapshot:
+    """Ein geladener Snapshot-Stand."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            payload = pickle.load(f)
+        self.version = payload["version"]
+        self.built_at = payload["built_at"]
+        self.day = payload["day"]
+        self.tables = payload["tables"]
+
+    def __repr__(self):
+        # Gehört zum Fingerabdruck der Abschnitte: neuer Stand = neue Berechnung
+        return f"Snapshot({self.version})"
+
+    def age_seconds(self, now=None):
+        return (now or time.time()) - self.built_at
+
+    def age_text(self, now=None):
+        hours = self.age_seconds(now) / 3600
+        age = f"vor {hours:.0f} Std." if hours < 48 else f"vor {hours / 24:.0f} Tagen"
+        built = datetime.datetime.fromtimestamp(self.built_at).strftime("%d.%m.%Y %H:%M")
+        return f"Snapshot vom {built} ({age})"
+
+    def rows(self, table, symbols):
+        """(Zeilen der Tabelle für enthaltene Symbole, nicht enthaltene Symbole)."""
+        df = self.tables.get(table)
+        if df is None:
+            return None, list(symbols)
+        covered = set(df.index)
+        missing = [symbol for symbol in symbols if symbol not in covered]
+        return df[df.index.isin(symbols)], missing
+
+    def covers(self, table, symbols):
+        """True, wenn die Tabelle alle `symbols` enthält (Abschnitt braucht keine Live-Daten)."""
+        df = self.tables.get(table)
+        return df is not None and set(symbols) <= set(df.index)
+
+
+def build_tables(symbols, price_store, meta_cache, today):
+    """Alle Snapshot-Tabellen berechnen; liefert (Tabellen, Kursdaten)."""
+    import sections
+    from price_store import close_matrix
+    from performance import compute_performance
+    from risk import compute_risk
+
+    # Kurse (eine Multi-Ticker-Anfrage) und Ticker.info (Executor) gleichzeitig laden
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        histories_future = pool.submit(price_store.history_many, symbols, "1d", start=sections.history_start(today))
+        infos_future = pool.submit(meta_cache.info_many, symbols)
+        histories, infos = histories_future.result(), infos_future.result()
+
+    prices = close_matrix(histories)
+    performance = compute_performance(prices)
+    risk = compute_risk(prices, sections.risk_windows(today)).set_index("Symbol")
+
+    fundamentals = {}
+    for symbol, info in infos.items():
+        if not isinstance(info, dict):
+            continue
+        try:
+            fundamentals[symbol] = sections.fundamentals_row(info)
+        except Exception:
+            continue
+    fundamentals = pd.DataFrame.from_dict(fundamentals, orient="index")
+    fundamentals.index.name = "Symbol"
+
+    return {"performance": performance, "risk": risk, "fundamentals": fundamentals}, histories
+
+
+def write_snapshot(tables, day, root=SNAPSHOT_DIR):
+    """Neuen Snapshot schreiben und aktivieren; liefert die Version."""
+    os.makedirs(root, exist_ok=True)
+    version = time.strftime("v%Y%m%d-%H%M%S")
+    target = os.path.join(root, f"{version}.pkl")
+    with open(target + ".tmp", "wb") as f:
+        pickle.dump({"version": version, "built_at": time.time(), "day": day, "tables": tables}, f,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(target + ".tmp", target)
+
+    # Zeiger atomar umsetzen, dann alte Stände bis auf die letzten KEEP_VERSIONS entfernen
+    pointer = os.path.join(root, "CURRENT")
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer + ".tmp", pointer)
+    versions = sorted(name for name in os.listdir(root) if name.startswith("v") and name.endswith(".pkl"))
+    for old in versions[:-KEEP_VERSIONS]:
+        try:
+            os.remove(os.path.join(root, old))
+        except OSError:
+            pass
+    return version
+
+
+class SnapshotSource:
+    """Aktueller Snapshot; prüft höchstens alle `recheck` Sekunden auf neue Stände.
+
+    Stände älter als `max_age_hours` gelten als nicht vorhanden, dann rechnet die App live.
+    """
+
+    def __init__(self, root=SNAPSHOT_DIR, recheck=RECHECK_SECONDS, max_age_hours=SNAPSHOT_MAX_AGE_HOURS):
+        self.root = root
+        self.recheck = recheck
+        self.max_age_hours = max_age_hours
+        self._entry = None    # (Version, Snapshot oder None, Prüfzeit)
+        self._lock = threading.Lock()
+
+    def _current_version(self):
+        try:
+            with open(os.path.join(self.root, "CURRENT"), "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _load(self):
+        now = time.time()
+        entry = self._entry
+        if entry is not None and now - entry[2] < self.recheck:
+            return entry[1]
+        version = self._current_version()
+        if entry is not None and entry[0] == version:
+            self._entry = (version, entry[1], now)
+            return entry[1]
+        snapshot = None
+        if version:
+            try:
+                snapshot = Snapshot(os.path.join(self.root, f"{version}.pkl"))
+            except (OSError, pickle.UnpicklingError, EOFError, KeyError, AttributeError, ImportError):
+                snapshot = None
+        self._entry = (version, snapshot, now)
+        return snapshot
+
+    def get(self):
+        with self._lock:
+            snapshot = self._load()
+        if snapshot is None or snapshot.age_seconds() > self.max_age_hours * 3600:
+            return None
+        return snapshot
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Übersichtstabellen für das Universum vorberechnen (Snapshot)")
+    parser.add_argument("--symbols", default=None, help="Kommagetrennte Symbole statt des Universums aus main.py")
+    parser.add_argument("--no-panel", action="store_true", help="Kurs-Panel 1d nicht neu schreiben")
+    args = parser.parse_args(argv)
+
+    from price_store import PriceStore
+    from meta_cache import MetaCache
+    from screener import universe_from_main, parse_symbol_list
+    symbols = parse_symbol_list(args.symbols) if args.symbols else list(universe_from_main())
+    today = datetime.date.today()
+
+    started = time.perf_counter()
+    tables, histories = build_tables(symbols, PriceStore(), MetaCache(), today)
+    version = write_snapshot(tables, today)
+    print(f"Snapshot {version}: " + ", ".join(
+        f"{name} {tables[name].index.nunique()}/{len(symbols)}" for name in SNAPSHOT_TABLES
+    ) + f" Symbole in {time.perf_counter() - started:.1f} s")
+
+    if not args.no_panel:
+        from price_panel import write_panel
+        print(f"Panel 1d {write_panel(histories, '1d')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import os
+import ast
+import sys
+import json
+import argparse
+import subprocess
+
+# --- Startprofil ---
+# Misst Importzeit und residenten Speicher je Modul, wie main.py sie beim Kaltstart lädt.
+# Jeder Lauf startet einen frischen Interpreter, damit nichts aus dem Cache kommt.
+#
+#   python startup_profile.py                     # Tabelle für die Importe von main.py
+#   python startup_profile.py --with-forecasting   # zusätzlich Prophet/statsmodels (lazy geladen)
+#   python startup_profile.py --budget-seconds 3 --budget-mb 250   # Exit-Code 1 bei Überschreitung
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN_PATH = os.path.join(APP_DIR, "main.py")
+FORECASTING_MODULES = ["prophet", "statsmodels.tsa.holtwinters"]
+
+# Läuft im Kindprozess: Module nacheinander importieren, Zeit und RSS-Zuwachs messen
+_MEASURE_SCRIPT = r"""
+import sys, json, time, importlib
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        import os
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except Exception:
+        import resource
+        # ru_maxrss ist auf Linux in KiB, auf macOS in Byte
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage / 2**20 if sys.platform == "darwin" else usage / 2**10
+
+results = []
+base_rss = rss_mb()
+start_all = time.perf_counter()
+for name in json.loads(sys.argv[1]):
+    before_rss, before = rss_mb(), time.perf_counter()
+    error = None
+    try:
+        importlib.import_module(name)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    results.append({
+        "module": name,
+        "seconds": time.perf_counter() - before,
+        "rss_mb": rss_mb() - before_rss,
+        "error": error,
+    })
+print(json.dumps({
+    "modules": results,
+    "total_seconds": time.perf_counter() - start_all,
+    "base_rss_mb": base_rss,
+    "total_rss_mb": rss_mb(),
+}))
+"""
+
+
+def startup_modules(path=MAIN_PATH):
+    """Module, die main.py auf oberster Ebene importiert, in Importreihenfolge."""
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+def measure(modules):
+    output = subprocess.run(
+        [sys.executable, "-c", _MEASURE_SCRIPT, json.dumps(modules)],
+        cwd=APP_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_submodules(modules, top=15):
+    """Teuerste Einzelmodule laut `python -X importtime` (kumulierte Zeit in Sekunden)."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(f"import {name}" for name in modules)],
+        cwd=APP_DIR, capture_output=True, text=True
+    ).stderr
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((int(cumulative_us) / 1e6, int(self_us) / 1e6, name.strip()))
+    return sorted(entries, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Importzeit und Speicher beim Kaltstart von main.py messen")
+    parser.add_argument("--with-forecasting", action="store_true", help="Prophet/statsmodels mitmessen")
+    parser.add_argument("--top", type=int, default=15, help="Anzahl der teuersten Untermodule")
+    parser.add_argument("--budget-seconds", type=float, default=None, help="Maximale Importzeit gesamt")
+    parser.add_argument("--budget-mb", type=float, default=None, help="Maximaler residenter Speicher nach dem Import")
+    parser.add_argument("--json", action="store_true", help="Ergebnis als JSON ausgeben")
+    args = parser.parse_args(argv)
+
+    modules = startup_modules()
+    if args.with_forecasting:
+        modules += FORECASTING_MODULES
+    report = measure(modules)
+    report["slowest"] = [
+        {"module": name, "cumulative_seconds": cumulative, "self_seconds": own}
+        for cumulative, own, name in slowest_submodules(modules, args.top)
+    ]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'Modul':40} {'Zeit [s]':>10} {'RSS [MB]':>10}")
+        for entry in report["modules"]:
+            note = f"  ({entry['error']})" if entry["error"] else ""
+            print(f"{entry['module']:40} {entry['seconds']:10.3f} {entry['rss_mb']:10.1f}{note}")
+        print(f"{'Gesamt':40} {report['total_seconds']:10.3f} {report['total_rss_mb']:10.1f}")
+        print("\nTeuerste Untermodule (kumuliert):")
+        for entry in report["slowest"]:
+            print(f"  {entry['module']:50} {entry['cumulative_seconds']:8.3f} s")
+
+    over_budget = (
+        (args.budget_seconds is not None and report["total_seconds"] > args.budget_seconds) or
+        (args.budget_mb is not None and report["total_rss_mb"] > args.budget_mb)
+    )
+    if over_budget:
+        print("\nStartbudget überschritten.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
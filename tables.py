@@ -0,0 +1,116 @@
+import html
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+from cachetools import LRUCache
+
+# --- Tabellen-Darstellung ---
+# Ergebnistabellen haben Kennzahlen als Zeilen und Symbole als Spalten. Formatiert wird
+# zeilenweise und vektorisiert nach einer Format-Spezifikation (Prozent, Mrd., Kennzahl,
+# Badge, Text); das fertige HTML wird pro (Daten-Hash, Spezifikation, Theme) gemerkt.
+
+HTML_CACHE_SIZE = 64
+
+# printf-Formate der numerischen Arten; nicht-numerische Zellen bleiben Text
+NUMBER_FORMATS = {
+    "percent": "%.2f %%",
+    "billions": "%.2f",
+    "ratio": "%.2f",
+    "integer": "%.0f",
+}
+MISSING = "N/A"
+
+BADGE_COLORS = [
+    ("strong buy", "#006400", "Strong Buy"),
+    ("buy", "#28a745", "Buy"),
+    ("hold", "#ffc107", "Hold"),
+    ("neutral", "#ffc107", "Hold"),  # 'neutral' für Hold
+    ("sell", "#dc3545", "Sell"),
+]
+
+
+def format_badge(rating):
+    """Analysten-Rating als farbiges Badge."""
+    rating = str(rating).lower() # Sicherstellen, dass es ein String ist
+    color, label = "#6c757d", rating.capitalize() # capitalize für N/A
+    for pattern, badge_color, badge_label in BADGE_COLORS:
+        if pattern in rating:
+            color, label = badge_color, badge_label
+            break
+    return f"<span style='background-color:{color};color:white;padding:4px 8px;border-radius:6px;'>{label}</span>"
+
+
+def row_kinds(index, rules, default="text"):
+    """Formatart je Zeile: erste Regel (Teilstring, Art), deren Teilstring im Zeilennamen vorkommt."""
+    kinds = []
+    for label in index:
+        kind = default
+        for pattern, rule_kind in rules:
+            if pattern in str(label):
+                kind = rule_kind
+                break
+        kinds.append(kind)
+    return kinds
+
+
+def format_row(values, kind):
+    """Eine Zeile (Objekt-Array) in HTML-fertige Strings umwandeln."""
+    values = np.asarray(values, dtype=object)
+    missing = pd.isna(values)
+    if kind == "badge":
+        # Nur die wenigen verschiedenen Ratings formatieren, dann zuordnen
+        unique = {value: format_badge(value) for value in pd.unique(values[~missing])}
+        return np.array([unique[value] if not is_missing else MISSING for value, is_missing in zip(values, missing)], dtype=object)
+
+    text = np.array([html.escape(str(value)) for value in values], dtype=object)
+    text[missing] = MISSING
+    if kind not in NUMBER_FORMATS:
+        return text
+    numeric = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=float)
+    valid = ~np.isnan(numeric)
+    if valid.any():
+        text[valid] = np.char.mod(NUMBER_FORMATS[kind], numeric[valid]).astype(object)
+    return text
+
+
+def _table_html(cells, index, columns, css_class):
+    escape = html.escape
+    header = "".join(f"<th>{escape(str(column))}</th>" for column in columns)
+    body = "".join(
+        f"<tr><th>{escape(str(label))}</th>{''.join(f'<td>{cell}</td>' for cell in row)}</tr>"
+        for label, row in zip(index, cells)
+    )
+    return (
+        f'<table border="1" class="dataframe {css_class}"><thead><tr><th></th>{header}</tr></thead>'
+        f"<tbody>{body}</tbody></table>"
+    )
+
+
+def _data_hash(df):
+    hashed = pd.util.hash_pandas_object(df.astype(object), index=True).to_numpy()
+    digest = hashlib.sha1(hashed.tobytes())
+    digest.update(repr(list(df.columns)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+_html_cache = LRUCache(maxsize=HTML_CACHE_SIZE)
+_html_lock = threading.Lock()
+
+
+def render_table(df, rules=(), default="text", theme="light"):
+    """Tabelle (Kennzahlen x Symbole) als HTML, formatiert nach `rules` und gemerkt."""
+    rules = tuple(rules)
+    key = (_data_hash(df), rules, default, theme)
+    with _html_lock:
+        cached = _html_cache.get(key)
+    if cached is not None:
+        return cached
+
+    values = df.to_numpy(dtype=object)
+    cells = [format_row(row, kind) for row, kind in zip(values, row_kinds(df.index, rules, default))]
+    result = _table_html(cells, df.index, df.columns, f"aktien-{theme}")
+    with _html_lock:
+        _html_cache[key] = result
+    return result
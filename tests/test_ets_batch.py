@@ -0,0 +1,38 @@
+import pytest
+
+# Gebündeltes ETS gegen statsmodels: Prognosen über HORIZON Schritte dürfen höchstens
+# FORECAST_TOLERANCE (relativ zum letzten Kurs) abweichen.
+
+np = pytest.importorskip("numpy")
+statsmodels = pytest.importorskip("statsmodels.tsa.holtwinters")
+
+from ets_batch import batch_forecast  # noqa: E402
+
+HORIZON = 10
+FORECAST_TOLERANCE = 0.02
+
+
+def _series():
+    rng = np.random.default_rng(7)
+    steps = np.arange(300)
+    return {
+        "drift": 100 * np.exp(np.cumsum(rng.normal(0.001, 0.01, 300))),
+        "trend": 50 + 0.2 * steps + rng.normal(0, 1.0, 300),
+        "damped": 80 + 20 * (1 - 0.98 ** steps) + rng.normal(0, 0.3, 300),
+        "short": 30 + np.cumsum(rng.normal(0.05, 0.5, 60)),
+    }
+
+
+def _statsmodels_forecast(values):
+    model = statsmodels.ExponentialSmoothing(values, trend="add", damped_trend=True, seasonal=None).fit()
+    return np.asarray(model.forecast(HORIZON))
+
+
+@pytest.mark.filterwarnings("ignore")
+def test_batch_forecast_matches_statsmodels():
+    series = _series()
+    batched = batch_forecast(series, HORIZON)
+    for key, values in series.items():
+        expected = _statsmodels_forecast(values)
+        deviation = np.abs(batched[key] - expected).max() / values[-1]
+        assert deviation <= FORECAST_TOLERANCE, f"{key}: {deviation:.4f}"
@@ -0,0 +1,56 @@
+import datetime
+from functools import lru_cache
+
+import holidays
+import pandas as pd
+
+# --- Handelskalender ---
+# Handelstage für die beiden Universen der App: US-Börsen (NYSE) und Xetra.
+# Xetra schließt an den TARGET-Feiertagen der EZB sowie an Heiligabend und Silvester.
+
+US_EXCHANGE = "NYSE"
+XETRA_EXCHANGE = "XETR"
+
+EXCHANGE_TIMEZONES = {
+    US_EXCHANGE: "America/New_York",
+    XETRA_EXCHANGE: "Europe/Berlin",
+}
+
+# Handelszeiten (lokal) für Intraday-Daten
+EXCHANGE_SESSIONS = {
+    US_EXCHANGE: (datetime.time(9, 30), datetime.time(16, 0)),
+    XETRA_EXCHANGE: (datetime.time(9, 0), datetime.time(17, 30)),
+}
+
+
+def exchange_for_symbol(symbol):
+    """Börse eines Yahoo-Symbols: deutsche Werte und DAX auf Xetra, sonst NYSE."""
+    symbol = symbol.upper()
+    if symbol.endswith((".DE", ".F")) or symbol in ("^GDAXI", "^MDAXI", "^TECDAX"):
+        return XETRA_EXCHANGE
+    return US_EXCHANGE
+
+
+@lru_cache(maxsize=None)
+def _holidays(exchange, year):
+    if exchange == XETRA_EXCHANGE:
+        days = set(holidays.financial_holidays("ECB", years=year).keys())
+        days.update({datetime.date(year, 12, 24), datetime.date(year, 12, 31)})
+        return frozenset(days)
+    return frozenset(holidays.financial_holidays("NYSE", years=year).keys())
+
+
+def is_trading_day(exchange, day):
+    day = pd.Timestamp(day).date()
+    return day.weekday() < 5 and day not in _holidays(exchange, day.year)
+
+
+def last_trading_day(exchange, on_or_before):
+    day = pd.Timestamp(on_or_before).normalize()
+    while not is_trading_day(exchange, day):
+        day -= pd.Timedelta(days=1)
+    return day
+
+
+def previous_trading_day(exchange, before):
+    return last_trading_day(exchange, pd.Timestamp(before).normalize() - pd.Timedelta(days=1))